@@ -1,19 +1,31 @@
-import telebot
 from telebot import types
 from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
-import sqlite3
 from datetime import datetime, timedelta
 import json
 
-from config import ADMIN_BOT_TOKEN, ADMIN_IDS, LANGUAGES, get_translation
-from utils import get_user_language, get_text
+from config import ADMIN_IDS, get_translation
+from utils import get_user_language, get_text, load_user_language, invalidate_barbershop
+import db_pool
+from send_queue import send_queue
+from events import event_bus, SHOP_REGISTERED
+from reference_data import reference_data
+from database import init_database
+from bot_app import LazyBot
+from context import ContextMiddleware
+from callback_router import CallbackRouter
 
-# Initialize bot
-bot = telebot.TeleBot(ADMIN_BOT_TOKEN)
+# Bot is built on first use (see startadmin)
+bot = LazyBot('ADMIN_BOT_TOKEN', use_class_middlewares=True)
 
 # Admin session storage
 admin_sessions = {}
 
+bot.setup_middleware(ContextMiddleware(load_user_language, admin_sessions.get))
+
+# All inline buttons, matched on their callback data in one trie lookup
+router = CallbackRouter()
+router.attach(bot)
+
 
 def is_admin(user_id):
     """Check if user is admin"""
@@ -36,27 +48,25 @@ def start_command(message):
 
 def show_admin_dashboard(message, user_id):
     """Show admin dashboard"""
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
 
-    # Get statistics
-    cursor.execute("SELECT COUNT(*) FROM users")
-    total_users = cursor.fetchone()[0]
+        # Get statistics
+        cursor.execute("SELECT COUNT(*) FROM users")
+        total_users = cursor.fetchone()[0]
 
-    cursor.execute("SELECT COUNT(*) FROM barbershops")
-    total_shops = cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*) FROM barbershops")
+        total_shops = cursor.fetchone()[0]
 
-    cursor.execute("SELECT COUNT(*) FROM barbershops WHERE is_active = 1")
-    active_shops = cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*) FROM barbershops WHERE is_active = 1")
+        active_shops = cursor.fetchone()[0]
 
-    cursor.execute("SELECT COUNT(*) FROM barbershops WHERE is_active = 0")
-    pending_shops = cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*) FROM barbershops WHERE is_active = 0")
+        pending_shops = cursor.fetchone()[0]
 
-    cursor.execute(
-        "SELECT COUNT(*) FROM bookings WHERE DATE(created_at) = DATE('now')")
-    today_bookings = cursor.fetchone()[0]
-
-    conn.close()
+        cursor.execute(
+            "SELECT COUNT(*) FROM bookings WHERE DATE(created_at) = DATE('now')")
+        today_bookings = cursor.fetchone()[0]
 
     text = f"👨‍💼 *Админ-панель NavbatGo*\n\n"
     text += f"📊 *Статистика системы:*\n"
@@ -106,7 +116,7 @@ def show_admin_dashboard(message, user_id):
 # -------------------- SHOPS MANAGEMENT --------------------
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'manage_shops')
+@router.route('manage_shops')
 def manage_shops(call):
     """Manage barbershops"""
     user_id = call.from_user.id
@@ -120,21 +130,20 @@ def manage_shops(call):
 
 def show_shops_management(message, user_id):
     """Show shops management interface"""
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        SELECT b.id, b.name, c.name_ru, b.is_active, COUNT(bk.id) as bookings_count
-        FROM barbershops b
-        JOIN cities c ON b.city_id = c.id
-        LEFT JOIN bookings bk ON b.id = bk.barbershop_id AND DATE(bk.created_at) = DATE('now')
-        GROUP BY b.id
-        ORDER BY b.created_at DESC
-        LIMIT 10
-    ''')
-
-    shops = cursor.fetchall()
-    conn.close()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT b.id, b.name, c.name_ru, b.is_active, COUNT(bk.id) as bookings_count
+            FROM barbershops b
+            JOIN cities c ON b.city_id = c.id
+            LEFT JOIN bookings bk ON b.id = bk.barbershop_id AND DATE(bk.created_at) = DATE('now')
+            GROUP BY b.id
+            ORDER BY b.created_at DESC
+            LIMIT 10
+        ''')
+
+        shops = cursor.fetchall()
 
     text = f"🏢 *Управление барбершопами*\n\n"
     text += f"Последние 10 барбершопов:\n\n"
@@ -187,7 +196,7 @@ def show_shops_management(message, user_id):
         )
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'pending_shops')
+@router.route('pending_shops')
 def show_pending_shops(call):
     """Show pending shops for approval"""
     user_id = call.from_user.id
@@ -196,21 +205,20 @@ def show_pending_shops(call):
         bot.answer_callback_query(call.id, "❌ Нет доступа")
         return
 
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
 
-    cursor.execute('''
-        SELECT b.id, b.name, c.name_ru, d.name_ru, u.full_name, b.created_at
-        FROM barbershops b
-        JOIN cities c ON b.city_id = c.id
-        LEFT JOIN districts d ON b.district_id = d.id
-        JOIN users u ON b.owner_id = u.telegram_id
-        WHERE b.is_active = 0
-        ORDER BY b.created_at
-    ''')
+        cursor.execute('''
+            SELECT b.id, b.name, c.name_ru, d.name_ru, u.full_name, b.created_at
+            FROM barbershops b
+            JOIN cities c ON b.city_id = c.id
+            LEFT JOIN districts d ON b.district_id = d.id
+            JOIN users u ON b.owner_id = u.telegram_id
+            WHERE b.is_active = 0
+            ORDER BY b.created_at
+        ''')
 
-    pending_shops = cursor.fetchall()
-    conn.close()
+        pending_shops = cursor.fetchall()
 
     if not pending_shops:
         markup = InlineKeyboardMarkup()
@@ -261,50 +269,47 @@ def show_pending_shops(call):
     )
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('review_shop_'))
-def review_shop(call):
+@router.route('review_shop_<int:shop_id>')
+def review_shop(call, shop_id):
     """Review specific shop"""
     user_id = call.from_user.id
-    shop_id = int(call.data.split('_')[2])
 
     if not is_admin(user_id):
         bot.answer_callback_query(call.id, "❌ Нет доступа")
         return
 
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        SELECT b.name, b.address, b.phone, b.description, b.is_active,
-               c.name_ru, d.name_ru, u.full_name, u.phone as owner_phone,
-               b.created_at
-        FROM barbershops b
-        JOIN cities c ON b.city_id = c.id
-        LEFT JOIN districts d ON b.district_id = d.id
-        JOIN users u ON b.owner_id = u.telegram_id
-        WHERE b.id = ?
-    ''', (shop_id,))
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
 
-    shop_info = cursor.fetchone()
+        cursor.execute('''
+            SELECT b.name, b.address, b.phone, b.description, b.is_active,
+                   c.name_ru, d.name_ru, u.full_name, u.phone as owner_phone,
+                   b.created_at
+            FROM barbershops b
+            JOIN cities c ON b.city_id = c.id
+            LEFT JOIN districts d ON b.district_id = d.id
+            JOIN users u ON b.owner_id = u.telegram_id
+            WHERE b.id = ?
+        ''', (shop_id,))
 
-    if not shop_info:
-        bot.answer_callback_query(call.id, "❌ Барбершоп не найден")
-        return
+        shop_info = cursor.fetchone()
 
-    (name, address, phone, description, is_active,
-     city, district, owner_name, owner_phone, created_at) = shop_info
+        if not shop_info:
+            bot.answer_callback_query(call.id, "❌ Барбершоп не найден")
+            return
 
-    # Get photos
-    cursor.execute(
-        'SELECT photo_id FROM barbershop_photos WHERE barbershop_id = ?', (shop_id,))
-    photos = [row[0] for row in cursor.fetchall()]
+        (name, address, phone, description, is_active,
+         city, district, owner_name, owner_phone, created_at) = shop_info
 
-    # Get barbers
-    cursor.execute(
-        'SELECT full_name, experience_years, specialty FROM barbers WHERE barbershop_id = ?', (shop_id,))
-    barbers = cursor.fetchall()
+        # Get photos
+        cursor.execute(
+            'SELECT photo_id FROM barbershop_photos WHERE barbershop_id = ?', (shop_id,))
+        photos = [row[0] for row in cursor.fetchall()]
 
-    conn.close()
+        # Get barbers
+        cursor.execute(
+            'SELECT full_name, experience_years, specialty FROM barbers WHERE barbershop_id = ?', (shop_id,))
+        barbers = cursor.fetchall()
 
     # Format shop info
     status_text = {
@@ -429,55 +434,53 @@ def show_shop_actions(message, user_id, shop_id, is_active, text=None):
     )
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('approve_shop_'))
-def approve_shop(call):
+@router.route('approve_shop_<int:shop_id>')
+def approve_shop(call, shop_id):
     """Approve shop"""
     user_id = call.from_user.id
-    shop_id = int(call.data.split('_')[2])
 
     if not is_admin(user_id):
         bot.answer_callback_query(call.id, "❌ Нет доступа")
         return
 
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
+    with db_pool.transaction() as conn:
+        cursor = conn.cursor()
 
-    # Get shop info for notification
-    cursor.execute('''
-        SELECT b.name, b.owner_id 
-        FROM barbershops b 
-        WHERE b.id = ?
-    ''', (shop_id,))
+        # Get shop info for notification
+        cursor.execute('''
+            SELECT b.name, b.owner_id 
+            FROM barbershops b 
+            WHERE b.id = ?
+        ''', (shop_id,))
 
-    shop_info = cursor.fetchone()
+        shop_info = cursor.fetchone()
 
+        if shop_info:
+            # Update shop status
+            cursor.execute(
+                "UPDATE barbershops SET is_active = 1 WHERE id = ?", (shop_id,))
+
+    # Reply outside the transaction, it holds the write lock
     if not shop_info:
         bot.answer_callback_query(call.id, "❌ Барбершоп не найден")
         return
 
     shop_name, owner_id = shop_info
-
-    # Update shop status
-    cursor.execute(
-        "UPDATE barbershops SET is_active = 1 WHERE id = ?", (shop_id,))
-    conn.commit()
-    conn.close()
+    invalidate_barbershop(shop_id)
 
     # Notify barber
-    try:
-        from barber_bot import bot as barber_bot
-        barber_bot.send_message(
-            owner_id,
-            f"🎉 *Ваш барбершоп одобрен!*\n\n"
-            f"🏢 *{shop_name}* теперь активен в системе NavbatGo.\n\n"
-            f"Теперь клиенты могут:\n"
-            f"• Найти ваш барбершоп в поиске\n"
-            f"• Бронировать время онлайн\n"
-            f"• Оставлять отзывы\n\n"
-            f"✨ Желаем успешной работы!"
-        )
-    except:
-        pass
+    from barber_bot import bot as barber_bot
+    send_queue.send_message(
+        barber_bot,
+        owner_id,
+        f"🎉 *Ваш барбершоп одобрен!*\n\n"
+        f"🏢 *{shop_name}* теперь активен в системе NavbatGo.\n\n"
+        f"Теперь клиенты могут:\n"
+        f"• Найти ваш барбершоп в поиске\n"
+        f"• Бронировать время онлайн\n"
+        f"• Оставлять отзывы\n\n"
+        f"✨ Желаем успешной работы!"
+    )
 
     bot.answer_callback_query(call.id, "✅ Барбершоп одобрен")
 
@@ -485,11 +488,10 @@ def approve_shop(call):
     show_pending_shops(call)
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('reject_shop_'))
-def reject_shop(call):
+@router.route('reject_shop_<int:shop_id>')
+def reject_shop(call, shop_id):
     """Reject shop"""
     user_id = call.from_user.id
-    shop_id = int(call.data.split('_')[2])
 
     if not is_admin(user_id):
         bot.answer_callback_query(call.id, "❌ Нет доступа")
@@ -522,41 +524,39 @@ def handle_rejection_reason(message):
     shop_id = session['shop_id']
     reason = message.text.strip()
 
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
+    with db_pool.transaction() as conn:
+        cursor = conn.cursor()
 
-    # Get shop info for notification
-    cursor.execute('''
-        SELECT b.name, b.owner_id 
-        FROM barbershops b 
-        WHERE b.id = ?
-    ''', (shop_id,))
+        # Get shop info for notification
+        cursor.execute('''
+            SELECT b.name, b.owner_id 
+            FROM barbershops b 
+            WHERE b.id = ?
+        ''', (shop_id,))
 
-    shop_info = cursor.fetchone()
+        shop_info = cursor.fetchone()
+
+        if shop_info:
+            # Delete shop (or mark as rejected)
+            cursor.execute("DELETE FROM barbershops WHERE id = ?", (shop_id,))
 
     if not shop_info:
         bot.send_message(message.chat.id, "❌ Барбершоп не найден")
         return
 
     shop_name, owner_id = shop_info
-
-    # Delete shop (or mark as rejected)
-    cursor.execute("DELETE FROM barbershops WHERE id = ?", (shop_id,))
-    conn.commit()
-    conn.close()
+    invalidate_barbershop(shop_id)
 
     # Notify barber
-    try:
-        from barber_bot import bot as barber_bot
-        barber_bot.send_message(
-            owner_id,
-            f"❌ *Ваша заявка на регистрацию барбершопа отклонена*\n\n"
-            f"🏢 *{shop_name}*\n\n"
-            f"📝 *Причина:* {reason}\n\n"
-            f"Вы можете подать новую заявку с исправленными данными."
-        )
-    except:
-        pass
+    from barber_bot import bot as barber_bot
+    send_queue.send_message(
+        barber_bot,
+        owner_id,
+        f"❌ *Ваша заявка на регистрацию барбершопа отклонена*\n\n"
+        f"🏢 *{shop_name}*\n\n"
+        f"📝 *Причина:* {reason}\n\n"
+        f"Вы можете подать новую заявку с исправленными данными."
+    )
 
     bot.send_message(
         message.chat.id,
@@ -571,58 +571,55 @@ def handle_rejection_reason(message):
     show_pending_shops(message)
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('block_shop_'))
-def block_shop(call):
+@router.route('block_shop_<int:shop_id>')
+def block_shop(call, shop_id):
     """Block shop"""
     user_id = call.from_user.id
-    shop_id = int(call.data.split('_')[2])
 
     if not is_admin(user_id):
         bot.answer_callback_query(call.id, "❌ Нет доступа")
         return
 
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
+    with db_pool.transaction() as conn:
+        cursor = conn.cursor()
 
-    # Get shop info
-    cursor.execute(
-        "SELECT name, owner_id FROM barbershops WHERE id = ?", (shop_id,))
-    shop_info = cursor.fetchone()
+        # Get shop info
+        cursor.execute(
+            "SELECT name, owner_id FROM barbershops WHERE id = ?", (shop_id,))
+        shop_info = cursor.fetchone()
+
+        if shop_info:
+            # Update status
+            cursor.execute(
+                "UPDATE barbershops SET is_active = -1 WHERE id = ?", (shop_id,))
 
     if not shop_info:
         bot.answer_callback_query(call.id, "❌ Барбершоп не найден")
         return
 
     shop_name, owner_id = shop_info
-
-    # Update status
-    cursor.execute(
-        "UPDATE barbershops SET is_active = -1 WHERE id = ?", (shop_id,))
-    conn.commit()
-    conn.close()
+    invalidate_barbershop(shop_id)
 
     # Notify barber
-    try:
-        from barber_bot import bot as barber_bot
-        barber_bot.send_message(
-            owner_id,
-            f"🚫 *Ваш барбершоп заблокирован*\n\n"
-            f"🏢 *{shop_name}* временно недоступен для бронирования.\n\n"
-            f"Причина: нарушение правил платформы.\n"
-            f"По вопросам обращайтесь в поддержку."
-        )
-    except:
-        pass
+    from barber_bot import bot as barber_bot
+    send_queue.send_message(
+        barber_bot,
+        owner_id,
+        f"🚫 *Ваш барбершоп заблокирован*\n\n"
+        f"🏢 *{shop_name}* временно недоступен для бронирования.\n\n"
+        f"Причина: нарушение правил платформы.\n"
+        f"По вопросам обращайтесь в поддержку."
+    )
 
     bot.answer_callback_query(call.id, "🔴 Барбершоп заблокирован")
 
     # Refresh view
-    review_shop(call)
+    review_shop(call, shop_id)
 
 # -------------------- USERS MANAGEMENT --------------------
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'manage_users')
+@router.route('manage_users')
 def manage_users(call):
     """Manage users"""
     user_id = call.from_user.id
@@ -636,22 +633,21 @@ def manage_users(call):
 
 def show_users_management(message, user_id):
     """Show users management interface"""
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        SELECT u.telegram_id, u.full_name, u.phone, u.language, 
-               COUNT(bk.id) as bookings_count,
-               MAX(bk.created_at) as last_booking
-        FROM users u
-        LEFT JOIN bookings bk ON u.telegram_id = bk.client_id
-        GROUP BY u.telegram_id
-        ORDER BY u.registered_at DESC
-        LIMIT 10
-    ''')
-
-    users = cursor.fetchall()
-    conn.close()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT u.telegram_id, u.full_name, u.phone, u.language, 
+                   COUNT(bk.id) as bookings_count,
+                   MAX(bk.created_at) as last_booking
+            FROM users u
+            LEFT JOIN bookings bk ON u.telegram_id = bk.client_id
+            GROUP BY u.telegram_id
+            ORDER BY u.registered_at DESC
+            LIMIT 10
+        ''')
+
+        users = cursor.fetchall()
 
     text = f"👥 *Управление пользователями*\n\n"
     text += f"Последние 10 пользователей:\n\n"
@@ -706,7 +702,7 @@ def show_users_management(message, user_id):
 # -------------------- LOCATIONS MANAGEMENT --------------------
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'manage_locations')
+@router.route('manage_locations')
 def manage_locations(call):
     """Manage cities and districts"""
     user_id = call.from_user.id
@@ -720,20 +716,19 @@ def manage_locations(call):
 
 def show_locations_management(message, user_id):
     """Show locations management interface"""
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
 
-    # Get cities with district count
-    cursor.execute('''
-        SELECT c.id, c.name_ru, c.is_active, COUNT(d.id) as district_count
-        FROM cities c
-        LEFT JOIN districts d ON c.id = d.city_id AND d.is_active = 1
-        GROUP BY c.id
-        ORDER BY c.name_ru
-    ''')
+        # Get cities with district count
+        cursor.execute('''
+            SELECT c.id, c.name_ru, c.is_active, COUNT(d.id) as district_count
+            FROM cities c
+            LEFT JOIN districts d ON c.id = d.city_id AND d.is_active = 1
+            GROUP BY c.id
+            ORDER BY c.name_ru
+        ''')
 
-    cities = cursor.fetchall()
-    conn.close()
+        cities = cursor.fetchall()
 
     text = f"🏙 *Управление городами и районами*\n\n"
     text += f"Всего городов: {len(cities)}\n\n"
@@ -779,7 +774,7 @@ def show_locations_management(message, user_id):
         )
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'add_city')
+@router.route('add_city')
 def add_city(call):
     """Add new city"""
     user_id = call.from_user.id
@@ -853,16 +848,15 @@ def handle_city_name_en(message):
     session['name_en'] = message.text.strip()
 
     # Save to database
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
+    with db_pool.transaction() as conn:
+        cursor = conn.cursor()
 
-    cursor.execute('''
-        INSERT INTO cities (name_uz, name_ru, name_en)
-        VALUES (?, ?, ?)
-    ''', (session['name_uz'], session['name_ru'], session['name_en']))
+        cursor.execute('''
+            INSERT INTO cities (name_uz, name_ru, name_en)
+            VALUES (?, ?, ?)
+        ''', (session['name_uz'], session['name_ru'], session['name_en']))
 
-    conn.commit()
-    conn.close()
+    reference_data.invalidate()
 
     bot.send_message(
         message.chat.id,
@@ -878,7 +872,7 @@ def handle_city_name_en(message):
 # -------------------- BACK BUTTONS --------------------
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'back_to_dashboard')
+@router.route('back_to_dashboard')
 def back_to_dashboard(call):
     """Go back to dashboard"""
     user_id = call.from_user.id
@@ -889,12 +883,44 @@ def back_to_dashboard(call):
 
     show_admin_dashboard(call.message, user_id)
 
+# -------------------- NOTIFICATIONS --------------------
+
+
+def handle_shop_registered(payload):
+    """Tell the admins about a new barbershop registration"""
+    shop_id = payload['shop_id']
+
+    text = f"🆕 *Новая заявка на регистрацию барбершопа!*\n\n"
+    text += f"🏢 *Название:* {payload['name']}\n"
+    text += f"🆔 *ID:* {shop_id}\n"
+    text += f"📅 *Дата:* {datetime.now().strftime('%d.%m.%Y %H:%M')}\n\n"
+    text += "Для проверки нажмите кнопку ниже."
+
+    markup = InlineKeyboardMarkup()
+    markup.add(InlineKeyboardButton("👨‍💼 Проверить",
+               callback_data=f"review_shop_{shop_id}"))
+
+    for admin_id in ADMIN_IDS:
+        send_queue.send_message(
+            bot, admin_id, text, parse_mode='Markdown', reply_markup=markup)
+
 # -------------------- MAIN --------------------
 
 
+def setupadmin():
+    """Database, background tasks and event subscriptions of the bot"""
+    init_database()
+    db_pool.start_checkpoint_task()
+    send_queue.start()
+
+    event_bus.subscribe(SHOP_REGISTERED, handle_shop_registered, 'admin_bot')
+    event_bus.start_relay('admin_bot')
+
+
 def startadmin():
     """Main function to start the bot"""
     print("👨‍💼 Admin bot is starting...")
+    setupadmin()
     print("✅ Admin bot is running. Press Ctrl+C to stop.")
     bot.infinity_polling()
 
@@ -0,0 +1,494 @@
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from itertools import islice
+
+from config import (
+    SLOT_STEP_MINUTES, DEFAULT_SERVICE_DURATION,
+    AVAILABILITY_CACHE_SIZE, AVAILABILITY_CACHE_TTL
+)
+from schedules import schedule_store, to_minutes, to_time_str
+import db_pool
+
+# Bookings in these states occupy the barber's time
+ACTIVE_STATUSES = ('pending', 'confirmed')
+
+# Bitmap resolution: one bit per quantum of the day
+QUANTUM_MINUTES = 5
+
+
+def merge_intervals(intervals):
+    """Sort and merge overlapping [start, end) intervals"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def free_start_times(work_start, work_end, busy, duration=DEFAULT_SERVICE_DURATION,
+                     step=SLOT_STEP_MINUTES):
+    """Start minutes on the step grid where `duration` fits between bookings
+
+    `busy` is an iterable of [start, end) minute intervals. After merging
+    them the sweep visits every candidate and busy interval once.
+    """
+    busy = merge_intervals(busy)
+    free = []
+    index = 0
+    start = work_start
+    last_start = work_end - duration
+
+    while start <= last_start:
+        # Skip busy intervals that end before this candidate
+        while index < len(busy) and busy[index][1] <= start:
+            index += 1
+
+        if index < len(busy) and busy[index][0] < start + duration:
+            # Overlap: jump to the first grid point after this interval
+            busy_end = busy[index][1]
+            start += -(-(busy_end - start) // step) * step
+            continue
+
+        free.append(start)
+        start += step
+
+    return free
+
+
+def busy_intervals(rows):
+    """[(booking_time, duration_minutes)] rows -> [start, end) intervals"""
+    intervals = []
+    for booking_time, duration in rows:
+        start = to_minutes(booking_time)
+        intervals.append((start, start + (duration or DEFAULT_SERVICE_DURATION)))
+    return intervals
+
+
+def load_barber_days(conn, barber_ids, first_date, last_date):
+    """Schedules {barber_id: WeeklySchedule} and active bookings
+    [(id, barber_id, date, time, duration)] of barbers between two dates"""
+    cursor = conn.cursor()
+    placeholders = ', '.join('?' * len(barber_ids))
+    schedules = schedule_store.get_many(barber_ids, conn)
+
+    # Each booking blocks the duration of its service
+    cursor.execute(f'''
+        SELECT bk.id, bk.barber_id, bk.booking_date, bk.booking_time, s.duration_minutes
+        FROM bookings bk
+        LEFT JOIN services s ON bk.service_id = s.id
+        WHERE bk.barber_id IN ({placeholders}) AND bk.booking_date BETWEEN ? AND ?
+        AND bk.status IN (?, ?)
+    ''', list(barber_ids) + [first_date, last_date] + list(ACTIVE_STATUSES))
+
+    return schedules, cursor.fetchall()
+
+
+def load_days(conn, barber_id, first_date, last_date):
+    """WeeklySchedule and active bookings [(id, date, time, duration)] of a
+    barber between two dates (inclusive)"""
+    schedules, rows = load_barber_days(conn, [barber_id], first_date, last_date)
+    return schedules[barber_id], [(row[0],) + row[2:] for row in rows]
+
+
+def load_day(conn, barber_id, date):
+    """Work hours (None on a day off) and active bookings
+    [(id, time, duration)] of a barber-day"""
+    schedule, rows = load_days(conn, barber_id, date, date)
+    return schedule.hours(date), [(row[0],) + row[2:] for row in rows]
+
+
+def get_free_slots(conn, barber_id, date, duration=None):
+    """Free 'HH:MM' start times of a barber on a date (bookings from SQL)"""
+    hours, rows = load_day(conn, barber_id, date)
+    if hours is None:
+        return []
+    # Breaks block time just like bookings
+    busy = busy_intervals(row[1:] for row in rows) + list(hours.breaks)
+    starts = free_start_times(hours.start, hours.end, busy,
+                              duration or DEFAULT_SERVICE_DURATION)
+    return [to_time_str(start) for start in starts]
+
+
+def slot_is_free(conn, barber_id, date, time_str, duration=None):
+    """Whether a booking at time_str fits the work hours and overlaps no
+    active booking or break (for use inside a write transaction)"""
+    hours, rows = load_day(conn, barber_id, date)
+    if hours is None:
+        return False
+    start = to_minutes(time_str)
+    end = start + (duration or DEFAULT_SERVICE_DURATION)
+    if start < hours.start or end > hours.end:
+        return False
+    busy = busy_intervals(row[1:] for row in rows) + list(hours.breaks)
+    return not any(busy_start < end and start < busy_end for busy_start, busy_end in busy)
+
+
+# -------------------- BITMAPS --------------------
+
+
+def interval_mask(start, end):
+    """Bitmap of the quanta touched by [start, end) minutes"""
+    first = start // QUANTUM_MINUTES
+    last = -(-end // QUANTUM_MINUTES)
+    return ((1 << (last - first)) - 1) << first
+
+
+def fit_mask(free, length):
+    """Bits i where quanta i .. i+length-1 are all set in `free`"""
+    result = free
+    span = 1
+    while span < length:
+        shift = min(span, length - span)
+        result &= result >> shift
+        span += shift
+    return result
+
+
+def grid_mask(work_start, work_end, step=SLOT_STEP_MINUTES):
+    """Bits of the offered start times inside the work window"""
+    mask = 0
+    for start in range(work_start, work_end, step):
+        mask |= 1 << (start // QUANTUM_MINUTES)
+    return mask
+
+
+def mask_starts(mask):
+    """Start minutes of the set bits, in order"""
+    starts = []
+    while mask:
+        low = mask & -mask
+        starts.append((low.bit_length() - 1) * QUANTUM_MINUTES)
+        mask ^= low
+    return starts
+
+
+class BarberDay:
+    """Busy bitmap of one barber on one date"""
+
+    def __init__(self, work_start, work_end, bookings, breaks=()):
+        self.work_start = work_start
+        self.work_end = work_end
+        # Only quanta that lie fully inside the work hours and no break
+        first = -(-work_start // QUANTUM_MINUTES)
+        last = work_end // QUANTUM_MINUTES
+        self.work_mask = ((1 << max(last - first, 0)) - 1) << first
+        for break_start, break_end in breaks:
+            self.work_mask &= ~interval_mask(break_start, break_end)
+        self.grid = grid_mask(work_start, work_end)
+        self.bookings = bookings  # booking_id -> mask
+        self.busy = 0
+        for mask in bookings.values():
+            self.busy |= mask
+        self.loaded_at = time.monotonic()
+
+    def add(self, booking_id, mask):
+        self.bookings[booking_id] = mask
+        self.busy |= mask
+
+    def remove(self, booking_id):
+        # Rebuild from the remaining bookings: old data may hold overlaps
+        if self.bookings.pop(booking_id, None) is not None:
+            self.busy = 0
+            for mask in self.bookings.values():
+                self.busy |= mask
+
+    def free_starts(self, duration, held=0):
+        """Start minutes on the grid where `duration` fits
+
+        `held` is a mask of quanta held by other clients (see holds.py).
+        """
+        free = self.work_mask & ~(self.busy | held)
+        fits = fit_mask(free, -(-duration // QUANTUM_MINUTES))
+        return mask_starts(fits & self.grid)
+
+    def first_free_start(self, duration, not_before=0, held=0):
+        """Earliest start minute >= not_before where `duration` fits, or None"""
+        free = self.work_mask & ~(self.busy | held)
+        fits = fit_mask(free, -(-duration // QUANTUM_MINUTES)) & self.grid
+        fits &= -1 << -(-not_before // QUANTUM_MINUTES)
+        if not fits:
+            return None
+        return ((fits & -fits).bit_length() - 1) * QUANTUM_MINUTES
+
+    def count_free_starts(self, duration, held=0):
+        """Number of start times on the grid where `duration` fits"""
+        free = self.work_mask & ~(self.busy | held)
+        fits = fit_mask(free, -(-duration // QUANTUM_MINUTES))
+        return bin(fits & self.grid).count('1')
+
+    def fits(self, start, duration, held=0):
+        """Whether [start, start + duration) is inside work hours and free"""
+        mask = interval_mask(start, start + duration)
+        return mask & self.work_mask == mask and not mask & (self.busy | held)
+
+
+class AvailabilityIndex:
+    """LRU of BarberDay bitmaps kept in step with booking writes
+
+    A day is loaded from the database on first use and then updated by
+    booking_added()/booking_removed(); entries also expire after `ttl` so
+    writes made by another process are picked up.
+
+    Next to the days it keeps a next-free index: the first free start of
+    each barber, dropped whenever one of the barber's bookings changes.
+    As time passes a start only stops being "next" once it is in the past,
+    so an entry stays valid while it is not older than the query's lower
+    bound.
+
+    Slot holds (holds.py) are kept as separate masks per barber-day and
+    hidden from every lookup.
+    """
+
+    def __init__(self, maxsize=AVAILABILITY_CACHE_SIZE, ttl=AVAILABILITY_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._days = OrderedDict()  # (barber_id, date) -> BarberDay
+        self._next = {}  # barber_id -> {(duration, first, last date): (loaded_at, not_before, start)}
+        self._holds = {}  # (barber_id, date) -> {client_id: mask}
+        self._writes = 0  # Bumped by every booking write
+        self._lock = threading.Lock()
+
+    def _load(self, barber_ids, dates):
+        """Build BarberDays for barbers x dates with one bookings query"""
+        with db_pool.connection() as conn:
+            schedules, rows = load_barber_days(conn, barber_ids, min(dates), max(dates))
+
+        bookings = {(barber_id, date): {} for barber_id in barber_ids for date in dates}
+        for booking_id, barber_id, date, booking_time, duration in rows:
+            if (barber_id, date) in bookings:
+                start = to_minutes(booking_time)
+                bookings[(barber_id, date)][booking_id] = interval_mask(
+                    start, start + (duration or DEFAULT_SERVICE_DURATION))
+
+        days = {}
+        for barber_id in barber_ids:
+            for date in dates:
+                hours = schedules[barber_id].hours(date)
+                if hours is None:
+                    # Day off: nothing is free
+                    days[(barber_id, date)] = BarberDay(0, 0, bookings[(barber_id, date)])
+                else:
+                    days[(barber_id, date)] = BarberDay(
+                        hours.start, hours.end, bookings[(barber_id, date)], hours.breaks)
+        return days
+
+    def get_many(self, barber_ids, dates):
+        """{(barber_id, date): BarberDay}, loading all missing days together"""
+        days = {}
+        missing_barbers = set()
+        missing_dates = set()
+        now = time.monotonic()
+        with self._lock:
+            for barber_id in barber_ids:
+                for date in dates:
+                    day = self._days.get((barber_id, date))
+                    if day is not None and now - day.loaded_at < self.ttl:
+                        self._days.move_to_end((barber_id, date))
+                        days[(barber_id, date)] = day
+                    else:
+                        missing_barbers.add(barber_id)
+                        missing_dates.add(date)
+            writes = self._writes
+
+        if not missing_barbers:
+            return days
+
+        loaded = self._load(sorted(missing_barbers), sorted(missing_dates))
+        days.update(loaded)
+        with self._lock:
+            if self._writes != writes:
+                # A booking changed while loading - the load may have missed it
+                return days
+            for key, day in loaded.items():
+                self._days[key] = day
+                self._days.move_to_end(key)
+            while len(self._days) > self.maxsize:
+                self._days.popitem(last=False)
+        return days
+
+    def get_days(self, barber_id, dates):
+        """{date: BarberDay} for a barber, loading missing dates together"""
+        days = self.get_many([barber_id], dates)
+        return {date: days[(barber_id, date)] for date in dates}
+
+    def get_day(self, barber_id, date):
+        """BarberDay for a barber and 'YYYY-MM-DD' date"""
+        return self.get_days(barber_id, [date])[date]
+
+    def free_slot_counts(self, barber_id, dates, duration=None):
+        """{date: number of free start times} for a range of dates"""
+        days = self.get_days(barber_id, dates)
+        duration = duration or DEFAULT_SERVICE_DURATION
+        with self._lock:
+            return {date: day.count_free_starts(duration, self._held(barber_id, date))
+                    for date, day in days.items()}
+
+    def earliest_slots(self, barber_ids, dates, duration=None, limit=8, not_before=None):
+        """Earliest [(date, 'HH:MM', barber_id)] options across barbers
+
+        Each barber yields its free starts in time order and heapq.merge
+        combines them, so only as many days are scanned as needed for
+        `limit` options. Ties go to the barber listed first. `not_before`
+        is an optional (date, minutes) lower bound, e.g. the current time.
+        """
+        days = self.get_many(barber_ids, dates)
+        duration = duration or DEFAULT_SERVICE_DURATION
+        dates = sorted(dates)
+
+        def options(rank, barber_id):
+            for date in dates:
+                with self._lock:
+                    starts = days[(barber_id, date)].free_starts(
+                        duration, self._held(barber_id, date))
+                for start in starts:
+                    if not_before is None or (date, start) >= not_before:
+                        yield date, start, rank, barber_id
+
+        merged = heapq.merge(*(options(rank, barber_id)
+                               for rank, barber_id in enumerate(barber_ids)))
+        return [(date, to_time_str(start), barber_id)
+                for date, start, _, barber_id in islice(merged, limit)]
+
+    def next_free(self, barber_ids, dates, duration=None, not_before=None):
+        """{barber_id: (date, minutes) or None} - first free start of each
+        barber on the given dates, served from the next-free index
+
+        Barbers missing from the index are looked up one date at a time,
+        so a date is only loaded for barbers with no free start before it.
+        """
+        duration = duration or DEFAULT_SERVICE_DURATION
+        dates = sorted(dates)
+        key = (duration, dates[0], dates[-1])
+        result = {}
+        pending = []
+        now = time.monotonic()
+        with self._lock:
+            for barber_id in barber_ids:
+                entry = self._next.get(barber_id, {}).get(key)
+                if entry is not None and self._next_valid(entry, now, not_before):
+                    result[barber_id] = entry[2]
+                else:
+                    pending.append(barber_id)
+            writes = self._writes
+
+        if not pending:
+            return result
+
+        found = {}
+        for date in dates:
+            if not pending:
+                break
+            days = self.get_many(pending, [date])
+            remaining = []
+            with self._lock:
+                for barber_id in pending:
+                    start = days[(barber_id, date)].first_free_start(
+                        duration, not_before[1] if not_before and not_before[0] == date else 0,
+                        self._held(barber_id, date))
+                    if start is None:
+                        remaining.append(barber_id)
+                    else:
+                        found[barber_id] = (date, start)
+            pending = remaining
+        for barber_id in pending:
+            found[barber_id] = None
+        result.update(found)
+
+        with self._lock:
+            if self._writes == writes:
+                for barber_id, start in found.items():
+                    self._next.setdefault(barber_id, {})[key] = (now, not_before, start)
+        return result
+
+    def _next_valid(self, entry, now, not_before):
+        """Whether a next-free entry still answers a query from not_before"""
+        loaded_at, entry_not_before, start = entry
+        if now - loaded_at >= self.ttl:
+            return False
+        if entry_not_before is not None and (not_before is None or not_before < entry_not_before):
+            return False
+        return start is None or not_before is None or start >= not_before
+
+    def free_slots(self, barber_id, date, duration=None):
+        """Free 'HH:MM' start times for a service of `duration` minutes"""
+        day = self.get_day(barber_id, date)
+        with self._lock:
+            starts = day.free_starts(duration or DEFAULT_SERVICE_DURATION,
+                                     self._held(barber_id, date))
+        return [to_time_str(start) for start in starts]
+
+    def fits(self, barber_id, date, time_str, duration=None, client_id=None):
+        """Whether a booking at time_str would fit, ignoring client_id's own hold"""
+        day = self.get_day(barber_id, date)
+        with self._lock:
+            return day.fits(to_minutes(time_str), duration or DEFAULT_SERVICE_DURATION,
+                            self._held(barber_id, date, client_id))
+
+    def _held(self, barber_id, date, except_client=None):
+        """Mask of the held quanta of a barber-day (call with the lock held)"""
+        held = 0
+        for client_id, mask in self._holds.get((barber_id, date), {}).items():
+            if client_id != except_client:
+                held |= mask
+        return held
+
+    def hold_added(self, client_id, barber_id, date, time_str, duration=None):
+        """Hide a held slot from everyone else"""
+        start = to_minutes(time_str)
+        mask = interval_mask(start, start + (duration or DEFAULT_SERVICE_DURATION))
+        with self._lock:
+            self._writes += 1
+            self._next.pop(barber_id, None)
+            self._holds.setdefault((barber_id, date), {})[client_id] = mask
+
+    def hold_removed(self, client_id, barber_id, date):
+        """Show a released or expired hold again"""
+        with self._lock:
+            self._writes += 1
+            self._next.pop(barber_id, None)
+            holds = self._holds.get((barber_id, date))
+            if holds is not None:
+                holds.pop(client_id, None)
+                if not holds:
+                    del self._holds[(barber_id, date)]
+
+    def booking_added(self, booking_id, barber_id, date, time_str, duration=None):
+        """Mark a new active booking as busy (only if the day is loaded)"""
+        start = to_minutes(time_str)
+        mask = interval_mask(start, start + (duration or DEFAULT_SERVICE_DURATION))
+        with self._lock:
+            self._writes += 1
+            self._next.pop(barber_id, None)
+            day = self._days.get((barber_id, date))
+            if day is not None:
+                day.add(booking_id, mask)
+
+    def booking_removed(self, booking_id, barber_id, date):
+        """Free the time of a booking that is no longer active"""
+        with self._lock:
+            self._writes += 1
+            self._next.pop(barber_id, None)
+            day = self._days.get((barber_id, date))
+            if day is not None:
+                day.remove(booking_id)
+
+    def invalidate_barber(self, barber_id):
+        """Drop all days of a barber (e.g. after a schedule change)"""
+        with self._lock:
+            self._writes += 1
+            self._next.pop(barber_id, None)
+            for key in [key for key in self._days if key[0] == barber_id]:
+                del self._days[key]
+
+    def clear(self):
+        with self._lock:
+            self._days.clear()
+            self._next.clear()
+
+
+availability_index = AvailabilityIndex()
@@ -1,16 +1,26 @@
 import re
-import telebot
 from telebot import types
 from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardMarkup, KeyboardButton
-import sqlite3
 from datetime import datetime, timedelta
 import os
 
-from config import BARBER_BOT_TOKEN, LANGUAGES, get_translation
-from utils import get_user_language, get_text
-
-# Initialize bot
-bot = telebot.TeleBot(BARBER_BOT_TOKEN)
+from config import get_translation
+from utils import (
+    get_user_language, get_text, load_user_language, get_cities, get_districts,
+    invalidate_barbershop, update_booking_status, get_barber_schedule,
+    set_barber_hours, set_barber_exception, delete_barber_exception
+)
+from schedules import parse_hours, format_range
+import db_pool
+from send_queue import send_queue
+from events import event_bus, BOOKING_CREATED, BOOKING_CANCELLED, SHOP_REGISTERED
+from database import init_database
+from bot_app import LazyBot
+from context import ContextMiddleware
+from callback_router import CallbackRouter
+
+# Bot is built on first use (see startbarber)
+bot = LazyBot('BARBER_BOT_TOKEN', use_class_middlewares=True)
 
 # Barber session storage
 barber_sessions = {}
@@ -36,6 +46,7 @@ class BarberSession:
         }
         self.current_barber = None
         self.current_photo = None
+        self.schedule_edit = None  # (barber_id, weekday or None for an exception)
 
 
 def get_barber_session(user_id):
@@ -45,11 +56,46 @@ def get_barber_session(user_id):
     return barber_sessions[user_id]
 
 
+bot.setup_middleware(ContextMiddleware(load_user_language, get_barber_session))
+
+# All inline buttons, matched on their callback data in one trie lookup
+router = CallbackRouter()
+router.attach(bot)
+
+
 def clear_barber_session(user_id):
     """Clear barber session"""
     if user_id in barber_sessions:
         del barber_sessions[user_id]
 
+
+def get_owner_barbershop(user_id):
+    """(id, name, is_active) of the shop owned by user_id, or None"""
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT b.id, b.name, b.is_active
+            FROM barbershops b
+            WHERE b.owner_id = ?
+        ''', (user_id,))
+        return cursor.fetchone()
+
+
+def get_shop_bookings(shop_id, date):
+    """Bookings of a shop on a date, ordered by time"""
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT bk.id, br.full_name, u.full_name, bk.booking_time, bk.status, s.name_ru
+            FROM bookings bk
+            JOIN barbers br ON bk.barber_id = br.id
+            JOIN users u ON bk.client_id = u.telegram_id
+            LEFT JOIN services s ON bk.service_id = s.id
+            WHERE bk.barbershop_id = ? AND bk.booking_date = ?
+            ORDER BY bk.booking_time
+        ''', (shop_id, date))
+        return cursor.fetchall()
+
 # -------------------- COMMAND HANDLERS --------------------
 
 
@@ -60,17 +106,7 @@ def start_command(message):
     full_name = message.from_user.full_name
 
     # Check if user has barbershop
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        SELECT b.id, b.name, b.is_active 
-        FROM barbershops b
-        WHERE b.owner_id = ?
-    ''', (user_id,))
-
-    barbershop = cursor.fetchone()
-    conn.close()
+    barbershop = get_owner_barbershop(user_id)
 
     if barbershop:
         # User has barbershop - show management panel
@@ -152,7 +188,7 @@ def show_barber_panel(message, user_id, shop_id, shop_name, is_active):
 # -------------------- SHOP REGISTRATION --------------------
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'register_shop')
+@router.route('register_shop')
 def start_shop_registration(call):
     """Start shop registration process"""
     user_id = call.from_user.id
@@ -190,12 +226,7 @@ def handle_shop_name(message):
 
 def show_city_selection(message, user_id):
     """Show city selection for registration"""
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT id, name_ru FROM cities WHERE is_active = 1 ORDER BY name_ru")
-    cities = cursor.fetchall()
-    conn.close()
+    cities = get_cities('ru')
 
     markup = InlineKeyboardMarkup(row_width=2)
 
@@ -211,12 +242,11 @@ def show_city_selection(message, user_id):
     )
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('reg_city_'))
-def handle_reg_city_selection(call):
+@router.route('reg_city_<int:city_id>')
+def handle_reg_city_selection(call, city_id):
     """Handle city selection during registration"""
     user_id = call.from_user.id
     session = barber_sessions[user_id]
-    city_id = int(call.data.split('_')[2])
 
     session.shop_data['city_id'] = city_id
     session.step = 'waiting_district'
@@ -227,16 +257,7 @@ def handle_reg_city_selection(call):
 
 def show_district_selection(message, user_id, city_id):
     """Show district selection for registration"""
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT id, name_ru FROM districts 
-        WHERE city_id = ? AND is_active = 1 
-        ORDER BY name_ru
-    ''', (city_id,))
-
-    districts = cursor.fetchall()
-    conn.close()
+    districts = get_districts(city_id, 'ru')
 
     if not districts:
         # Skip district selection if no districts
@@ -267,12 +288,11 @@ def show_district_selection(message, user_id, city_id):
     )
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('reg_district_'))
-def handle_reg_district_selection(call):
+@router.route('reg_district_<int:district_id>')
+def handle_reg_district_selection(call, district_id):
     """Handle district selection during registration"""
     user_id = call.from_user.id
     session = barber_sessions[user_id]
-    district_id = int(call.data.split('_')[2])
 
     session.shop_data['district_id'] = district_id
     session.step = 'waiting_address'
@@ -668,82 +688,78 @@ def save_barbershop_to_db(message, user_id):
     """Save barbershop data to database"""
     session = barber_sessions[user_id]
 
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-
     try:
-        # Insert barbershop
-        cursor.execute('''
-            INSERT INTO barbershops 
-            (owner_id, name, city_id, district_id, address, phone, description, latitude, longitude, is_active)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)
-        ''', (
-            user_id,
-            session.shop_data['name'],
-            session.shop_data['city_id'],
-            session.shop_data['district_id'],
-            session.shop_data['address'],
-            session.shop_data['phone'],
-            session.shop_data['description'],
-            session.shop_data['latitude'],
-            session.shop_data['longitude']
-        ))
-
-        shop_id = cursor.lastrowid
-
-        # Insert photos
-        for i, photo_id in enumerate(session.shop_data['photos']):
-            is_main = 1 if i == 0 else 0
-            cursor.execute('''
-                INSERT INTO barbershop_photos (barbershop_id, photo_id, is_main)
-                VALUES (?, ?, ?)
-            ''', (shop_id, photo_id, is_main))
+        with db_pool.transaction() as conn:
+            cursor = conn.cursor()
 
-        # Insert barbers
-        for barber_data in session.shop_data['barbers']:
+            # Insert barbershop
             cursor.execute('''
-                INSERT INTO barbers 
-                (barbershop_id, full_name, experience_years, specialty, description)
-                VALUES (?, ?, ?, ?, ?)
+                INSERT INTO barbershops 
+                (owner_id, name, city_id, district_id, address, phone, description, latitude, longitude, is_active)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)
             ''', (
-                shop_id,
-                barber_data['name'],
-                barber_data['experience'],
-                barber_data['specialty'],
-                barber_data['description']
+                user_id,
+                session.shop_data['name'],
+                session.shop_data['city_id'],
+                session.shop_data['district_id'],
+                session.shop_data['address'],
+                session.shop_data['phone'],
+                session.shop_data['description'],
+                session.shop_data['latitude'],
+                session.shop_data['longitude']
             ))
 
-            barber_id = cursor.lastrowid
+            shop_id = cursor.lastrowid
 
-            # Insert barber photos
-            for photo_id in barber_data['photos']:
+            # Insert photos
+            for i, photo_id in enumerate(session.shop_data['photos']):
+                is_main = 1 if i == 0 else 0
                 cursor.execute('''
-                    INSERT INTO barber_photos (barber_id, photo_id)
-                    VALUES (?, ?)
-                ''', (barber_id, photo_id))
+                    INSERT INTO barbershop_photos (barbershop_id, photo_id, is_main)
+                    VALUES (?, ?, ?)
+                ''', (shop_id, photo_id, is_main))
 
-        conn.commit()
-
-        # Add default services
-        default_services = [
-            (shop_id, "Мужская стрижка", "Мужская стрижка",
-             "Men's haircut", 50000, 45),
-            (shop_id, "Стрижка машинкой",
-             "Стрижка машинкой", "Clipper cut", 30000, 30),
-            (shop_id, "Стрижка + борода", "Стрижка + борода",
-             "Haircut + beard", 70000, 60),
-            (shop_id, "Королевское бритье",
-             "Королевское бритье", "Royal shave", 40000, 40),
-            (shop_id, "Укладка", "Укладка", "Styling", 25000, 20)
-        ]
-
-        cursor.executemany('''
-            INSERT INTO services 
-            (barbershop_id, name_uz, name_ru, name_en, price, duration_minutes)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', default_services)
-
-        conn.commit()
+            # Insert barbers
+            for barber_data in session.shop_data['barbers']:
+                cursor.execute('''
+                    INSERT INTO barbers 
+                    (barbershop_id, full_name, experience_years, specialty, description)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (
+                    shop_id,
+                    barber_data['name'],
+                    barber_data['experience'],
+                    barber_data['specialty'],
+                    barber_data['description']
+                ))
+
+                barber_id = cursor.lastrowid
+
+                # Insert barber photos
+                for photo_id in barber_data['photos']:
+                    cursor.execute('''
+                        INSERT INTO barber_photos (barber_id, photo_id)
+                        VALUES (?, ?)
+                    ''', (barber_id, photo_id))
+
+            # Add default services
+            default_services = [
+                (shop_id, "Мужская стрижка", "Мужская стрижка",
+                 "Men's haircut", 50000, 45),
+                (shop_id, "Стрижка машинкой",
+                 "Стрижка машинкой", "Clipper cut", 30000, 30),
+                (shop_id, "Стрижка + борода", "Стрижка + борода",
+                 "Haircut + beard", 70000, 60),
+                (shop_id, "Королевское бритье",
+                 "Королевское бритье", "Royal shave", 40000, 40),
+                (shop_id, "Укладка", "Укладка", "Styling", 25000, 20)
+            ]
+
+            cursor.executemany('''
+                INSERT INTO services 
+                (barbershop_id, name_uz, name_ru, name_en, price, duration_minutes)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', default_services)
 
         # Send success message
         success_text = f"🎉 *Поздравляем! Ваш барбершоп зарегистрирован!*\n\n"
@@ -776,84 +792,53 @@ def save_barbershop_to_db(message, user_id):
         clear_barber_session(user_id)
 
         # Notify admin about new registration
-        notify_admin_about_new_shop(shop_id, session.shop_data['name'])
+        event_bus.publish(SHOP_REGISTERED, shop_id=shop_id,
+                          name=session.shop_data['name'], owner_id=user_id)
 
     except Exception as e:
-        conn.rollback()
         print(f"Error saving barbershop: {e}")
         bot.send_message(
             message.chat.id,
             "❌ Произошла ошибка при сохранении данных. Пожалуйста, попробуйте снова."
         )
-    finally:
-        conn.close()
-
 
-def notify_admin_about_new_shop(shop_id, shop_name):
-    """Notify admin about new barbershop registration"""
-    # Get admin IDs from config
-    from config import ADMIN_IDS
-
-    for admin_id in ADMIN_IDS:
-        try:
-            text = f"🆕 *Новая заявка на регистрацию барбершопа!*\n\n"
-            text += f"🏢 *Название:* {shop_name}\n"
-            text += f"🆔 *ID:* {shop_id}\n"
-            text += f"📅 *Дата:* {datetime.now().strftime('%d.%m.%Y %H:%M')}\n\n"
-            text += "Для проверки перейдите в админ-панель."
-
-            markup = InlineKeyboardMarkup()
-            markup.add(InlineKeyboardButton("👨‍💼 Перейти в админку",
-                       callback_data=f"admin_review_{shop_id}"))
-
-            bot.send_message(
-                admin_id,
-                text,
-                parse_mode='Markdown',
-                reply_markup=markup
-            )
-        except:
-            pass
 
 # -------------------- BOOKINGS MANAGEMENT --------------------
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('bookings_'))
-def handle_bookings_menu(call):
+@router.route('bookings_<int:shop_id>')
+def handle_bookings_menu(call, shop_id):
     """Handle bookings menu"""
     user_id = call.from_user.id
-    shop_id = int(call.data.split('_')[1])
 
     show_bookings_menu(call.message, user_id, shop_id)
 
 
 def show_bookings_menu(message, user_id, shop_id):
     """Show bookings management menu"""
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-
-    # Get shop name
-    cursor.execute("SELECT name FROM barbershops WHERE id = ?", (shop_id,))
-    shop_name = cursor.fetchone()[0]
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
 
-    # Get today's bookings count
-    today = datetime.now().strftime("%Y-%m-%d")
-    cursor.execute('''
-        SELECT COUNT(*) FROM bookings 
-        WHERE barbershop_id = ? AND booking_date = ? AND status IN ('pending', 'confirmed')
-    ''', (shop_id, today))
+        # Get shop name
+        cursor.execute("SELECT name FROM barbershops WHERE id = ?", (shop_id,))
+        shop_name = cursor.fetchone()[0]
 
-    today_count = cursor.fetchone()[0]
+        # Get today's bookings count
+        today = datetime.now().strftime("%Y-%m-%d")
+        cursor.execute('''
+            SELECT COUNT(*) FROM bookings 
+            WHERE barbershop_id = ? AND booking_date = ? AND status IN ('pending', 'confirmed')
+        ''', (shop_id, today))
 
-    # Get pending bookings count
-    cursor.execute('''
-        SELECT COUNT(*) FROM bookings 
-        WHERE barbershop_id = ? AND status = 'pending'
-    ''', (shop_id,))
+        today_count = cursor.fetchone()[0]
 
-    pending_count = cursor.fetchone()[0]
+        # Get pending bookings count
+        cursor.execute('''
+            SELECT COUNT(*) FROM bookings 
+            WHERE barbershop_id = ? AND status = 'pending'
+        ''', (shop_id,))
 
-    conn.close()
+        pending_count = cursor.fetchone()[0]
 
     text = f"📋 *Управление бронированиями*\n\n"
     text += f"🏢 *Барбершоп:* {shop_name}\n\n"
@@ -898,29 +883,14 @@ def show_bookings_menu(message, user_id, shop_id):
         )
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('today_bookings_'))
-def show_today_bookings(call):
+@router.route('today_bookings_<int:shop_id>')
+def show_today_bookings(call, shop_id):
     """Show today's bookings"""
     user_id = call.from_user.id
-    shop_id = int(call.data.split('_')[2])
 
     today = datetime.now().strftime("%Y-%m-%d")
 
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        SELECT bk.id, br.full_name, u.full_name, bk.booking_time, bk.status, s.name_ru
-        FROM bookings bk
-        JOIN barbers br ON bk.barber_id = br.id
-        JOIN users u ON bk.client_id = u.telegram_id
-        LEFT JOIN services s ON bk.service_id = s.id
-        WHERE bk.barbershop_id = ? AND bk.booking_date = ?
-        ORDER BY bk.booking_time
-    ''', (shop_id, today))
-
-    bookings = cursor.fetchall()
-    conn.close()
+    bookings = get_shop_bookings(shop_id, today)
 
     if not bookings:
         markup = InlineKeyboardMarkup()
@@ -983,30 +953,28 @@ def show_today_bookings(call):
     )
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('view_booking_'))
-def view_booking_details(call):
+@router.route('view_booking_<int:booking_id>')
+def view_booking_details(call, booking_id):
     """View booking details"""
     user_id = call.from_user.id
-    booking_id = int(call.data.split('_')[2])
-
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        SELECT bk.booking_date, bk.booking_time, bk.status, bk.notes,
-               u.full_name, u.phone,
-               br.full_name, b.name,
-               s.name_ru, s.price
-        FROM bookings bk
-        JOIN users u ON bk.client_id = u.telegram_id
-        JOIN barbers br ON bk.barber_id = br.id
-        JOIN barbershops b ON bk.barbershop_id = b.id
-        LEFT JOIN services s ON bk.service_id = s.id
-        WHERE bk.id = ?
-    ''', (booking_id,))
-
-    booking = cursor.fetchone()
-    conn.close()
+
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT bk.booking_date, bk.booking_time, bk.status, bk.notes,
+                   u.full_name, u.phone,
+                   br.full_name, b.name,
+                   s.name_ru, s.price
+            FROM bookings bk
+            JOIN users u ON bk.client_id = u.telegram_id
+            JOIN barbers br ON bk.barber_id = br.id
+            JOIN barbershops b ON bk.barbershop_id = b.id
+            LEFT JOIN services s ON bk.service_id = s.id
+            WHERE bk.id = ?
+        ''', (booking_id,))
+
+        booking = cursor.fetchone()
 
     if not booking:
         bot.answer_callback_query(call.id, "❌ Бронь не найдена")
@@ -1073,12 +1041,11 @@ def view_booking_details(call):
         )
 
     # Get shop_id for back button
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT barbershop_id FROM bookings WHERE id = ?", (booking_id,))
-    shop_id = cursor.fetchone()[0]
-    conn.close()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT barbershop_id FROM bookings WHERE id = ?", (booking_id,))
+        shop_id = cursor.fetchone()[0]
 
     markup.add(
         InlineKeyboardButton(
@@ -1096,144 +1063,75 @@ def view_booking_details(call):
     )
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('confirm_booking_'))
-def confirm_booking(call):
-    """Confirm booking"""
-    booking_id = int(call.data.split('_')[2])
-
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-
-    cursor.execute(
-        "UPDATE bookings SET status = 'confirmed' WHERE id = ?", (booking_id,))
-    conn.commit()
+# Stale button: the booking was changed meanwhile or its time is taken
+BOOKING_CHANGED_ALERT = "⚠️ Бронь уже изменена или это время занято"
 
-    # Get booking info for notification
-    cursor.execute('''
-        SELECT u.telegram_id, b.name, br.full_name, bk.booking_date, bk.booking_time
-        FROM bookings bk
-        JOIN users u ON bk.client_id = u.telegram_id
-        JOIN barbershops b ON bk.barbershop_id = b.id
-        JOIN barbers br ON bk.barber_id = br.id
-        WHERE bk.id = ?
-    ''', (booking_id,))
 
-    booking_info = cursor.fetchone()
-    conn.close()
-
-    if booking_info:
-        client_id, shop_name, barber_name, date, time = booking_info
-
-        # Notify client
-        try:
-            notification = f"✅ *Ваша бронь подтверждена!*\n\n"
-            notification += f"🏢 *Барбершоп:* {shop_name}\n"
-            notification += f"💇 *Мастер:* {barber_name}\n"
-            notification += f"📅 *Дата:* {date}\n"
-            notification += f"⏰ *Время:* {time}\n\n"
-            notification += "📍 Пожалуйста, приходите вовремя!"
-
-            bot.send_message(client_id, notification, parse_mode='Markdown')
-        except:
-            pass
+@router.route('confirm_booking_<int:booking_id>')
+def confirm_booking(call, booking_id):
+    """Confirm booking"""
 
-    bot.answer_callback_query(call.id, "✅ Бронь подтверждена")
+    # The user bot notifies the client (booking.confirmed)
+    if update_booking_status(booking_id, 'confirmed'):
+        bot.answer_callback_query(call.id, "✅ Бронь подтверждена")
+    else:
+        bot.answer_callback_query(call.id, BOOKING_CHANGED_ALERT, show_alert=True)
 
     # Refresh view
-    view_booking_details(call)
+    view_booking_details(call, booking_id)
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('reject_booking_'))
-def reject_booking(call):
+@router.route('reject_booking_<int:booking_id>')
+def reject_booking(call, booking_id):
     """Reject booking"""
-    booking_id = int(call.data.split('_')[2])
-
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-
-    cursor.execute(
-        "UPDATE bookings SET status = 'cancelled' WHERE id = ?", (booking_id,))
-    conn.commit()
-
-    # Get booking info for notification
-    cursor.execute('''
-        SELECT u.telegram_id, b.name, br.full_name, bk.booking_date, bk.booking_time
-        FROM bookings bk
-        JOIN users u ON bk.client_id = u.telegram_id
-        JOIN barbershops b ON bk.barbershop_id = b.id
-        JOIN barbers br ON bk.barber_id = br.id
-        WHERE bk.id = ?
-    ''', (booking_id,))
 
-    booking_info = cursor.fetchone()
-    conn.close()
-
-    if booking_info:
-        client_id, shop_name, barber_name, date, time = booking_info
-
-        # Notify client
-        try:
-            notification = f"❌ *Ваша бронь отклонена*\n\n"
-            notification += f"🏢 *Барбершоп:* {shop_name}\n"
-            notification += f"📅 *Дата:* {date}\n"
-            notification += f"⏰ *Время:* {time}\n\n"
-            notification += "Пожалуйста, выберите другое время или свяжитесь с барбершопом."
-
-            bot.send_message(client_id, notification, parse_mode='Markdown')
-        except:
-            pass
-
-    bot.answer_callback_query(call.id, "❌ Бронь отклонена")
+    # The user bot notifies the client (booking.cancelled)
+    if update_booking_status(booking_id, 'cancelled'):
+        bot.answer_callback_query(call.id, "❌ Бронь отклонена")
+    else:
+        bot.answer_callback_query(call.id, BOOKING_CHANGED_ALERT, show_alert=True)
 
     # Refresh view
-    view_booking_details(call)
+    view_booking_details(call, booking_id)
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('complete_booking_'))
-def complete_booking(call):
+@router.route('complete_booking_<int:booking_id>')
+def complete_booking(call, booking_id):
     """Complete booking"""
-    booking_id = int(call.data.split('_')[2])
 
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-
-    cursor.execute(
-        "UPDATE bookings SET status = 'completed' WHERE id = ?", (booking_id,))
-    conn.commit()
-    conn.close()
-
-    bot.answer_callback_query(call.id, "🏁 Бронь завершена")
+    if update_booking_status(booking_id, 'completed'):
+        bot.answer_callback_query(call.id, "🏁 Бронь завершена")
+    else:
+        bot.answer_callback_query(call.id, BOOKING_CHANGED_ALERT, show_alert=True)
 
     # Refresh view
-    view_booking_details(call)
+    view_booking_details(call, booking_id)
 
 # -------------------- BARBERS MANAGEMENT --------------------
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('barbers_'))
-def handle_barbers_menu(call):
+@router.route('barbers_<int:shop_id>')
+def handle_barbers_menu(call, shop_id):
     """Handle barbers management menu"""
     user_id = call.from_user.id
-    shop_id = int(call.data.split('_')[1])
 
     show_barbers_management(call.message, user_id, shop_id)
 
 
 def show_barbers_management(message, user_id, shop_id):
     """Show barbers management interface"""
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
 
-    # Get barbers
-    cursor.execute('''
-        SELECT id, full_name, experience_years, specialty, rating, is_active
-        FROM barbers 
-        WHERE barbershop_id = ?
-        ORDER BY full_name
-    ''', (shop_id,))
+        # Get barbers
+        cursor.execute('''
+            SELECT id, full_name, experience_years, specialty, rating, is_active
+            FROM barbers 
+            WHERE barbershop_id = ?
+            ORDER BY full_name
+        ''', (shop_id,))
 
-    barbers = cursor.fetchall()
-    conn.close()
+        barbers = cursor.fetchall()
 
     text = f"👥 *Управление мастерами*\n\n"
     text += f"Всего мастеров: {len(barbers)}\n\n"
@@ -1289,11 +1187,10 @@ def show_barbers_management(message, user_id, shop_id):
         )
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('add_barber_'))
-def add_new_barber(call):
+@router.route('add_barber_<int:shop_id>')
+def add_new_barber(call, shop_id):
     """Start adding new barber"""
     user_id = call.from_user.id
-    shop_id = int(call.data.split('_')[2])
 
     # Store shop_id in session
     if user_id not in barber_sessions:
@@ -1354,32 +1251,31 @@ def save_barber_to_db(message, user_id):
         bot.send_message(message.chat.id, "❌ Ошибка данных")
         return
 
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-
     try:
-        cursor.execute('''
-            INSERT INTO barbers 
-            (barbershop_id, full_name, experience_years, specialty, description)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (
-            shop_id,
-            session.current_barber['name'],
-            session.current_barber['experience'],
-            session.current_barber['specialty'],
-            session.current_barber['description']
-        ))
-
-        barber_id = cursor.lastrowid
-
-        # Insert barber photos
-        for photo_id in session.current_barber['photos']:
+        with db_pool.transaction() as conn:
+            cursor = conn.cursor()
             cursor.execute('''
-                INSERT INTO barber_photos (barber_id, photo_id)
-                VALUES (?, ?)
-            ''', (barber_id, photo_id))
+                INSERT INTO barbers 
+                (barbershop_id, full_name, experience_years, specialty, description)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (
+                shop_id,
+                session.current_barber['name'],
+                session.current_barber['experience'],
+                session.current_barber['specialty'],
+                session.current_barber['description']
+            ))
+
+            barber_id = cursor.lastrowid
+
+            # Insert barber photos
+            for photo_id in session.current_barber['photos']:
+                cursor.execute('''
+                    INSERT INTO barber_photos (barber_id, photo_id)
+                    VALUES (?, ?)
+                ''', (barber_id, photo_id))
 
-        conn.commit()
+        invalidate_barbershop(shop_id)
 
         bot.send_message(
             message.chat.id,
@@ -1395,42 +1291,245 @@ def save_barber_to_db(message, user_id):
         show_barbers_management(message, user_id, shop_id)
 
     except Exception as e:
-        conn.rollback()
         print(f"Error saving barber: {e}")
         bot.send_message(
             message.chat.id,
             "❌ Произошла ошибка при сохранении мастера."
         )
-    finally:
-        conn.close()
+
+# -------------------- WORK SCHEDULE --------------------
+
+WEEKDAYS = ['Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс']
+
+
+def format_day_hours(hours):
+    """DayHours -> '09:00-19:00 (перерыв 13:00-14:00)', None -> 'выходной'"""
+    if hours is None:
+        return "выходной"
+    text = format_range(hours.start, hours.end)
+    if hours.breaks:
+        text += " (перерыв " + ", ".join(format_range(*b) for b in hours.breaks) + ")"
+    return text
+
+
+def get_owned_barber(barber_id, user_id):
+    """(full_name, shop_id) of a barber in a shop owned by user_id, or None"""
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT br.full_name, br.barbershop_id
+            FROM barbers br
+            JOIN barbershops b ON br.barbershop_id = b.id
+            WHERE br.id = ? AND b.owner_id = ?
+        ''', (barber_id, user_id))
+        return cursor.fetchone()
+
+
+@router.route('view_barber_<int:barber_id>')
+def view_barber_schedule(call, barber_id):
+    """Handle barber button in barbers management"""
+    user_id = call.from_user.id
+
+    if not get_owned_barber(barber_id, user_id):
+        bot.answer_callback_query(call.id, "❌ Мастер не найден")
+        return
+
+    show_barber_schedule(call.message, user_id, barber_id)
+
+
+def show_barber_schedule(message, user_id, barber_id):
+    """Show a barber's weekly hours and upcoming exceptions"""
+    barber = get_owned_barber(barber_id, user_id)
+    if not barber:
+        return
+    name, shop_id = barber
+    schedule = get_barber_schedule(barber_id)
+
+    text = f"🗓 *График работы: {name}*\n\n"
+    for weekday, day_name in enumerate(WEEKDAYS):
+        text += f"{day_name}: {format_day_hours(schedule.weekdays.get(weekday))}\n"
+
+    exceptions = sorted(schedule.exceptions.items())
+    if exceptions:
+        text += "\n*Исключения:*\n"
+        for date_str, hours in exceptions:
+            display_date = datetime.strptime(date_str, "%Y-%m-%d").strftime("%d.%m.%Y")
+            text += f"{display_date}: {format_day_hours(hours)}\n"
+
+    text += "\nВыберите день, чтобы изменить часы:"
+
+    markup = InlineKeyboardMarkup(row_width=4)
+    markup.add(*[InlineKeyboardButton(day_name, callback_data=f"sched_day_{barber_id}_{weekday}")
+                 for weekday, day_name in enumerate(WEEKDAYS)])
+    markup.add(InlineKeyboardButton(
+        "➕ Исключение / выходной", callback_data=f"sched_exc_{barber_id}"))
+    for date_str, _ in exceptions[:5]:
+        display_date = datetime.strptime(date_str, "%Y-%m-%d").strftime("%d.%m")
+        markup.add(InlineKeyboardButton(
+            f"🗑 Удалить {display_date}", callback_data=f"sched_excdel_{barber_id}_{date_str}"))
+    markup.add(InlineKeyboardButton("🔙 Назад", callback_data=f"barbers_{shop_id}"))
+
+    if isinstance(message, types.Message) and message.from_user and not message.from_user.is_bot:
+        bot.send_message(message.chat.id, text, parse_mode='Markdown', reply_markup=markup)
+    else:
+        bot.edit_message_text(
+            text,
+            message.chat.id,
+            message.message_id,
+            parse_mode='Markdown',
+            reply_markup=markup
+        )
+
+
+@router.route('sched_day_<int:barber_id>_<int:weekday>')
+def edit_schedule_day(call, barber_id, weekday):
+    """Ask for the new hours of a weekday"""
+    user_id = call.from_user.id
+
+    if not get_owned_barber(barber_id, user_id):
+        bot.answer_callback_query(call.id, "❌ Мастер не найден")
+        return
+
+    session = get_barber_session(user_id)
+    session.schedule_edit = (barber_id, weekday)
+    session.step = 'editing_schedule_day'
+
+    bot.send_message(
+        call.message.chat.id,
+        f"🕘 *{WEEKDAYS[weekday]}: часы работы*\n\n"
+        "Введите часы, например: `09:00-19:00`\n"
+        "С перерывом: `09:00-19:00 13:00-14:00`\n"
+        "Несколько перерывов: `09:00-19:00 13:00-14:00,17:00-17:15`\n"
+        "Или напишите `выходной`",
+        parse_mode='Markdown'
+    )
+
+
+@bot.message_handler(func=lambda message:
+                     message.from_user.id in barber_sessions and
+                     barber_sessions[message.from_user.id].step == 'editing_schedule_day')
+def handle_schedule_day(message):
+    """Save the hours of a weekday"""
+    user_id = message.from_user.id
+    session = barber_sessions[user_id]
+    barber_id, weekday = session.schedule_edit
+    text = message.text.strip().lower()
+
+    try:
+        hours = None if text == 'выходной' else parse_hours(text)
+    except ValueError:
+        bot.send_message(
+            message.chat.id, "❌ Неверный формат. Пример: 09:00-19:00 13:00-14:00")
+        return
+
+    set_barber_hours(barber_id, weekday, hours)
+    session.step = None
+    session.schedule_edit = None
+
+    bot.send_message(
+        message.chat.id, f"✅ {WEEKDAYS[weekday]}: {format_day_hours(hours)}")
+    show_barber_schedule(message, user_id, barber_id)
+
+
+@router.route('sched_exc_<int:barber_id>')
+def add_schedule_exception(call, barber_id):
+    """Ask for a date with special hours or a day off"""
+    user_id = call.from_user.id
+
+    if not get_owned_barber(barber_id, user_id):
+        bot.answer_callback_query(call.id, "❌ Мастер не найден")
+        return
+
+    session = get_barber_session(user_id)
+    session.schedule_edit = (barber_id, None)
+    session.step = 'editing_schedule_exception'
+
+    bot.send_message(
+        call.message.chat.id,
+        "📅 *Исключение в графике*\n\n"
+        "Введите дату и часы, например: `31.12 10:00-16:00`\n"
+        "Или дату и `выходной`: `08.03 выходной`",
+        parse_mode='Markdown'
+    )
+
+
+def parse_exception_date(text):
+    """'31.12' or '31.12.2026' -> 'YYYY-MM-DD', the next such date from today"""
+    today = datetime.now().date()
+    parts = text.split('.')
+    if len(parts) == 3:
+        return datetime.strptime(text, "%d.%m.%Y").date().isoformat()
+    day = datetime.strptime(f"{text}.{today.year}", "%d.%m.%Y").date()
+    if day < today:
+        day = day.replace(year=today.year + 1)
+    return day.isoformat()
+
+
+@bot.message_handler(func=lambda message:
+                     message.from_user.id in barber_sessions and
+                     barber_sessions[message.from_user.id].step == 'editing_schedule_exception')
+def handle_schedule_exception(message):
+    """Save special hours or a day off for one date"""
+    user_id = message.from_user.id
+    session = barber_sessions[user_id]
+    barber_id, _ = session.schedule_edit
+
+    try:
+        date_text, hours_text = message.text.strip().lower().split(None, 1)
+        date_str = parse_exception_date(date_text)
+        hours = None if hours_text == 'выходной' else parse_hours(hours_text)
+    except ValueError:
+        bot.send_message(
+            message.chat.id, "❌ Неверный формат. Пример: 31.12 10:00-16:00 или 08.03 выходной")
+        return
+
+    set_barber_exception(barber_id, date_str, hours)
+    session.step = None
+    session.schedule_edit = None
+
+    display_date = datetime.strptime(date_str, "%Y-%m-%d").strftime("%d.%m.%Y")
+    bot.send_message(
+        message.chat.id, f"✅ {display_date}: {format_day_hours(hours)}")
+    show_barber_schedule(message, user_id, barber_id)
+
+
+@router.route('sched_excdel_<int:barber_id>_<date_str>')
+def remove_schedule_exception(call, barber_id, date_str):
+    """Delete an exception, the weekday hours apply again"""
+    user_id = call.from_user.id
+
+    if not get_owned_barber(barber_id, user_id):
+        bot.answer_callback_query(call.id, "❌ Мастер не найден")
+        return
+
+    delete_barber_exception(barber_id, date_str)
+    show_barber_schedule(call.message, user_id, barber_id)
 
 # -------------------- SERVICES MANAGEMENT --------------------
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('services_'))
-def handle_services_menu(call):
+@router.route('services_<int:shop_id>')
+def handle_services_menu(call, shop_id):
     """Handle services management menu"""
     user_id = call.from_user.id
-    shop_id = int(call.data.split('_')[1])
 
     show_services_management(call.message, user_id, shop_id)
 
 
 def show_services_management(message, user_id, shop_id):
     """Show services management interface"""
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
 
-    # Get services
-    cursor.execute('''
-        SELECT id, name_ru, price, duration_minutes, is_active
-        FROM services 
-        WHERE barbershop_id = ?
-        ORDER BY price
-    ''', (shop_id,))
+        # Get services
+        cursor.execute('''
+            SELECT id, name_ru, price, duration_minutes, is_active
+            FROM services 
+            WHERE barbershop_id = ?
+            ORDER BY price
+        ''', (shop_id,))
 
-    services = cursor.fetchall()
-    conn.close()
+        services = cursor.fetchall()
 
     text = f"💈 *Управление услугами*\n\n"
     text += f"Всего услуг: {len(services)}\n\n"
@@ -1487,11 +1586,10 @@ def show_services_management(message, user_id, shop_id):
         )
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('add_service_'))
-def add_new_service(call):
+@router.route('add_service_<int:shop_id>')
+def add_new_service(call, shop_id):
     """Start adding new service"""
     user_id = call.from_user.id
-    shop_id = int(call.data.split('_')[2])
 
     # Store shop_id in session
     if user_id not in barber_sessions:
@@ -1624,24 +1722,22 @@ def save_service_to_db(message, user_id):
         bot.send_message(message.chat.id, "❌ Ошибка данных")
         return
 
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-
     try:
-        cursor.execute('''
-            INSERT INTO services 
-            (barbershop_id, name_uz, name_ru, name_en, price, duration_minutes)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            shop_id,
-            service_data['name_uz'] or service_data['name_ru'],
-            service_data['name_ru'],
-            service_data['name_en'] or service_data['name_ru'],
-            service_data['price'],
-            service_data['duration']
-        ))
-
-        conn.commit()
+        with db_pool.transaction() as conn:
+            conn.execute('''
+                INSERT INTO services 
+                (barbershop_id, name_uz, name_ru, name_en, price, duration_minutes)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (
+                shop_id,
+                service_data['name_uz'] or service_data['name_ru'],
+                service_data['name_ru'],
+                service_data['name_en'] or service_data['name_ru'],
+                service_data['price'],
+                service_data['duration']
+            ))
+
+        invalidate_barbershop(shop_id)
 
         bot.send_message(
             message.chat.id,
@@ -1660,106 +1756,100 @@ def save_service_to_db(message, user_id):
         show_services_management(message, user_id, shop_id)
 
     except Exception as e:
-        conn.rollback()
         print(f"Error saving service: {e}")
         bot.send_message(
             message.chat.id,
             "❌ Произошла ошибка при сохранении услуги.",
             reply_markup=types.ReplyKeyboardRemove()
         )
-    finally:
-        conn.close()
 
 # -------------------- STATISTICS --------------------
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('stats_'))
-def handle_statistics(call):
+@router.route('stats_<int:shop_id>')
+def handle_statistics(call, shop_id):
     """Handle statistics menu"""
     user_id = call.from_user.id
-    shop_id = int(call.data.split('_')[1])
 
     show_statistics(call.message, user_id, shop_id)
 
 
 def show_statistics(message, user_id, shop_id):
     """Show barbershop statistics"""
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-
-    # Get shop info
-    cursor.execute("SELECT name FROM barbershops WHERE id = ?", (shop_id,))
-    shop_name = cursor.fetchone()[0]
-
-    # Get total bookings
-    cursor.execute('''
-        SELECT COUNT(*) as total_bookings,
-               SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) as completed_bookings,
-               SUM(CASE WHEN status = 'confirmed' THEN 1 ELSE 0 END) as confirmed_bookings,
-               SUM(CASE WHEN status = 'cancelled' THEN 1 ELSE 0 END) as cancelled_bookings
-        FROM bookings 
-        WHERE barbershop_id = ?
-    ''', (shop_id,))
-
-    stats = cursor.fetchone()
-    total_bookings, completed, confirmed, cancelled = stats
-
-    # Get today's bookings
-    today = datetime.now().strftime("%Y-%m-%d")
-    cursor.execute('''
-        SELECT COUNT(*) FROM bookings 
-        WHERE barbershop_id = ? AND booking_date = ?
-    ''', (shop_id, today))
-
-    today_bookings = cursor.fetchone()[0]
-
-    # Get this month's bookings
-    month_start = datetime.now().replace(day=1).strftime("%Y-%m-%d")
-    cursor.execute('''
-        SELECT COUNT(*) FROM bookings 
-        WHERE barbershop_id = ? AND booking_date >= ?
-    ''', (shop_id, month_start))
-
-    month_bookings = cursor.fetchone()[0]
-
-    # Get revenue from completed bookings
-    cursor.execute('''
-        SELECT SUM(s.price) as total_revenue
-        FROM bookings bk
-        JOIN services s ON bk.service_id = s.id
-        WHERE bk.barbershop_id = ? AND bk.status = 'completed'
-    ''', (shop_id,))
-
-    revenue_result = cursor.fetchone()
-    total_revenue = revenue_result[0] if revenue_result[0] else 0
-
-    # Get barber stats
-    cursor.execute('''
-        SELECT br.full_name, COUNT(bk.id) as booking_count
-        FROM bookings bk
-        JOIN barbers br ON bk.barber_id = br.id
-        WHERE bk.barbershop_id = ? AND bk.status = 'completed'
-        GROUP BY br.id
-        ORDER BY booking_count DESC
-        LIMIT 5
-    ''', (shop_id,))
-
-    top_barbers = cursor.fetchall()
-
-    # Get popular services
-    cursor.execute('''
-        SELECT s.name_ru, COUNT(bk.id) as service_count
-        FROM bookings bk
-        JOIN services s ON bk.service_id = s.id
-        WHERE bk.barbershop_id = ? AND bk.status = 'completed'
-        GROUP BY s.id
-        ORDER BY service_count DESC
-        LIMIT 5
-    ''', (shop_id,))
-
-    popular_services = cursor.fetchall()
-
-    conn.close()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+
+        # Get shop info
+        cursor.execute("SELECT name FROM barbershops WHERE id = ?", (shop_id,))
+        shop_name = cursor.fetchone()[0]
+
+        # Get total bookings
+        cursor.execute('''
+            SELECT COUNT(*) as total_bookings,
+                   SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) as completed_bookings,
+                   SUM(CASE WHEN status = 'confirmed' THEN 1 ELSE 0 END) as confirmed_bookings,
+                   SUM(CASE WHEN status = 'cancelled' THEN 1 ELSE 0 END) as cancelled_bookings
+            FROM bookings 
+            WHERE barbershop_id = ?
+        ''', (shop_id,))
+
+        stats = cursor.fetchone()
+        total_bookings, completed, confirmed, cancelled = stats
+
+        # Get today's bookings
+        today = datetime.now().strftime("%Y-%m-%d")
+        cursor.execute('''
+            SELECT COUNT(*) FROM bookings 
+            WHERE barbershop_id = ? AND booking_date = ?
+        ''', (shop_id, today))
+
+        today_bookings = cursor.fetchone()[0]
+
+        # Get this month's bookings
+        month_start = datetime.now().replace(day=1).strftime("%Y-%m-%d")
+        cursor.execute('''
+            SELECT COUNT(*) FROM bookings 
+            WHERE barbershop_id = ? AND booking_date >= ?
+        ''', (shop_id, month_start))
+
+        month_bookings = cursor.fetchone()[0]
+
+        # Get revenue from completed bookings
+        cursor.execute('''
+            SELECT SUM(s.price) as total_revenue
+            FROM bookings bk
+            JOIN services s ON bk.service_id = s.id
+            WHERE bk.barbershop_id = ? AND bk.status = 'completed'
+        ''', (shop_id,))
+
+        revenue_result = cursor.fetchone()
+        total_revenue = revenue_result[0] if revenue_result[0] else 0
+
+        # Get barber stats
+        cursor.execute('''
+            SELECT br.full_name, COUNT(bk.id) as booking_count
+            FROM bookings bk
+            JOIN barbers br ON bk.barber_id = br.id
+            WHERE bk.barbershop_id = ? AND bk.status = 'completed'
+            GROUP BY br.id
+            ORDER BY booking_count DESC
+            LIMIT 5
+        ''', (shop_id,))
+
+        top_barbers = cursor.fetchall()
+
+        # Get popular services
+        cursor.execute('''
+            SELECT s.name_ru, COUNT(bk.id) as service_count
+            FROM bookings bk
+            JOIN services s ON bk.service_id = s.id
+            WHERE bk.barbershop_id = ? AND bk.status = 'completed'
+            GROUP BY s.id
+            ORDER BY service_count DESC
+            LIMIT 5
+        ''', (shop_id,))
+
+        popular_services = cursor.fetchall()
 
     # Format statistics
     text = f"📊 *Статистика барбершопа*\n\n"
@@ -1810,35 +1900,28 @@ def show_statistics(message, user_id, shop_id):
 # -------------------- BACK BUTTONS --------------------
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('back_to_panel_'))
-def back_to_panel(call):
+@router.route('back_to_panel_<int:shop_id>')
+def back_to_panel(call, shop_id):
     """Go back to main panel"""
     user_id = call.from_user.id
-    shop_id = int(call.data.split('_')[3])
 
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT name, is_active FROM barbershops WHERE id = ?", (shop_id,))
-    shop_info = cursor.fetchone()
-    conn.close()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT name, is_active FROM barbershops WHERE id = ?", (shop_id,))
+        shop_info = cursor.fetchone()
 
     if shop_info:
         shop_name, is_active = shop_info
         show_barber_panel(call.message, user_id, shop_id, shop_name, is_active)
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'go_to_panel')
+@router.route('go_to_panel')
 def go_to_panel(call):
     """Go to panel after registration"""
     user_id = call.from_user.id
 
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT id, name, is_active FROM barbershops WHERE owner_id = ?", (user_id,))
-    barbershop = cursor.fetchone()
-    conn.close()
+    barbershop = get_owner_barbershop(user_id)
 
     if barbershop:
         shop_id, shop_name, is_active = barbershop
@@ -1849,12 +1932,77 @@ def go_to_panel(call):
             "❌ Барбершоп не найден. Пожалуйста, зарегистрируйте барбершоп."
         )
 
+# -------------------- NOTIFICATIONS --------------------
+
+
+def get_booking_recipients(booking_id):
+    """Shop owner, barber and booking fields for a notification, or None"""
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT b.owner_id, br.telegram_id, b.name, br.full_name,
+                   u.full_name, bk.booking_date, bk.booking_time
+            FROM bookings bk
+            JOIN barbershops b ON bk.barbershop_id = b.id
+            JOIN barbers br ON bk.barber_id = br.id
+            JOIN users u ON bk.client_id = u.telegram_id
+            WHERE bk.id = ?
+        ''', (booking_id,))
+        return cursor.fetchone()
+
+
+def notify_shop_about_booking(booking_id, title):
+    """Send a booking notice to the shop owner and, if linked, the barber"""
+    booking = get_booking_recipients(booking_id)
+    if not booking:
+        return
+
+    owner_id, barber_user_id, shop_name, barber_name, client_name, date, time = booking
+
+    notification = f"{title}\n\n"
+    notification += f"🏢 Sartaroshxona: {shop_name}\n"
+    notification += f"💇 Sartarosh: {barber_name}\n"
+    notification += f"👤 Mijoz: {client_name}\n"
+    notification += f"📅 Sana: {date}\n"
+    notification += f"⏰ Vaqt: {time}\n"
+
+    markup = InlineKeyboardMarkup()
+    markup.add(InlineKeyboardButton(
+        "📋 Подробнее", callback_data=f"view_booking_{booking_id}"))
+
+    for chat_id in {owner_id, barber_user_id} - {None}:
+        send_queue.send_message(
+            bot, chat_id, notification, parse_mode='Markdown', reply_markup=markup)
+
+
+def handle_booking_created(payload):
+    notify_shop_about_booking(payload['booking_id'], "🆕 *Yangi bron!*")
+
+
+def handle_booking_cancelled(payload):
+    # Cancellations by the shop itself need no notice
+    if payload.get('by_client'):
+        notify_shop_about_booking(payload['booking_id'], "❌ *Mijoz bronni bekor qildi*")
+
 # -------------------- MAIN --------------------
 
 
+def setupbarber():
+    """Database, background tasks and event subscriptions of the bot"""
+    init_database()
+    db_pool.start_checkpoint_task()
+    send_queue.start()
+
+    # Bookings made in the user bot
+    event_bus.subscribe(BOOKING_CREATED, handle_booking_created, 'barber_bot')
+    event_bus.subscribe(BOOKING_CANCELLED, handle_booking_cancelled, 'barber_bot')
+    event_bus.start_relay('barber_bot')
+
+
 def startbarber():
     """Main function to start the bot"""
     print("💈 Barber bot is starting...")
+    setupbarber()
     print("✅ Barber bot is running. Press Ctrl+C to stop.")
     bot.infinity_polling()
 
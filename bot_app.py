@@ -0,0 +1,92 @@
+import threading
+
+import config
+
+# TeleBot decorators that are recorded until the real bot is built
+HANDLER_DECORATORS = (
+    'message_handler',
+    'edited_message_handler',
+    'callback_query_handler',
+    'inline_handler',
+    'my_chat_member_handler',
+)
+
+# Plain TeleBot calls that are recorded until the real bot is built
+DEFERRED_CALLS = (
+    'setup_middleware',
+)
+
+
+class LazyBot:
+    """TeleBot that is built on first use
+
+    Handler decorators and setup_middleware() are only recorded, so
+    importing a bot module opens no sessions and starts no worker threads.
+    The real TeleBot is created, and the recorded calls replayed on it, the
+    first time any other attribute is used - normally infinity_polling()
+    in the start function.
+    """
+
+    def __init__(self, token_name, **kwargs):
+        self._token_name = token_name  # Name of the token in config
+        self._kwargs = kwargs
+        self._registrations = []
+        self._calls = []
+        self._bot = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if name in HANDLER_DECORATORS:
+            return self._recorder(name)
+        if name in DEFERRED_CALLS and self._bot is None:
+            return self._deferred_call(name)
+        return getattr(self.get_bot(), name)
+
+    def _deferred_call(self, method):
+        """Call that is replayed on the bot once it is built"""
+        def call(*args, **kwargs):
+            with self._lock:
+                if self._bot is None:
+                    self._calls.append((method, args, kwargs))
+                    return
+            getattr(self._bot, method)(*args, **kwargs)
+        return call
+
+    def _recorder(self, method):
+        """Decorator factory that defers the registration"""
+        def decorator_args(*args, **kwargs):
+            def decorator(handler):
+                with self._lock:
+                    if self._bot is None:
+                        self._registrations.append((method, args, kwargs, handler))
+                        return handler
+                getattr(self._bot, method)(*args, **kwargs)(handler)
+                return handler
+            return decorator
+        return decorator_args
+
+    @property
+    def token_name(self):
+        return self._token_name
+
+    @property
+    def is_built(self):
+        return self._bot is not None
+
+    def get_bot(self):
+        """Build the TeleBot and register the recorded handlers (once)"""
+        if self._bot is None:
+            with self._lock:
+                if self._bot is None:
+                    from dispatcher import OrderedTeleBot
+
+                    bot = OrderedTeleBot(
+                        getattr(config, self._token_name), **self._kwargs)
+                    for method, args, kwargs in self._calls:
+                        getattr(bot, method)(*args, **kwargs)
+                    for method, args, kwargs, handler in self._registrations:
+                        getattr(bot, method)(*args, **kwargs)(handler)
+                    self._registrations = []
+                    self._calls = []
+                    self._bot = bot
+        return self._bot
@@ -0,0 +1,141 @@
+import re
+
+SEPARATOR = '_'
+PARAM = re.compile(r'<(?:(\w+):)?(\w+)>')
+
+
+def _to_int(segment):
+    digits = segment[1:] if segment[:1] == '-' else segment
+    if digits.isascii() and digits.isdigit():
+        return int(segment)
+    return None
+
+
+def _to_str(segment):
+    return segment or None
+
+
+# Parameter types, tried in this order when several fit one segment.
+# A converter returns None for a segment it doesn't accept.
+CONVERTERS = {
+    'int': _to_int,
+    'str': _to_str,
+}
+
+
+def _segments(pattern):
+    """Literal segments as str, parameters as (type, name)"""
+    segments = []
+    position = 0
+    for param in PARAM.finditer(pattern):
+        start, end = param.span()
+        if (start and pattern[start - 1] != SEPARATOR
+                or end < len(pattern) and pattern[end] != SEPARATOR):
+            raise ValueError(f"Parameter must be a whole segment: {pattern}")
+        if start > position:
+            segments.extend(pattern[position:start - 1].split(SEPARATOR))
+        segments.append((param.group(1) or 'str', param.group(2)))
+        position = end + 1
+    if position <= len(pattern):
+        segments.extend(pattern[position:].split(SEPARATOR))
+    return segments
+
+
+class _Node:
+    __slots__ = ('literals', 'params', 'route')
+
+    def __init__(self):
+        self.literals = {}  # segment -> _Node
+        self.params = {}  # type -> (converter, _Node)
+        self.route = None  # (handler, parameter names, pattern)
+
+
+class CallbackRouter:
+    """Callback data dispatcher built on a trie of '_'-separated segments
+
+    Patterns are literal segments and whole-segment parameters, e.g.
+    'view_booking_<int:booking_id>' or 'sched_excdel_<int:barber_id>_<date_str>'
+    (untyped parameters are str). The handler gets the call and the
+    converted parameters as keyword arguments. A literal segment wins
+    over a parameter, and the data has to match the whole pattern, so
+    'back_to_panel_5' never reaches a 'back_<str:page>' route. Matching
+    walks the data once, going back only where a literal and a parameter
+    both fit the same segment.
+    """
+
+    def __init__(self):
+        self._root = _Node()
+        self.patterns = []
+
+    def add(self, pattern, handler):
+        node = self._root
+        names = []
+        for segment in _segments(pattern):
+            if isinstance(segment, str):
+                node = node.literals.setdefault(segment, _Node())
+                continue
+
+            kind, name = segment
+            if kind not in CONVERTERS:
+                raise ValueError(f"Unknown parameter type '{kind}' in {pattern}")
+            if name in names:
+                raise ValueError(f"Duplicate parameter '{name}' in {pattern}")
+            names.append(name)
+            if kind not in node.params:
+                # Keep the CONVERTERS order, so int is tried before str
+                node.params[kind] = (CONVERTERS[kind], _Node())
+                node.params = {k: node.params[k] for k in CONVERTERS if k in node.params}
+            node = node.params[kind][1]
+
+        if node.route is not None:
+            raise ValueError(f"{pattern} clashes with {node.route[2]}")
+        node.route = (handler, names, pattern)
+        self.patterns.append(pattern)
+
+    def route(self, pattern):
+        """Decorator registering the handler for pattern (stackable)"""
+        def decorator(handler):
+            self.add(pattern, handler)
+            return handler
+        return decorator
+
+    def match(self, data):
+        """(handler, params) for callback data, or None"""
+        segments = data.split(SEPARATOR)
+        found = self._match(self._root, segments, 0, [])
+        if found is None:
+            return None
+        (handler, names, _), values = found
+        return handler, dict(zip(names, values))
+
+    def _match(self, node, segments, index, values):
+        if index == len(segments):
+            return (node.route, values) if node.route is not None else None
+
+        segment = segments[index]
+        child = node.literals.get(segment)
+        if child is not None:
+            found = self._match(child, segments, index + 1, values)
+            if found is not None:
+                return found
+
+        for convert, child in node.params.values():
+            value = convert(segment)
+            if value is None:
+                continue
+            found = self._match(child, segments, index + 1, values + [value])
+            if found is not None:
+                return found
+        return None
+
+    def dispatch(self, call):
+        """Run the handler matching call.data; unknown data is ignored"""
+        found = self.match(call.data or '')
+        if found is None:
+            return None
+        handler, params = found
+        return handler(call, **params)
+
+    def attach(self, bot):
+        """Send every callback query of bot through this router"""
+        bot.callback_query_handler(func=lambda call: True)(self.dispatch)
@@ -9,9 +9,97 @@ ADMIN_IDS = [705457366]  # Add your Telegram ID here
 # Database path
 DATABASE_PATH = 'barbershop.db'
 
+# Database connection pool (DB_POOL_SIZE is set below the worker counts)
+DB_POOL_TIMEOUT = 10  # Seconds to wait for a free connection
+DB_BUSY_TIMEOUT = 5  # Seconds sqlite waits on a locked database
+
+# SQLite pragmas applied to every new connection. WAL lets the bots keep
+# reading while one of them writes; synchronous=NORMAL is durable in WAL
+# mode except for the last commits on power loss.
+DB_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': DB_BUSY_TIMEOUT * 1000,  # Milliseconds
+    'cache_size': -16000,  # Negative = KiB, i.e. 16 MB page cache
+    'mmap_size': 64 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+    # Off: barbershops.owner_id points at users.telegram_id, but shop
+    # owners register through the barber bot and are not always users
+    'foreign_keys': 'OFF',
+}
+
+# Seconds between WAL checkpoints ('PASSIVE' never blocks readers/writers)
+DB_CHECKPOINT_INTERVAL = 300
+DB_CHECKPOINT_MODE = 'PASSIVE'
+
+# User language cache (telegram_id -> language)
+LANGUAGE_CACHE_SIZE = 10000
+LANGUAGE_CACHE_TTL = 600  # Seconds
+
+# Cities/districts cache, reloaded after admin edits or this many seconds
+REFERENCE_CACHE_TTL = 3600
+
+# Barbershop card cache ((shop_id, language) -> details)
+BARBERSHOP_CACHE_SIZE = 1000
+BARBERSHOP_CACHE_TTL = 300  # Seconds
+
 # Default work hours
 DEFAULT_WORK_HOURS = "09:00-19:00"
 
+# Booking slots
+SLOT_STEP_MINUTES = 30  # Grid of offered start times
+DEFAULT_SERVICE_DURATION = 30  # Minutes blocked when no service is chosen
+
+# Per barber-day availability bitmaps
+AVAILABILITY_CACHE_SIZE = 5000  # Barber-days kept in memory
+AVAILABILITY_CACHE_TTL = 120  # Seconds, picks up writes from other processes
+
+# Parsed barber schedules (barber_id -> weekly hours and exceptions)
+SCHEDULE_CACHE_SIZE = 5000
+SCHEDULE_CACHE_TTL = 120  # Seconds, picks up edits from other processes
+
+# Slot held for a client while they confirm a booking
+SLOT_HOLD_TTL = 300  # Seconds
+SLOT_HOLD_EVICT_INTERVAL = 15  # Seconds between expired hold sweeps
+
+# Reminder kind -> minutes before the booking
+REMINDER_OFFSETS = {'hour': 60, 'half_hour': 30}
+REMINDER_GRACE_PERIOD = 15 * 60  # Seconds late a reminder may still be sent after downtime
+REMINDER_RESYNC_INTERVAL = 60  # Max seconds between checks, sees bookings confirmed by another process
+REMINDER_CLAIM_LEASE = 5 * 60  # Seconds a claimed reminder waits for delivery before it is retried
+
+# Outbound message queue (Telegram allows ~30 messages/s per bot, 1/s per chat)
+SEND_QUEUE_WORKERS = 4
+SEND_GLOBAL_RATE = 30  # Messages per second per bot
+SEND_CHAT_RATE = 1  # Messages per second per chat
+SEND_MAX_ATTEMPTS = 5  # Then the message goes to dead_letters
+SEND_BACKOFF_BASE = 1  # Seconds, doubled after each failed attempt
+
+# Events between the bots (see events.py); turn the outbox on when the
+# bots run as separate processes
+EVENT_OUTBOX = False
+EVENT_RELAY_INTERVAL = 1  # Seconds between outbox polls
+EVENT_OUTBOX_RETENTION = 24 * 3600  # Seconds relayed events are kept
+
+# Handlers of all bots run on one pool, in order per chat (dispatcher.py)
+UPDATE_WORKERS = 16
+UPDATE_MAX_PENDING = 256  # Queued updates before intake waits
+
+# Max open connections shared by all bots: one for every thread that may
+# hold one at once (update and send queue workers, the checkpoint, slot
+# hold and reminder threads, and with the outbox an event relay per bot),
+# so none waits on the pool
+DB_POOL_SIZE = UPDATE_WORKERS + SEND_QUEUE_WORKERS + 3 + (3 if EVENT_OUTBOX else 0)
+
+# How updates arrive: 'polling' (getUpdates, a polling thread per bot) or
+# 'webhook' (Telegram posts them to webhook.py's HTTP server)
+UPDATE_MODE = 'polling'
+WEBHOOK_HOST = '0.0.0.0'
+WEBHOOK_PORT = 8443
+WEBHOOK_PATH = '/webhook'  # Bots get /webhook/user, /webhook/barber, /webhook/admin
+WEBHOOK_URL = ''  # Public https base URL; empty: set the webhooks yourself
+WEBHOOK_SECRET = ''  # Secret token header; random per start if empty
+
 # Available time slots
 TIME_SLOTS = [
     "09:00", "09:30", "10:00", "10:30", "11:00", "11:30",
@@ -20,304 +108,25 @@ TIME_SLOTS = [
     "18:00", "18:30", "19:00"
 ]
 
-# Language configurations
-LANGUAGES = {
-    'uz': {
-        'language_name': "O'zbekcha",
-        'emoji': "🇺🇿",
-        'translations': {
-            'welcome': "Assalomu alaykum! NavbatGo - sartaroshxona bron qilish botiga xush kelibsiz!\n\n👆 Quyidagi tilni tanlang:",
-            'choose_language': "Tilni tanlang:",
-            'register_required': "❌ Avval ro'yxatdan o'tishingiz kerak!",
-            'send_contact': "📞 Telefon raqamingizni yuboring:",
-            'share_contact': "📲 Kontaktni ulashish",
-            'cancel': "❌ Bekor qilish",
-            'main_menu': "🏠 Asosiy menyu",
-            'choose_city': "🏙 Shahar tanlang:",
-            'choose_district': "📍 Tuman tanlang:",
-            'choose_barbershop': "✂️ Sartaroshxona tanlang:",
-            'choose_barber': "💇 Sartarosh tanlang:",
-            'choose_service': "💈 Xizmat turini tanlang:",
-            'choose_date': "📅 Sana tanlang:",
-            'choose_time': "⏰ Vaqt tanlang:",
-            'booking_confirmed': "✅ Broningiz tasdiqlandi!",
-            'booking_details': "📋 Bron tafsilotlari:",
-            'my_bookings': "📒 Mening bronlarim",
-            'search': "🔍 Qidirish",
-            'nearby': "📍 Yaqin joylar",
-            'settings': "⚙️ Sozlamalar",
-            'help': "❓ Yordam",
-            'back': "🔙 Orqaga",
-            'next': "➡️ Keyingisi",
-            'confirm': "✅ Tasdiqlash",
-            'no_bookings': "📭 Hozircha sizda bronlar mavjud emas",
-            'booking_cancelled': "❌ Bron bekor qilindi",
-            'today': "Bugun",
-            'tomorrow': "Ertaga",
-            'experience': "💼 Tajriba",
-            'years': "yil",
-            'specialty': "🎯 Mutaxassislik",
-            'price': "💰 Narxi",
-            'duration': "⏱ Davomiylik",
-            'rating': "⭐ Reyting",
-            'address': "📍 Manzil",
-            'phone': "📞 Telefon",
-            'description': "📝 Tavsif",
-            'work_hours': "🕐 Ish vaqti",
-            'reviews': "📝 Sharhlar",
-            'write_review': "✍️ Sharh qoldiring",
-            'submit': "📤 Yuborish",
-            'thank_you': "🙏 Rahmat!",
-            'location': "📍 Joylashuv",
-            'send_location': "🗺 Joylashuv yuborish",
-            'services': "💈 Xizmatlar",
-            'minutes': "daqiqa",
-            'hour': "soat",
-            'before': "oldin",
-            'pending': "⏳ Kutilmoqda",
-            'confirmed': "✅ Tasdiqlangan",
-            'cancelled': "❌ Bekor qilingan",
-            'completed': "✅ Yakunlangan",
-            'notifications': "🔔 Bildirishnomalar",
-            'language': "🌐 Til",
-            'profile': "👤 Profil",
-            'edit_profile': "✏️ Profilni tahrirlash",
-            'change_phone': "📱 Telefon raqamini o'zgartirish",
-            'change_name': "👤 Ismni o'zgartirish",
-            'logout': "🚪 Chiqish",
-            'about': "ℹ️ Bot haqida",
-            'contact_us': "📞 Biz bilan bog'lanish",
-            'share_bot': "🤖 Botni ulashish",
-            'view_on_map': "🗺 Xaritada ko'rish",
-            'book_now': "🕒 Hoziroq bron qilish",
-            'call_now': "📞 Qo'ng'iroq qilish",
-            'website': "🌐 Veb-sayt",
-            'instagram': "📸 Instagram",
-            'telegram': "✈️ Telegram",
-            'loading': "⏳ Yuklanmoqda...",
-            'error': "❌ Xatolik yuz berdi",
-            'try_again': "🔄 Qayta urinib ko'ring",
-            'no_results': "🔍 Hech narsa topilmadi",
-            'all': "Barchasi",
-            'filter': "🔍 Filtr",
-            'sort_by': "📊 Saralash",
-            'sort_rating': "⭐ Reyting bo'yicha",
-            'sort_price': "💰 Narx bo'yicha",
-            'sort_distance': "📍 Masofa bo'yicha",
-            'distance': "Masofa",
-            'km': "km",
-            'open': "🟢 Ochiq",
-            'closed': "🔴 Yopiq",
-            'popular': "🔥 Mashhur",
-            'new': "🆒 Yangi",
-            'discount': "🎁 Chegirma",
-            'male': "👨 Erkak",
-            'female': "👩 Ayol",
-            'unisex': "👥 Uniseks",
-            'premium': "⭐ Premium",
-            'economy': "💰 Iqtisodiy",
-            'luxury': "👑 Lux"
-        }
-    },
-    'ru': {
-        'language_name': "Русский",
-        'emoji': "🇷🇺",
-        'translations': {
-            'welcome': "Здравствуйте! Добро пожаловать в NavbatGo - бот для бронирования парикмахерских!\n\n👆 Выберите язык ниже:",
-            'choose_language': "Выберите язык:",
-            'register_required': "❌ Сначала необходимо зарегистрироваться!",
-            'send_contact': "📞 Отправьте ваш номер телефона:",
-            'share_contact': "📲 Поделиться контактом",
-            'cancel': "❌ Отмена",
-            'main_menu': "🏠 Главное меню",
-            'choose_city': "🏙 Выберите город:",
-            'choose_district': "📍 Выберите район:",
-            'choose_barbershop': "✂️ Выберите парикмахерскую:",
-            'choose_barber': "💇 Выберите парикмахера:",
-            'choose_service': "💈 Выберите тип услуги:",
-            'choose_date': "📅 Выберите дату:",
-            'choose_time': "⏰ Выберите время:",
-            'booking_confirmed': "✅ Ваше бронирование подтверждено!",
-            'booking_details': "📋 Детали бронирования:",
-            'my_bookings': "📒 Мои бронирования",
-            'search': "🔍 Поиск",
-            'nearby': "📍 Рядом",
-            'settings': "⚙️ Настройки",
-            'help': "❓ Помощь",
-            'back': "🔙 Назад",
-            'next': "➡️ Далее",
-            'confirm': "✅ Подтвердить",
-            'no_bookings': "📭 У вас пока нет бронирований",
-            'booking_cancelled': "❌ Бронирование отменено",
-            'today': "Сегодня",
-            'tomorrow': "Завтра",
-            'experience': "💼 Опыт",
-            'years': "лет",
-            'specialty': "🎯 Специализация",
-            'price': "💰 Цена",
-            'duration': "⏱ Продолжительность",
-            'rating': "⭐ Рейтинг",
-            'address': "📍 Адрес",
-            'phone': "📞 Телефон",
-            'description': "📝 Описание",
-            'work_hours': "🕐 Часы работы",
-            'reviews': "📝 Отзывы",
-            'write_review': "✍️ Оставить отзыв",
-            'submit': "📤 Отправить",
-            'thank_you': "🙏 Спасибо!",
-            'location': "📍 Местоположение",
-            'send_location': "🗺 Отправить местоположение",
-            'services': "💈 Услуги",
-            'minutes': "минут",
-            'hour': "час",
-            'before': "до",
-            'pending': "⏳ Ожидание",
-            'confirmed': "✅ Подтверждено",
-            'cancelled': "❌ Отменено",
-            'completed': "✅ Завершено",
-            'notifications': "🔔 Уведомления",
-            'language': "🌐 Язык",
-            'profile': "👤 Профиль",
-            'edit_profile': "✏️ Редактировать профиль",
-            'change_phone': "📱 Изменить телефон",
-            'change_name': "👤 Изменить имя",
-            'logout': "🚪 Выйти",
-            'about': "ℹ️ О боте",
-            'contact_us': "📞 Связаться с нами",
-            'share_bot': "🤖 Поделиться ботом",
-            'view_on_map': "🗺 Посмотреть на карте",
-            'book_now': "🕒 Забронировать сейчас",
-            'call_now': "📞 Позвонить сейчас",
-            'website': "🌐 Веб-сайт",
-            'instagram': "📸 Instagram",
-            'telegram': "✈️ Telegram",
-            'loading': "⏳ Загрузка...",
-            'error': "❌ Произошла ошибка",
-            'try_again': "🔄 Попробуйте снова",
-            'no_results': "🔍 Ничего не найдено",
-            'all': "Все",
-            'filter': "🔍 Фильтр",
-            'sort_by': "📊 Сортировать по",
-            'sort_rating': "⭐ По рейтингу",
-            'sort_price': "💰 По цене",
-            'sort_distance': "📍 По расстоянию",
-            'distance': "Расстояние",
-            'km': "км",
-            'open': "🟢 Открыто",
-            'closed': "🔴 Закрыто",
-            'popular': "🔥 Популярное",
-            'new': "🆒 Новое",
-            'discount': "🎁 Скидка",
-            'male': "👨 Мужское",
-            'female': "👩 Женское",
-            'unisex': "👥 Унисекс",
-            'premium': "⭐ Премиум",
-            'economy': "💰 Эконом",
-            'luxury': "👑 Люкс"
-        }
-    },
-    'en': {
-        'language_name': "English",
-        'emoji': "🇺🇸",
-        'translations': {
-            'welcome': "Hello! Welcome to NavbatGo - barbershop booking bot!\n\n👆 Choose your language below:",
-            'choose_language': "Choose language:",
-            'register_required': "❌ You need to register first!",
-            'send_contact': "📞 Send your phone number:",
-            'share_contact': "📲 Share contact",
-            'cancel': "❌ Cancel",
-            'main_menu': "🏠 Main menu",
-            'choose_city': "🏙 Choose city:",
-            'choose_district': "📍 Choose district:",
-            'choose_barbershop': "✂️ Choose barbershop:",
-            'choose_barber': "💇 Choose barber:",
-            'choose_service': "💈 Choose service type:",
-            'choose_date': "📅 Choose date:",
-            'choose_time': "⏰ Choose time:",
-            'booking_confirmed': "✅ Your booking is confirmed!",
-            'booking_details': "📋 Booking details:",
-            'my_bookings': "📒 My bookings",
-            'search': "🔍 Search",
-            'nearby': "📍 Nearby",
-            'settings': "⚙️ Settings",
-            'help': "❓ Help",
-            'back': "🔙 Back",
-            'next': "➡️ Next",
-            'confirm': "✅ Confirm",
-            'no_bookings': "📭 You have no bookings yet",
-            'booking_cancelled': "❌ Booking cancelled",
-            'today': "Today",
-            'tomorrow': "Tomorrow",
-            'experience': "💼 Experience",
-            'years': "years",
-            'specialty': "🎯 Specialty",
-            'price': "💰 Price",
-            'duration': "⏱ Duration",
-            'rating': "⭐ Rating",
-            'address': "📍 Address",
-            'phone': "📞 Phone",
-            'description': "📝 Description",
-            'work_hours': "🕐 Work hours",
-            'reviews': "📝 Reviews",
-            'write_review': "✍️ Write a review",
-            'submit': "📤 Submit",
-            'thank_you': "🙏 Thank you!",
-            'location': "📍 Location",
-            'send_location': "🗺 Send location",
-            'services': "💈 Services",
-            'minutes': "minutes",
-            'hour': "hour",
-            'before': "before",
-            'pending': "⏳ Pending",
-            'confirmed': "✅ Confirmed",
-            'cancelled': "❌ Cancelled",
-            'completed': "✅ Completed",
-            'notifications': "🔔 Notifications",
-            'language': "🌐 Language",
-            'profile': "👤 Profile",
-            'edit_profile': "✏️ Edit profile",
-            'change_phone': "📱 Change phone",
-            'change_name': "👤 Change name",
-            'logout': "🚪 Logout",
-            'about': "ℹ️ About",
-            'contact_us': "📞 Contact us",
-            'share_bot': "🤖 Share bot",
-            'view_on_map': "🗺 View on map",
-            'book_now': "🕒 Book now",
-            'call_now': "📞 Call now",
-            'website': "🌐 Website",
-            'instagram': "📸 Instagram",
-            'telegram': "✈️ Telegram",
-            'loading': "⏳ Loading...",
-            'error': "❌ An error occurred",
-            'try_again': "🔄 Try again",
-            'no_results': "🔍 No results found",
-            'all': "All",
-            'filter': "🔍 Filter",
-            'sort_by': "📊 Sort by",
-            'sort_rating': "⭐ By rating",
-            'sort_price': "💰 By price",
-            'sort_distance': "📍 By distance",
-            'distance': "Distance",
-            'km': "km",
-            'open': "🟢 Open",
-            'closed': "🔴 Closed",
-            'popular': "🔥 Popular",
-            'new': "🆒 New",
-            'discount': "🎁 Discount",
-            'male': "👨 Male",
-            'female': "👩 Female",
-            'unisex': "👥 Unisex",
-            'premium': "⭐ Premium",
-            'economy': "💰 Economy",
-            'luxury': "👑 Luxury"
-        }
-    }
-}
+# Language configurations live in translations.py and are loaded lazily
+
+
+def get_languages():
+    """Get language configurations (imported on first use)"""
+    from translations import LANGUAGES
+    return LANGUAGES
 
 
 def get_translation(lang, key):
     """Get translation for specific language and key"""
-    if lang not in LANGUAGES:
+    languages = get_languages()
+    if lang not in languages:
         lang = 'uz'
-    return LANGUAGES[lang]['translations'].get(key, key)
+    return languages[lang]['translations'].get(key, key)
+
+
+def __getattr__(name):
+    """Keep `config.LANGUAGES` working without loading it at import"""
+    if name == 'LANGUAGES':
+        return get_languages()
+    raise AttributeError(f"module 'config' has no attribute '{name}'")
@@ -0,0 +1,87 @@
+import threading
+
+from telebot.handler_backends import BaseMiddleware
+
+from config import get_translation
+
+_local = threading.local()
+
+
+class RequestContext:
+    """The user behind the update being handled
+
+    Built once per update by ContextMiddleware. The language is looked up
+    at most once per update and the session only when a handler asks for it.
+    """
+
+    def __init__(self, user_id, chat_id, language_loader, session_factory=None):
+        self.user_id = user_id
+        self.chat_id = chat_id
+        self._language_loader = language_loader
+        self._session_factory = session_factory
+        self._language = None
+        self._session = None
+
+    @property
+    def language(self):
+        if self._language is None:
+            self._language = self._language_loader(self.user_id)
+        return self._language
+
+    @language.setter
+    def language(self, value):
+        self._language = value
+
+    @property
+    def session(self):
+        if self._session is None and self._session_factory is not None:
+            self._session = self._session_factory(self.user_id)
+        return self._session
+
+    def t(self, key):
+        """Translate a key into the user's language"""
+        return get_translation(self.language, key)
+
+
+def get_current_context():
+    """Context of the update handled by this thread, or None"""
+    return getattr(_local, 'context', None)
+
+
+def get_context_for(user_id):
+    """Current context if it belongs to user_id, or None"""
+    context = getattr(_local, 'context', None)
+    if context is not None and context.user_id == user_id:
+        return context
+    return None
+
+
+class ContextMiddleware(BaseMiddleware):
+    """Create a RequestContext for each message and callback query
+
+    The context is passed to handlers as `data['context']` and is also
+    reachable from any code running for the update through
+    get_current_context() (middleware and handler share a worker thread).
+    """
+
+    def __init__(self, language_loader, session_factory=None):
+        super().__init__()
+        self.update_types = ['message', 'callback_query']
+        self._language_loader = language_loader
+        self._session_factory = session_factory
+
+    def pre_process(self, update, data):
+        if hasattr(update, 'chat'):
+            chat_id = update.chat.id
+        elif update.message is not None:
+            chat_id = update.message.chat.id
+        else:
+            chat_id = None
+
+        context = RequestContext(update.from_user.id, chat_id,
+                                 self._language_loader, self._session_factory)
+        data['context'] = context
+        _local.context = context
+
+    def post_process(self, update, data, exception):
+        _local.context = None
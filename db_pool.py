@@ -0,0 +1,197 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from config import (
+    DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_CHECKPOINT_INTERVAL, DB_CHECKPOINT_MODE
+)
+from database import get_db_connection
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection became free in time"""
+
+
+class ConnectionPool:
+    """Bounded pool of reusable SQLite connections
+
+    A thread keeps the connection it checked out for the whole (possibly
+    nested) `with` block and gets the same connection back on its next
+    checkout whenever it is still idle, so sqlite's page cache and
+    prepared statements stay warm for long-lived handler threads.
+    """
+
+    def __init__(self, factory, max_size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT):
+        self._factory = factory
+        self._max_size = max_size
+        self._timeout = timeout
+        self._idle = []
+        self._size = 0
+        self._cond = threading.Condition()
+        self._local = threading.local()
+
+    def _acquire(self):
+        """Take an idle connection or open a new one while under the limit"""
+        preferred = getattr(self._local, 'last', None)
+        deadline = time.monotonic() + self._timeout
+
+        with self._cond:
+            while True:
+                if preferred is not None and preferred in self._idle:
+                    self._idle.remove(preferred)
+                    return preferred
+                if self._idle:
+                    return self._idle.pop()
+                if self._size < self._max_size:
+                    self._size += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(
+                        f"No free database connection after {self._timeout}s")
+                self._cond.wait(remaining)
+
+        try:
+            return self._factory()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, conn):
+        """Return a connection to the idle list"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except Exception:
+            # Broken connection - drop it instead of handing it out again
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            return
+
+        with self._cond:
+            self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the current thread
+
+        Nested calls on the same thread share the outer connection.
+        """
+        local = self._local
+        conn = getattr(local, 'conn', None)
+
+        if conn is not None:
+            local.depth += 1
+            try:
+                yield conn
+            finally:
+                local.depth -= 1
+            return
+
+        conn = self._acquire()
+        local.conn = conn
+        local.depth = 1
+        local.last = conn
+        try:
+            yield conn
+        finally:
+            local.conn = None
+            local.depth = 0
+            self._release(conn)
+
+    @contextmanager
+    def transaction(self, immediate=True):
+        """Run a block in a transaction, committing on success
+
+        By default the write lock is taken up front (BEGIN IMMEDIATE): in
+        WAL mode a deferred transaction that reads first and writes later
+        fails with "database is locked" instead of waiting on busy_timeout.
+        A transaction opened inside another one joins the outer transaction.
+        """
+        with self.connection() as conn:
+            if conn.in_transaction:
+                yield conn
+                return
+
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            else:
+                conn.commit()
+
+    def close_all(self):
+        """Close idle connections (used on shutdown)"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+
+        for conn in idle:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Get the process-wide connection pool"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(get_db_connection)
+    return _pool
+
+
+def connection():
+    """Check out a pooled connection: `with db_pool.connection() as conn:`"""
+    return get_pool().connection()
+
+
+def transaction(immediate=True):
+    """Pooled connection inside a transaction: `with db_pool.transaction() as conn:`"""
+    return get_pool().transaction(immediate)
+
+
+def checkpoint(mode=DB_CHECKPOINT_MODE):
+    """Copy WAL frames back into the database file"""
+    with connection() as conn:
+        busy, log_frames, checkpointed = conn.execute(
+            f"PRAGMA wal_checkpoint({mode})").fetchone()
+    return busy, log_frames, checkpointed
+
+
+_checkpoint_thread = None
+
+
+def _checkpoint_loop(interval):
+    """Checkpoint the WAL periodically so it does not grow unbounded"""
+    while True:
+        time.sleep(interval)
+        try:
+            checkpoint()
+        except Exception as e:
+            print(f"Error in WAL checkpoint: {e}")
+
+
+def start_checkpoint_task(interval=DB_CHECKPOINT_INTERVAL):
+    """Start the background checkpoint thread once per process"""
+    global _checkpoint_thread
+    with _pool_lock:
+        if _checkpoint_thread is None:
+            _checkpoint_thread = threading.Thread(
+                target=_checkpoint_loop, args=(interval,),
+                name="WalCheckpoint", daemon=True)
+            _checkpoint_thread.start()
@@ -0,0 +1,162 @@
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+import telebot
+
+from config import UPDATE_WORKERS, UPDATE_MAX_PENDING
+
+
+class OrderedExecutor:
+    """Thread pool that runs tasks with the same key one at a time, in order
+
+    Different keys run in parallel on `workers` threads. After each task
+    its key goes to the back of the line, so one busy chat can't keep a
+    thread while others wait. submit() blocks while `max_pending` tasks are
+    queued. Threads start with the first task.
+    """
+
+    def __init__(self, workers=UPDATE_WORKERS, max_pending=UPDATE_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._has_work = threading.Condition(self._lock)
+        self._has_room = threading.Condition(self._lock)
+        self._queues = {}  # key -> deque of (future, fn, args) queued or running
+        self._ready = deque()  # Keys with queued tasks and none running
+        self._queued = 0
+        self._running = 0
+        self._processed = 0
+        self._max_queued = 0
+        self._threads = []
+
+    def submit(self, key, fn, *args, block=True):
+        """Queue fn(*args) behind the earlier tasks of `key`
+
+        Returns a Future, or None when the queue is full and block is False.
+        """
+        future = Future()
+        with self._lock:
+            while self._queued >= self.max_pending:
+                if not block:
+                    return None
+                self._has_room.wait()
+            if not self._threads:
+                self._start()
+
+            queue = self._queues.get(key)
+            if queue is None:
+                queue = self._queues[key] = deque()
+                self._ready.append(key)
+            queue.append((future, fn, args))
+            self._queued += 1
+            self._max_queued = max(self._max_queued, self._queued)
+            self._has_work.notify()
+        return future
+
+    def _start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f"Updates-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            with self._lock:
+                while not self._ready:
+                    self._has_work.wait()
+                key = self._ready.popleft()
+                future, fn, args = self._queues[key][0]
+                self._queued -= 1
+                self._running += 1
+                self._has_room.notify()
+
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args))
+                except BaseException as e:
+                    future.set_exception(e)
+
+            with self._lock:
+                self._running -= 1
+                self._processed += 1
+                queue = self._queues[key]
+                queue.popleft()
+                if queue:
+                    self._ready.append(key)
+                    self._has_work.notify()
+                else:
+                    del self._queues[key]
+
+    def stats(self):
+        """Queue depth metrics"""
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queued': self._queued,
+                'running': self._running,
+                'keys': len(self._queues),
+                'deepest': max((len(queue) for queue in self._queues.values()), default=0),
+                'max_queued': self._max_queued,
+                'processed': self._processed,
+            }
+
+
+update_dispatcher = OrderedExecutor()
+
+
+def update_chat_id(update):
+    """Chat an update belongs to (the user for chatless ones), or None"""
+    for message in (update.message, update.edited_message,
+                    update.channel_post, update.edited_channel_post):
+        if message is not None:
+            return message.chat.id
+
+    call = update.callback_query
+    if call is not None:
+        return call.message.chat.id if call.message else call.from_user.id
+
+    for member in (update.my_chat_member, update.chat_member, update.chat_join_request):
+        if member is not None:
+            return member.chat.id
+
+    for query in (update.inline_query, update.chosen_inline_result,
+                  update.shipping_query, update.pre_checkout_query):
+        if query is not None:
+            return query.from_user.id
+    return None
+
+
+class OrderedTeleBot(telebot.TeleBot):
+    """TeleBot whose updates run on update_dispatcher, in order per chat
+
+    Two quick taps from one user (date then time, a double confirm) are
+    handled one after the other against their session, while other chats
+    and bots share the same bounded pool. Polling and the webhook server
+    both go through process_new_updates()/dispatch().
+    """
+
+    def __init__(self, token, dispatcher=None, **kwargs):
+        kwargs['threaded'] = False  # No TeleBot worker pool of its own
+        super().__init__(token, **kwargs)
+        self.dispatcher = dispatcher or update_dispatcher
+
+    def process_new_updates(self, updates):
+        for update in updates:
+            self.dispatch(update)
+
+    def dispatch(self, update, block=True):
+        """Queue one update; a Future, or None if full and block is False"""
+        chat_id = update_chat_id(update)
+        if chat_id is None:
+            key = (self.token, None, update.update_id)  # Nothing to order by
+        else:
+            key = (self.token, chat_id)
+        return self.dispatcher.submit(key, self._process_update, update, block=block)
+
+    def _process_update(self, update):
+        try:
+            super().process_new_updates([update])
+        except Exception as e:
+            print(f"Error processing update {update.update_id}: {e}")
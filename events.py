@@ -0,0 +1,134 @@
+import json
+import threading
+import time
+
+from config import EVENT_OUTBOX, EVENT_RELAY_INTERVAL, EVENT_OUTBOX_RETENTION
+import db_pool
+
+# Events and their payloads
+BOOKING_CREATED = 'booking.created'  # {booking_id}
+BOOKING_CONFIRMED = 'booking.confirmed'  # {booking_id, by_client}
+BOOKING_CANCELLED = 'booking.cancelled'  # {booking_id, by_client}
+BOOKING_COMPLETED = 'booking.completed'  # {booking_id, by_client}
+SHOP_REGISTERED = 'shop.registered'  # {shop_id, name, owner_id}
+
+# booking status -> event published by update_booking_status
+STATUS_EVENTS = {
+    'confirmed': BOOKING_CONFIRMED,
+    'cancelled': BOOKING_CANCELLED,
+    'completed': BOOKING_COMPLETED,
+}
+
+
+class EventBus:
+    """Publish/subscribe between the bots
+
+    Each subscriber belongs to a consumer (the bot that delivers it). By
+    default publish() calls the subscribers in-process, which covers
+    main.py running all bots together. With EVENT_OUTBOX on, events are
+    written to the event_outbox table instead and every consumer runs a
+    relay thread (start_relay) that reads them from its own cursor, so the
+    bots can run as separate processes; delivery is then at-least-once.
+    """
+
+    def __init__(self, outbox=EVENT_OUTBOX):
+        self.outbox = outbox
+        self._subscribers = {}  # event -> [(consumer, handler)]
+        self._lock = threading.Lock()
+        self._relays = {}  # consumer -> thread
+
+    def subscribe(self, event, handler, consumer):
+        """Call handler(payload) for every `event`"""
+        with self._lock:
+            subscribers = self._subscribers.setdefault(event, [])
+            if (consumer, handler) not in subscribers:
+                subscribers.append((consumer, handler))
+
+    def publish(self, event, **payload):
+        """Publish an event; call after the change it describes is committed"""
+        if self.outbox:
+            with db_pool.transaction() as conn:
+                conn.execute(
+                    "INSERT INTO event_outbox (name, payload, created_at) VALUES (?, ?, ?)",
+                    (event, json.dumps(payload), time.time()))
+        else:
+            self._dispatch(event, payload)
+
+    def _dispatch(self, event, payload, consumer=None):
+        with self._lock:
+            subscribers = list(self._subscribers.get(event, ()))
+        for subscriber, handler in subscribers:
+            if consumer is not None and subscriber != consumer:
+                continue
+            try:
+                handler(payload)
+            except Exception as e:
+                print(f"Error handling {event} in {subscriber}: {e}")
+
+    # -------------------- OUTBOX --------------------
+
+    def _cursor(self, consumer):
+        """Last relayed outbox id; a new consumer starts at the current end"""
+        with db_pool.transaction() as conn:
+            row = conn.execute(
+                "SELECT last_id FROM event_consumers WHERE consumer = ?",
+                (consumer,)).fetchone()
+            if row:
+                return row[0]
+            last_id = conn.execute(
+                "SELECT COALESCE(MAX(id), 0) FROM event_outbox").fetchone()[0]
+            conn.execute(
+                "INSERT INTO event_consumers (consumer, last_id) VALUES (?, ?)",
+                (consumer, last_id))
+            return last_id
+
+    def relay(self, consumer, last_id, limit=100):
+        """Dispatch outbox events after last_id to one consumer, return the new cursor"""
+        with db_pool.connection() as conn:
+            rows = conn.execute('''
+                SELECT id, name, payload FROM event_outbox
+                WHERE id > ? ORDER BY id LIMIT ?
+            ''', (last_id, limit)).fetchall()
+        if not rows:
+            return last_id
+
+        for event_id, name, payload in rows:
+            self._dispatch(name, json.loads(payload), consumer)
+            last_id = event_id
+
+        with db_pool.transaction() as conn:
+            conn.execute(
+                "UPDATE event_consumers SET last_id = ? WHERE consumer = ?",
+                (last_id, consumer))
+            conn.execute(
+                "DELETE FROM event_outbox WHERE created_at < ?",
+                (time.time() - EVENT_OUTBOX_RETENTION,))
+        return last_id
+
+    def _relay_loop(self, consumer, interval):
+        last_id = None
+        while True:
+            try:
+                if last_id is None:
+                    last_id = self._cursor(consumer)
+                previous, last_id = last_id, self.relay(consumer, last_id)
+                if last_id != previous:
+                    continue  # Drain a backlog without sleeping
+            except Exception as e:
+                print(f"Error relaying events to {consumer}: {e}")
+            time.sleep(interval)
+
+    def start_relay(self, consumer, interval=EVENT_RELAY_INTERVAL):
+        """Start the outbox relay of a consumer once (no-op without the outbox)"""
+        if not self.outbox:
+            return
+        with self._lock:
+            if consumer not in self._relays:
+                thread = threading.Thread(
+                    target=self._relay_loop, args=(consumer, interval),
+                    name=f"EventRelay-{consumer}", daemon=True)
+                thread.start()
+                self._relays[consumer] = thread
+
+
+event_bus = EventBus()
@@ -0,0 +1,141 @@
+import threading
+import time
+
+from config import DEFAULT_SERVICE_DURATION, SLOT_HOLD_TTL, SLOT_HOLD_EVICT_INTERVAL
+from availability import availability_index, busy_intervals, to_minutes
+import db_pool
+
+
+def held_intervals(conn, barber_id, date, except_client=None):
+    """[start, end) minutes of the unexpired holds of a barber-day"""
+    rows = conn.execute('''
+        SELECT booking_time, duration_minutes FROM slot_holds
+        WHERE barber_id = ? AND booking_date = ? AND expires_at > ? AND client_id != ?
+    ''', (barber_id, date, time.time(), except_client or 0)).fetchall()
+    return busy_intervals(rows)
+
+
+def overlaps(intervals, time_str, duration=None):
+    """Whether a slot at time_str overlaps any of the intervals"""
+    start = to_minutes(time_str)
+    end = start + (duration or DEFAULT_SERVICE_DURATION)
+    return any(busy_start < end and start < busy_end for busy_start, busy_end in intervals)
+
+
+class SlotHolds:
+    """Short-lived slot reservations while a client confirms a booking
+
+    Holds live in memory and are mirrored into the slot_holds table, so
+    create_booking (and other processes) can see them and they survive a
+    restart. The availability index hides held slots from other clients.
+    Expired holds are evicted by a timer thread, see start_eviction_task().
+    """
+
+    def __init__(self, ttl=SLOT_HOLD_TTL):
+        self.ttl = ttl
+        self._holds = {}  # client_id -> (barber_id, date, time_str, duration, expires_at)
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self):
+        """Pick up unexpired holds from the database once per process"""
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            with db_pool.connection() as conn:
+                rows = conn.execute('''
+                    SELECT client_id, barber_id, booking_date, booking_time,
+                           duration_minutes, expires_at
+                    FROM slot_holds WHERE expires_at > ?
+                ''', (time.time(),)).fetchall()
+            for client_id, *hold in rows:
+                self._holds[client_id] = tuple(hold)
+
+        for client_id, barber_id, date, time_str, duration, _ in rows:
+            availability_index.hold_added(client_id, barber_id, date, time_str, duration)
+
+    def hold(self, client_id, barber_id, date, time_str, duration=None):
+        """Reserve a slot for `ttl` seconds; False if it is taken or held"""
+        self._ensure_loaded()
+        duration = duration or DEFAULT_SERVICE_DURATION
+        self.release(client_id)  # One hold per client
+
+        if not availability_index.fits(barber_id, date, time_str, duration, client_id):
+            return False
+
+        expires_at = time.time() + self.ttl
+        with db_pool.transaction() as conn:
+            # Holds of other threads and processes, under the write lock
+            if overlaps(held_intervals(conn, barber_id, date, client_id), time_str, duration):
+                return False
+            conn.execute('''
+                INSERT OR REPLACE INTO slot_holds
+                (client_id, barber_id, booking_date, booking_time, duration_minutes, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (client_id, barber_id, date, time_str, duration, expires_at))
+
+        with self._lock:
+            self._holds[client_id] = (barber_id, date, time_str, duration, expires_at)
+        availability_index.hold_added(client_id, barber_id, date, time_str, duration)
+        return True
+
+    def release(self, client_id):
+        """Drop the client's hold, if any"""
+        with self._lock:
+            hold = self._holds.pop(client_id, None)
+        if hold is None:
+            return False
+
+        with db_pool.transaction() as conn:
+            conn.execute("DELETE FROM slot_holds WHERE client_id = ?", (client_id,))
+        availability_index.hold_removed(client_id, hold[0], hold[1])
+        return True
+
+    def get(self, client_id):
+        """(barber_id, date, time_str, duration, expires_at) or None"""
+        with self._lock:
+            return self._holds.get(client_id)
+
+    def evict_expired(self):
+        """Drop expired holds from memory and the database"""
+        now = time.time()
+        with self._lock:
+            expired = [(client_id, hold) for client_id, hold in self._holds.items()
+                       if hold[4] <= now]
+            for client_id, _ in expired:
+                del self._holds[client_id]
+
+        for client_id, hold in expired:
+            availability_index.hold_removed(client_id, hold[0], hold[1])
+        # Also clears holds left behind by other processes
+        with db_pool.transaction() as conn:
+            conn.execute("DELETE FROM slot_holds WHERE expires_at <= ?", (now,))
+        return len(expired)
+
+
+slot_holds = SlotHolds()
+
+_eviction_thread = None
+_eviction_lock = threading.Lock()
+
+
+def _eviction_loop(interval):
+    """Evict expired holds periodically"""
+    while True:
+        time.sleep(interval)
+        try:
+            slot_holds.evict_expired()
+        except Exception as e:
+            print(f"Error evicting slot holds: {e}")
+
+
+def start_eviction_task(interval=SLOT_HOLD_EVICT_INTERVAL):
+    """Start the background eviction thread once per process"""
+    global _eviction_thread
+    with _eviction_lock:
+        if _eviction_thread is None:
+            _eviction_thread = threading.Thread(
+                target=_eviction_loop, args=(interval,),
+                name="SlotHoldEviction", daemon=True)
+            _eviction_thread.start()
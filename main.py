@@ -1,11 +1,20 @@
 # main.py
 from threading import Thread
+from config import UPDATE_MODE
+from database import init_database
 from admin_bot import startadmin
 from barber_bot import startbarber
 from user_bot import startuser
 
-Thread(target=startadmin).start()
-Thread(target=startbarber).start()
-Thread(target=startuser).start()
+# Run schema migrations once before any bot touches the database
+init_database()
 
-print("All bots are running...")
+if UPDATE_MODE == 'webhook':
+    from webhook import startall
+    startall()
+else:
+    Thread(target=startadmin).start()
+    Thread(target=startbarber).start()
+    Thread(target=startuser).start()
+
+    print("All bots are running...")
@@ -0,0 +1,462 @@
+"""Versioned schema migrations
+
+Each migration runs once, in order, inside its own BEGIN IMMEDIATE
+transaction and is recorded in the schema_version table. The latest
+applied version is mirrored in PRAGMA user_version so an up-to-date
+database is recognised with a single header read and no DDL.
+"""
+from datetime import datetime
+
+
+def initial_schema(cursor):
+    """Tables and seed data of the original schema"""
+    # Users (Clients)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        telegram_id INTEGER UNIQUE,
+        full_name TEXT,
+        username TEXT,
+        phone TEXT,
+        language TEXT DEFAULT 'uz',
+        registered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+    # Cities
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS cities (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name_uz TEXT,
+        name_ru TEXT,
+        name_en TEXT,
+        is_active BOOLEAN DEFAULT 1
+    )
+    ''')
+
+    # Districts
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS districts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        city_id INTEGER,
+        name_uz TEXT,
+        name_ru TEXT,
+        name_en TEXT,
+        is_active BOOLEAN DEFAULT 1,
+        FOREIGN KEY (city_id) REFERENCES cities (id)
+    )
+    ''')
+
+    # Barbershops
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS barbershops (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        owner_id INTEGER,
+        name TEXT,
+        city_id INTEGER,
+        district_id INTEGER,
+        address TEXT,
+        phone TEXT,
+        description TEXT,
+        latitude REAL,
+        longitude REAL,
+        rating REAL DEFAULT 0,
+        is_active BOOLEAN DEFAULT 0, -- 0 = pending approval, 1 = active
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (city_id) REFERENCES cities (id),
+        FOREIGN KEY (district_id) REFERENCES districts (id),
+        FOREIGN KEY (owner_id) REFERENCES users (telegram_id)
+    )
+    ''')
+
+    # Barbershop Photos
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS barbershop_photos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        barbershop_id INTEGER,
+        photo_id TEXT,
+        caption TEXT,
+        is_main BOOLEAN DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (barbershop_id) REFERENCES barbershops (id)
+    )
+    ''')
+
+    # Barbers
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS barbers (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        barbershop_id INTEGER,
+        full_name TEXT,
+        experience_years INTEGER DEFAULT 0,
+        specialty TEXT,
+        description TEXT,
+        rating REAL DEFAULT 0,
+        is_active BOOLEAN DEFAULT 1,
+        work_schedule TEXT DEFAULT '09:00-19:00',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (barbershop_id) REFERENCES barbershops (id)
+    )
+    ''')
+
+    # Barber Photos
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS barber_photos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        barber_id INTEGER,
+        photo_id TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (barber_id) REFERENCES barbers (id)
+    )
+    ''')
+
+    # Services
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS services (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        barbershop_id INTEGER,
+        name_uz TEXT,
+        name_ru TEXT,
+        name_en TEXT,
+        price INTEGER,
+        duration_minutes INTEGER DEFAULT 30,
+        is_active BOOLEAN DEFAULT 1,
+        FOREIGN KEY (barbershop_id) REFERENCES barbershops (id)
+    )
+    ''')
+
+    # Bookings
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS bookings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        client_id INTEGER,
+        barber_id INTEGER,
+        barbershop_id INTEGER,
+        service_id INTEGER,
+        booking_date DATE,
+        booking_time TIME,
+        status TEXT DEFAULT 'pending', -- pending, confirmed, cancelled, completed
+        notes TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (client_id) REFERENCES users (telegram_id),
+        FOREIGN KEY (barber_id) REFERENCES barbers (id),
+        FOREIGN KEY (barbershop_id) REFERENCES barbershops (id),
+        FOREIGN KEY (service_id) REFERENCES services (id)
+    )
+    ''')
+
+    # Reviews
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS reviews (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        booking_id INTEGER UNIQUE,
+        rating INTEGER CHECK(rating >= 1 AND rating <= 5),
+        comment TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (booking_id) REFERENCES bookings (id)
+    )
+    ''')
+
+    # Insert default cities
+    cursor.execute("SELECT COUNT(*) FROM cities")
+    if cursor.fetchone()[0] == 0:
+        default_cities = [
+            ('Toshkent', 'Ташкент', 'Tashkent'),
+            ('Andijon', 'Андижан', 'Andijan'),
+            ('Samarqand', 'Самарканд', 'Samarkand'),
+            ('Buxoro', 'Бухара', 'Bukhara'),
+            ('Namangan', 'Наманган', 'Namangan'),
+            ('Farg\'ona', 'Фергана', 'Fergana'),
+            ('Jizzax', 'Джизак', 'Jizzakh'),
+            ('Navoiy', 'Навои', 'Navoi'),
+            ('Qarshi', 'Карши', 'Karshi'),
+            ('Nukus', 'Нукус', 'Nukus')
+        ]
+        cursor.executemany(
+            "INSERT INTO cities (name_uz, name_ru, name_en) VALUES (?, ?, ?)",
+            default_cities
+        )
+
+    # Insert default districts for Tashkent
+    cursor.execute("SELECT id FROM cities WHERE name_uz = 'Toshkent'")
+    tashkent_id = cursor.fetchone()[0]
+
+    cursor.execute(
+        "SELECT COUNT(*) FROM districts WHERE city_id = ?", (tashkent_id,))
+    if cursor.fetchone()[0] == 0:
+        tashkent_districts = [
+            (tashkent_id, 'Yunusobod', 'Юнусабад', 'Yunusabad'),
+            (tashkent_id, 'Mirzo Ulug\'bek', 'Мирзо Улугбек', 'Mirzo Ulugbek'),
+            (tashkent_id, 'Shayxontoxur', 'Шайхонтохур', 'Shaykhantakhur'),
+            (tashkent_id, 'Chilonzor', 'Чиланзар', 'Chilanzar'),
+            (tashkent_id, 'Olmazor', 'Олмазор', 'Olmazor'),
+            (tashkent_id, 'Yakkasaroy', 'Яккасарай', 'Yakkasaray'),
+            (tashkent_id, 'Mirobod', 'Миробод', 'Mirobod'),
+            (tashkent_id, 'Sergeli', 'Сергели', 'Sergeli'),
+            (tashkent_id, 'Bektemir', 'Бектемир', 'Bektemir'),
+            (tashkent_id, 'Uchtepa', 'Учтепа', 'Uchtepa')
+        ]
+        cursor.executemany(
+            "INSERT INTO districts (city_id, name_uz, name_ru, name_en) VALUES (?, ?, ?, ?)",
+            tashkent_districts
+        )
+
+
+# Secondary indexes for the hot lookups (name, table, columns)
+INDEXES = [
+    # Free slots: barber + day, filtered by status, time read from the index
+    ('idx_bookings_barber_date', 'bookings',
+     'barber_id, booking_date, status, booking_time'),
+    # Client booking history, newest first
+    ('idx_bookings_client_date', 'bookings',
+     'client_id, booking_date, booking_time'),
+    # Shop bookings for a day, ordered by time
+    ('idx_bookings_shop_date', 'bookings',
+     'barbershop_id, booking_date, booking_time'),
+    # Reminders: confirmed bookings in a date/time window (dropped by
+    # migration 11, reminders have their own table)
+    ('idx_bookings_status_datetime', 'bookings',
+     'status, booking_date, booking_time'),
+    ('idx_barbershops_location', 'barbershops',
+     'city_id, is_active, district_id'),
+    ('idx_barbershops_owner', 'barbershops', 'owner_id'),
+    ('idx_barbers_shop', 'barbers', 'barbershop_id'),
+    ('idx_services_shop', 'services', 'barbershop_id'),
+    ('idx_barbershop_photos_shop', 'barbershop_photos', 'barbershop_id'),
+    ('idx_districts_city', 'districts', 'city_id'),
+]
+
+
+def create_indexes(cursor):
+    """Create the secondary indexes if they are missing"""
+    for name, table, columns in INDEXES:
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+
+
+def add_barber_telegram_id(cursor):
+    """Link barbers to their Telegram account for notifications"""
+    cursor.execute("PRAGMA table_info(barbers)")
+    columns = [row[1] for row in cursor.fetchall()]
+    if 'telegram_id' not in columns:
+        cursor.execute("ALTER TABLE barbers ADD COLUMN telegram_id INTEGER")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_barbers_telegram ON barbers (telegram_id)")
+
+
+def add_unique_active_slot(cursor):
+    """At most one active booking per barber and start time"""
+    # Older data may already hold double bookings: keep the first one
+    cursor.execute('''
+        UPDATE bookings SET status = 'cancelled'
+        WHERE status IN ('pending', 'confirmed') AND id NOT IN (
+            SELECT MIN(id) FROM bookings
+            WHERE status IN ('pending', 'confirmed')
+            GROUP BY barber_id, booking_date, booking_time
+        )
+    ''')
+    if cursor.rowcount:
+        print(f"⚠️ Cancelled {cursor.rowcount} double bookings")
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_bookings_active_slot
+        ON bookings (barber_id, booking_date, booking_time)
+        WHERE status IN ('pending', 'confirmed')
+    ''')
+
+
+def add_slot_holds(cursor):
+    """Slots reserved while a client confirms a booking (see holds.py)"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS slot_holds (
+        client_id INTEGER PRIMARY KEY,
+        barber_id INTEGER NOT NULL,
+        booking_date DATE NOT NULL,
+        booking_time TIME NOT NULL,
+        duration_minutes INTEGER NOT NULL,
+        expires_at REAL NOT NULL
+    )
+    ''')
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_slot_holds_barber_date ON slot_holds (barber_id, booking_date)")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_slot_holds_expires ON slot_holds (expires_at)")
+
+
+def add_barber_schedules(cursor):
+    """Per-weekday work hours with breaks, and dated exceptions
+
+    A NULL start_time is a day off. Barbers without weekday rows keep
+    using barbers.work_schedule (see schedules.py).
+    """
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS barber_schedules (
+        barber_id INTEGER NOT NULL,
+        weekday INTEGER NOT NULL, -- 0 = Monday
+        start_time TIME,
+        end_time TIME,
+        breaks TEXT DEFAULT '', -- '13:00-14:00,17:00-17:15'
+        PRIMARY KEY (barber_id, weekday),
+        FOREIGN KEY (barber_id) REFERENCES barbers (id)
+    )
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS barber_schedule_exceptions (
+        barber_id INTEGER NOT NULL,
+        exception_date DATE NOT NULL,
+        start_time TIME,
+        end_time TIME,
+        breaks TEXT DEFAULT '',
+        note TEXT,
+        PRIMARY KEY (barber_id, exception_date),
+        FOREIGN KEY (barber_id) REFERENCES barbers (id)
+    )
+    ''')
+
+
+def add_reminders(cursor):
+    """Reminders of confirmed bookings and their delivery log (see reminders.py)"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS reminders (
+        booking_id INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        due_at INTEGER NOT NULL, -- Unix time
+        sent_at INTEGER, -- NULL until claimed for sending
+        skipped INTEGER DEFAULT 0, -- Too late to send after downtime
+        PRIMARY KEY (booking_id, kind),
+        FOREIGN KEY (booking_id) REFERENCES bookings (id)
+    )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_reminders_due
+        ON reminders (due_at) WHERE sent_at IS NULL
+    ''')
+
+    # Backfill upcoming confirmed bookings with the columns of this
+    # version (imported here: reminders imports db_pool, which imports
+    # this module)
+    from reminders import due_times
+    now = datetime.now()
+    cursor.execute('''
+        SELECT id, booking_date, booking_time FROM bookings
+        WHERE status = 'confirmed' AND booking_date >= ?
+    ''', (now.strftime("%Y-%m-%d"),))
+    for booking_id, date, time_str in cursor.fetchall():
+        cursor.executemany(
+            "INSERT OR IGNORE INTO reminders (booking_id, kind, due_at) VALUES (?, ?, ?)",
+            [(booking_id, kind, due_at) for kind, due_at in due_times(date, time_str).items()
+             if due_at > now.timestamp()])
+
+
+def add_dead_letters(cursor):
+    """Messages the send queue gave up on (see send_queue.py)"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS dead_letters (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        bot TEXT NOT NULL, -- Token name in config
+        chat_id INTEGER NOT NULL,
+        method TEXT NOT NULL,
+        payload TEXT, -- JSON of the call's args and kwargs
+        error TEXT,
+        attempts INTEGER,
+        created_at REAL NOT NULL
+    )
+    ''')
+
+
+def add_event_outbox(cursor):
+    """Events for bots running in other processes (see events.py)"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS event_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        payload TEXT NOT NULL, -- JSON
+        created_at REAL NOT NULL
+    )
+    ''')
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_event_outbox_created ON event_outbox (created_at)")
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS event_consumers (
+        consumer TEXT PRIMARY KEY,
+        last_id INTEGER NOT NULL -- Last relayed event_outbox.id
+    )
+    ''')
+
+
+def add_reminder_claims(cursor):
+    """Mark reminders sent after delivery, claim them with a lease (see reminders.py)"""
+    cursor.execute("PRAGMA table_info(reminders)")
+    columns = [row[1] for row in cursor.fetchall()]
+    if 'remind_at' not in columns:
+        # due_at becomes the next time to look at the row (a claim moves it
+        # to the end of the lease); remind_at keeps the reminder's time
+        cursor.execute("ALTER TABLE reminders ADD COLUMN remind_at INTEGER")
+        cursor.execute("UPDATE reminders SET remind_at = due_at")
+    if 'claim_token' not in columns:
+        cursor.execute("ALTER TABLE reminders ADD COLUMN claim_token TEXT")
+
+
+def drop_status_datetime_index(cursor):
+    """Drop the index of the old reminder query, which nothing reads now"""
+    cursor.execute("DROP INDEX IF EXISTS idx_bookings_status_datetime")
+
+
+# (version, name, function) - append only, never renumber
+MIGRATIONS = [
+    (1, 'initial schema', initial_schema),
+    (2, 'hot query indexes', create_indexes),
+    (3, 'barbers.telegram_id', add_barber_telegram_id),
+    (4, 'unique active slot', add_unique_active_slot),
+    (5, 'slot holds', add_slot_holds),
+    (6, 'barber schedules', add_barber_schedules),
+    (7, 'reminders', add_reminders),
+    (8, 'dead letters', add_dead_letters),
+    (9, 'event outbox', add_event_outbox),
+    (10, 'reminder claims', add_reminder_claims),
+    (11, 'drop bookings status index', drop_status_datetime_index),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    """Version stored in the database header"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Apply pending migrations, return the list of applied versions"""
+    if get_schema_version(conn) >= LATEST_VERSION:
+        return []
+
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        name TEXT,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+    applied = []
+    for version, name, func in MIGRATIONS:
+        # Take the write lock first, then re-check: another process may
+        # have applied this migration while we were waiting
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if get_schema_version(conn) >= version:
+                conn.rollback()
+                continue
+
+            func(conn.cursor())
+            conn.execute(
+                "INSERT OR REPLACE INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+                (version, name, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        applied.append(version)
+
+    return applied
@@ -0,0 +1,89 @@
+import threading
+import time
+
+from config import REFERENCE_CACHE_TTL
+import db_pool
+
+NAME_COLUMNS = {'uz': 'name_uz', 'ru': 'name_ru', 'en': 'name_en'}
+
+
+def _name_column(language):
+    """Column holding names in a language ('en' for unknown languages)"""
+    return NAME_COLUMNS.get(language, 'name_en')
+
+
+class ReferenceData:
+    """In-memory copy of the active cities and districts
+
+    Loaded with two queries on first use and kept as per-language lists
+    sorted like the old `ORDER BY name_xx` queries. Admin write paths call
+    invalidate(); the TTL only matters when the admin bot runs in another
+    process.
+    """
+
+    def __init__(self, ttl=REFERENCE_CACHE_TTL):
+        self.ttl = ttl
+        self.version = 0
+        self._snapshot = None  # (version, loaded_at, cities, districts)
+        self._lock = threading.Lock()
+
+    def _load(self):
+        """Read cities and districts and index them by language"""
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT id, name_uz, name_ru, name_en FROM cities WHERE is_active = 1")
+            city_rows = cursor.fetchall()
+            cursor.execute('''
+                SELECT id, city_id, name_uz, name_ru, name_en FROM districts
+                WHERE is_active = 1
+            ''')
+            district_rows = cursor.fetchall()
+
+        cities = {}
+        districts = {}
+        for index, language in enumerate(NAME_COLUMNS.values()):
+            cities[language] = sorted(
+                ((row[0], row[1 + index]) for row in city_rows),
+                key=lambda item: item[1])
+            by_city = {}
+            for row in district_rows:
+                by_city.setdefault(row[1], []).append((row[0], row[2 + index]))
+            for items in by_city.values():
+                items.sort(key=lambda item: item[1])
+            districts[language] = by_city
+
+        return cities, districts
+
+    def _get_snapshot(self):
+        snapshot = self._snapshot
+        if (snapshot is not None and snapshot[0] == self.version and
+                time.monotonic() - snapshot[1] < self.ttl):
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if (snapshot is None or snapshot[0] != self.version or
+                    time.monotonic() - snapshot[1] >= self.ttl):
+                version = self.version
+                cities, districts = self._load()
+                snapshot = (version, time.monotonic(), cities, districts)
+                self._snapshot = snapshot
+            return snapshot
+
+    def cities(self, language='uz'):
+        """[(id, name)] of active cities sorted by name"""
+        return list(self._get_snapshot()[2][_name_column(language)])
+
+    def districts(self, city_id, language='uz'):
+        """[(id, name)] of active districts of a city sorted by name"""
+        return list(self._get_snapshot()[3][_name_column(language)].get(city_id, []))
+
+    def invalidate(self):
+        """Drop the loaded data, the next read reloads it"""
+        with self._lock:
+            self.version += 1
+            self._snapshot = None
+
+
+reference_data = ReferenceData()
@@ -0,0 +1,170 @@
+import functools
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from config import (
+    REMINDER_OFFSETS, REMINDER_GRACE_PERIOD, REMINDER_RESYNC_INTERVAL, REMINDER_CLAIM_LEASE
+)
+import db_pool
+
+
+def due_times(date, time_str):
+    """{kind: unix time} when each reminder of a booking is due"""
+    start = datetime.strptime(f"{date} {time_str}", "%Y-%m-%d %H:%M")
+    return {kind: int((start - timedelta(minutes=minutes)).timestamp())
+            for kind, minutes in REMINDER_OFFSETS.items()}
+
+
+def schedule_reminders(cursor, booking_id, date, time_str):
+    """Record the upcoming reminders of a confirmed booking
+
+    Runs inside the transaction that confirms the booking. Reminders that
+    were already sent, or are being sent for the same time, are left
+    alone, so re-confirming never resends them.
+    """
+    now = time.time()
+    cursor.executemany('''
+        INSERT INTO reminders (booking_id, kind, due_at, remind_at) VALUES (?, ?, ?, ?)
+        ON CONFLICT (booking_id, kind) DO UPDATE SET
+            due_at = excluded.due_at, remind_at = excluded.remind_at, claim_token = NULL
+        WHERE sent_at IS NULL AND remind_at IS NOT excluded.remind_at
+    ''', [(booking_id, kind, due_at, due_at)
+          for kind, due_at in due_times(date, time_str).items() if due_at > now])
+
+
+def cancel_reminders(cursor, booking_id):
+    """Drop the unsent reminders of a booking that is no longer confirmed"""
+    cursor.execute(
+        "DELETE FROM reminders WHERE booking_id = ? AND sent_at IS NULL", (booking_id,))
+
+
+class ReminderScheduler:
+    """Sends the reminders recorded in the reminders table
+
+    The partial index on due_at is the queue: one thread sleeps until the
+    earliest unsent row is due, then range-scans everything due. A row is
+    claimed by moving its due_at to the end of a lease under a fresh claim
+    token, and sent_at is only written when the send queue reports the
+    message delivered. After a crash the claim runs out and the reminder
+    is picked up again, by this or another process; only a crash between
+    Telegram accepting the message and sent_at being written repeats it.
+    Reminders more than `grace_period` seconds late (e.g. after downtime),
+    for bookings no longer confirmed, or given up on by the send queue
+    (see dead_letters) are marked skipped instead.
+    """
+
+    def __init__(self, grace_period=REMINDER_GRACE_PERIOD,
+                 resync_interval=REMINDER_RESYNC_INTERVAL, claim_lease=REMINDER_CLAIM_LEASE):
+        self.grace_period = grace_period
+        self.resync_interval = resync_interval
+        self.claim_lease = claim_lease
+        self._cond = threading.Condition()
+        self._thread = None
+        self._send = None
+        self._woken = False
+
+    def wake(self):
+        """Re-read the next due time, e.g. after a booking was confirmed"""
+        with self._cond:
+            self._woken = True
+            self._cond.notify()
+
+    def next_due(self):
+        """Earliest unsent due_at (including claims running out), or None"""
+        with db_pool.connection() as conn:
+            return conn.execute(
+                "SELECT MIN(due_at) FROM reminders WHERE sent_at IS NULL").fetchone()[0]
+
+    def _claim(self, booking_id, kind, now):
+        """Lease a due reminder; the claim token, or None if someone else has it"""
+        token = uuid.uuid4().hex
+        with db_pool.transaction() as conn:
+            claimed = conn.execute('''
+                UPDATE reminders SET due_at = ?, claim_token = ?
+                WHERE booking_id = ? AND kind = ? AND sent_at IS NULL AND due_at <= ?
+            ''', (now + self.claim_lease, token, booking_id, kind, now)).rowcount == 1
+        return token if claimed else None
+
+    def _finish(self, booking_id, kind, token, skipped):
+        """Record a claimed reminder as sent or skipped"""
+        with db_pool.transaction() as conn:
+            conn.execute('''
+                UPDATE reminders SET sent_at = ?, skipped = ?
+                WHERE booking_id = ? AND kind = ? AND claim_token = ? AND sent_at IS NULL
+            ''', (int(time.time()), skipped, booking_id, kind, token))
+
+    def _delivered(self, booking_id, kind, token, error):
+        """Send queue callback: the message went out, or was dead-lettered"""
+        if error is not None:
+            print(f"Reminder {booking_id}/{kind} not delivered: {error}")
+        self._finish(booking_id, kind, token, error is not None)
+
+    def dispatch_due(self):
+        """Queue every due reminder, return the number queued"""
+        now = int(time.time())
+        with db_pool.connection() as conn:
+            rows = conn.execute('''
+                SELECT booking_id, kind, remind_at FROM reminders
+                WHERE sent_at IS NULL AND due_at <= ?
+                ORDER BY due_at
+            ''', (now,)).fetchall()
+
+        sent = 0
+        for booking_id, kind, remind_at in rows:
+            token = self._claim(booking_id, kind, now)
+            if token is None:
+                continue  # Claimed by another process
+            if now - remind_at > self.grace_period:
+                print(f"Skipped reminder {booking_id}/{kind}, {now - remind_at}s late")
+                self._finish(booking_id, kind, token, True)
+                continue
+            try:
+                queued = self._send(booking_id, kind, functools.partial(
+                    self._delivered, booking_id, kind, token))
+            except Exception as e:
+                # The claim runs out and the next pass tries again
+                print(f"Error sending reminder {booking_id}/{kind}: {e}")
+                continue
+            if queued:
+                sent += 1
+            else:
+                self._finish(booking_id, kind, token, True)  # Nothing to send
+        return sent
+
+    def _run(self):
+        while True:
+            try:
+                self.dispatch_due()
+                next_due = self.next_due()
+            except Exception as e:
+                print(f"Error in reminder scheduler: {e}")
+                next_due = None
+
+            # Capped so reminders written by another process are seen
+            timeout = self.resync_interval
+            if next_due is not None:
+                timeout = min(timeout, max(next_due - time.time(), 0))
+            with self._cond:
+                if not self._woken:
+                    self._cond.wait(timeout)
+                self._woken = False
+
+    def start(self, send):
+        """Start the sender thread once per process (catching up on
+        reminders missed while it was down)
+
+        send(booking_id, kind, on_done) queues one reminder and returns
+        True, or False when there is nothing to send; on_done(error) must
+        be called once the message was delivered or given up on.
+        """
+        with self._cond:
+            if self._thread is None:
+                self._send = send
+                self._thread = threading.Thread(
+                    target=self._run, name="ReminderScheduler", daemon=True)
+                self._thread.start()
+
+
+reminder_scheduler = ReminderScheduler()
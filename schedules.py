@@ -0,0 +1,254 @@
+import re
+from collections import namedtuple
+from datetime import date as Date
+
+from config import DEFAULT_WORK_HOURS, SCHEDULE_CACHE_SIZE, SCHEDULE_CACHE_TTL
+from cache import TTLCache, MISSING
+import db_pool
+
+# Work hours of one day in minutes; breaks is a tuple of (start, end)
+DayHours = namedtuple('DayHours', ['start', 'end', 'breaks'])
+
+
+TIME_FORMAT = re.compile(r'([0-9]{1,2}):([0-9]{2})')
+
+
+def to_minutes(time_str):
+    """'HH:MM' -> minutes since midnight
+
+    Unchecked, for times the bot stored itself; parse user input with
+    parse_time().
+    """
+    hours, minutes = time_str.split(':')[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def to_time_str(minutes):
+    """Minutes since midnight -> 'HH:MM'"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def parse_time(text, end=False):
+    """'HH:MM' -> minutes since midnight; ValueError if malformed
+
+    Hours 0-23 and minutes 0-59; 24:00 is allowed only as an end time.
+    """
+    match = TIME_FORMAT.fullmatch(text)
+    if match is None:
+        raise ValueError(f"Bad time: {text}")
+    hours, minutes = int(match.group(1)), int(match.group(2))
+    if minutes >= 60 or hours > 24 or hours == 24 and (minutes or not end):
+        raise ValueError(f"Bad time: {text}")
+    return hours * 60 + minutes
+
+
+def parse_range(text):
+    """'09:30-19:00' -> (570, 1140); ValueError if malformed or empty"""
+    start_str, end_str = text.split('-')
+    start, end = parse_time(start_str.strip()), parse_time(end_str.strip(), end=True)
+    if not 0 <= start < end <= 24 * 60:
+        raise ValueError(f"Bad time range: {text}")
+    return start, end
+
+
+def parse_work_schedule(work_schedule):
+    """'09:30-19:00' -> (570, 1140), falling back to the default hours"""
+    for schedule in (work_schedule, DEFAULT_WORK_HOURS):
+        try:
+            return parse_range(schedule)
+        except (AttributeError, ValueError):
+            continue
+    return 9 * 60, 19 * 60
+
+
+def parse_breaks(text):
+    """'13:00-14:00, 17:00-17:15' -> ((780, 840), (1020, 1035))"""
+    if not text or not text.strip():
+        return ()
+    return tuple(sorted(parse_range(part) for part in text.split(',')))
+
+
+def format_range(start, end):
+    return f"{to_time_str(start)}-{to_time_str(end)}"
+
+
+def parse_hours(text):
+    """'09:00-19:00' or '09:00-19:00 13:00-14:00,17:00-17:15' -> DayHours"""
+    parts = text.split(None, 1)
+    start, end = parse_range(parts[0])
+    breaks = parse_breaks(parts[1]) if len(parts) > 1 else ()
+    if any(b_start < start or b_end > end for b_start, b_end in breaks):
+        raise ValueError("Break outside work hours")
+    return DayHours(start, end, breaks)
+
+
+class WeeklySchedule:
+    """Work hours of one barber: per weekday (0 = Monday) plus exceptions
+
+    A weekday missing from `weekdays` and an exception mapped to None are
+    days off.
+    """
+
+    def __init__(self, weekdays, exceptions=None, legacy=False):
+        self.weekdays = weekdays  # weekday -> DayHours
+        self.exceptions = exceptions or {}  # 'YYYY-MM-DD' -> DayHours or None
+        self.legacy = legacy  # Built from barbers.work_schedule
+
+    @classmethod
+    def from_work_schedule(cls, work_schedule, exceptions=None):
+        """Same hours every day, from the old '09:00-19:00' string"""
+        start, end = parse_work_schedule(work_schedule)
+        return cls({weekday: DayHours(start, end, ()) for weekday in range(7)},
+                   exceptions, legacy=True)
+
+    def hours(self, date):
+        """DayHours for a 'YYYY-MM-DD' date, or None on a day off"""
+        if date in self.exceptions:
+            return self.exceptions[date]
+        return self.weekdays.get(Date.fromisoformat(date).weekday())
+
+
+def _row_hours(start_time, end_time, breaks):
+    """DB columns -> DayHours (None when start_time is NULL: day off)"""
+    if start_time is None:
+        return None
+    start, end = parse_range(f"{start_time}-{end_time}")
+    return DayHours(start, end, parse_breaks(breaks))
+
+
+def load_schedules(conn, barber_ids):
+    """{barber_id: WeeklySchedule} read with three queries
+
+    Barbers without rows in barber_schedules keep their work_schedule
+    string until the schedule is first edited.
+    """
+    placeholders = ', '.join('?' * len(barber_ids))
+    cursor = conn.cursor()
+
+    cursor.execute(
+        f"SELECT id, work_schedule FROM barbers WHERE id IN ({placeholders})",
+        list(barber_ids))
+    work_schedules = dict(cursor.fetchall())
+
+    cursor.execute(f'''
+        SELECT barber_id, weekday, start_time, end_time, breaks
+        FROM barber_schedules WHERE barber_id IN ({placeholders})
+    ''', list(barber_ids))
+    weekdays = {}
+    for barber_id, weekday, start_time, end_time, breaks in cursor.fetchall():
+        hours = _row_hours(start_time, end_time, breaks)
+        days = weekdays.setdefault(barber_id, {})
+        if hours is not None:
+            days[weekday] = hours
+
+    cursor.execute(f'''
+        SELECT barber_id, exception_date, start_time, end_time, breaks
+        FROM barber_schedule_exceptions
+        WHERE barber_id IN ({placeholders}) AND exception_date >= ?
+    ''', list(barber_ids) + [Date.today().isoformat()])
+    exceptions = {}
+    for barber_id, exception_date, start_time, end_time, breaks in cursor.fetchall():
+        exceptions.setdefault(barber_id, {})[exception_date] = \
+            _row_hours(start_time, end_time, breaks)
+
+    schedules = {}
+    for barber_id in barber_ids:
+        if barber_id in weekdays:
+            schedules[barber_id] = WeeklySchedule(
+                weekdays[barber_id], exceptions.get(barber_id))
+        else:
+            schedules[barber_id] = WeeklySchedule.from_work_schedule(
+                work_schedules.get(barber_id), exceptions.get(barber_id))
+    return schedules
+
+
+def _hours_columns(hours):
+    """DayHours or None -> (start_time, end_time, breaks) columns"""
+    if hours is None:
+        return None, None, ''
+    return to_time_str(hours.start), to_time_str(hours.end), \
+        ','.join(format_range(start, end) for start, end in hours.breaks)
+
+
+class ScheduleStore:
+    """Parsed schedules cached per barber
+
+    Writers go through set_weekday()/set_exception()/delete_exception(),
+    which drop the cached entry; the TTL picks up edits made by the barber
+    bot when it runs in another process.
+    """
+
+    def __init__(self, maxsize=SCHEDULE_CACHE_SIZE, ttl=SCHEDULE_CACHE_TTL):
+        self.cache = TTLCache(maxsize, ttl)
+
+    def get_many(self, barber_ids, conn=None):
+        """{barber_id: WeeklySchedule}, loading missing ones together"""
+        schedules = {}
+        missing = []
+        for barber_id in barber_ids:
+            schedule = self.cache.get(barber_id)
+            if schedule is MISSING:
+                missing.append(barber_id)
+            else:
+                schedules[barber_id] = schedule
+
+        if missing:
+            if conn is None:
+                with db_pool.connection() as conn:
+                    loaded = load_schedules(conn, missing)
+            else:
+                loaded = load_schedules(conn, missing)
+            for barber_id, schedule in loaded.items():
+                self.cache.set(barber_id, schedule)
+            schedules.update(loaded)
+        return schedules
+
+    def get(self, barber_id, conn=None):
+        return self.get_many([barber_id], conn)[barber_id]
+
+    def set_weekday(self, barber_id, weekday, hours):
+        """Set the hours of a weekday (None = day off)"""
+        with db_pool.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT COUNT(*) FROM barber_schedules WHERE barber_id = ?", (barber_id,))
+            if not cursor.fetchone()[0]:
+                # First edit: spell out the old string for every weekday
+                cursor.execute("SELECT work_schedule FROM barbers WHERE id = ?", (barber_id,))
+                row = cursor.fetchone()
+                legacy = WeeklySchedule.from_work_schedule(row[0] if row else None)
+                cursor.executemany('''
+                    INSERT INTO barber_schedules (barber_id, weekday, start_time, end_time, breaks)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', [(barber_id, day) + _hours_columns(legacy.weekdays[day]) for day in range(7)])
+
+            cursor.execute('''
+                INSERT OR REPLACE INTO barber_schedules
+                (barber_id, weekday, start_time, end_time, breaks)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (barber_id, weekday) + _hours_columns(hours))
+        self.cache.invalidate(barber_id)
+
+    def set_exception(self, barber_id, date, hours, note=None):
+        """Override one date (None = day off / holiday)"""
+        with db_pool.transaction() as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO barber_schedule_exceptions
+                (barber_id, exception_date, start_time, end_time, breaks, note)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (barber_id, date) + _hours_columns(hours) + (note,))
+        self.cache.invalidate(barber_id)
+
+    def delete_exception(self, barber_id, date):
+        with db_pool.transaction() as conn:
+            conn.execute('''
+                DELETE FROM barber_schedule_exceptions
+                WHERE barber_id = ? AND exception_date = ?
+            ''', (barber_id, date))
+        self.cache.invalidate(barber_id)
+
+    def invalidate(self, barber_id):
+        self.cache.invalidate(barber_id)
+
+
+schedule_store = ScheduleStore()
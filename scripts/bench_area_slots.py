@@ -0,0 +1,126 @@
+"""Benchmark of the city-wide "earliest free slot" search
+
+Fills a temporary database with many shops and barbers in one city, most
+of them booked out for today, and times utils.get_area_earliest_slots:
+  * cold   - empty availability index
+  * warm   - next-free index filled by the previous search
+  * write  - warm, after a booking change invalidated one barber
+
+The first result is checked against a brute-force scan of every barber.
+
+    python scripts/bench_area_slots.py [--shops 300] [--barbers 8] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import config
+
+TMP_DIR = tempfile.mkdtemp(prefix='bench_area_slots_')
+config.DATABASE_PATH = os.path.join(TMP_DIR, 'bench.db')
+
+import database
+import db_pool
+import utils
+from availability import availability_index, to_minutes
+
+
+def populate(shops, barbers):
+    """Shops in city 1 whose barbers are mostly full today"""
+    rng = random.Random(14)
+    today = datetime.now().strftime("%Y-%m-%d")
+    with db_pool.transaction() as conn:
+        cursor = conn.cursor()
+        bookings = []
+        for i in range(shops):
+            cursor.execute('''
+                INSERT INTO barbershops (owner_id, name, city_id, district_id, is_active, rating)
+                VALUES (1, ?, 1, ?, 1, ?)
+            ''', (f"Shop {i}", rng.randint(1, 3), rng.randint(1, 5)))
+            shop_id = cursor.lastrowid
+            for j in range(barbers):
+                cursor.execute('''
+                    INSERT INTO barbers (barbershop_id, full_name, work_schedule)
+                    VALUES (?, ?, '09:00-21:00')
+                ''', (shop_id, f"Barber {i}.{j}"))
+                barber_id = cursor.lastrowid
+                for minute in range(9 * 60, 21 * 60, 30):
+                    if rng.random() < 0.98:
+                        bookings.append((barber_id, shop_id, today,
+                                         f"{minute // 60:02d}:{minute % 60:02d}"))
+        cursor.executemany('''
+            INSERT INTO bookings (client_id, barber_id, barbershop_id, booking_date, booking_time, status)
+            VALUES (1, ?, ?, ?, ?, 'confirmed')
+        ''', bookings)
+    return bookings
+
+
+def brute_force_first():
+    """Earliest (date, time) over every barber, one barber at a time"""
+    now = datetime.now()
+    today = now.strftime("%Y-%m-%d")
+    best = None
+    for barber in utils.get_area_barbers(1):
+        for slot in utils.get_available_time_slots(barber[0], today):
+            if to_minutes(slot) >= to_minutes(now.strftime("%H:%M")):
+                best = min(best or (today, slot), (today, slot))
+                break
+    return best
+
+
+def best_of(repeat, func, before=None):
+    best = None
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--shops', type=int, default=300)
+    parser.add_argument('--barbers', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    try:
+        database.init_database()
+        bookings = populate(args.shops, args.barbers)
+        print(f"{args.shops * args.barbers} barbers, {len(bookings)} bookings")
+
+        search = lambda: utils.get_area_earliest_slots(1)
+        first = search()[0]
+        expected = brute_force_first()
+        if expected and first[:2] != expected:
+            # Past-midnight runs find nothing today; only compare real answers
+            raise SystemExit(f"mismatch: {first[:2]} != {expected}")
+
+        barber_id = first[2]
+
+        def write():
+            availability_index.booking_removed(0, barber_id, first[0])
+
+        cold = best_of(args.repeat, search, availability_index.clear)
+        warm = best_of(args.repeat, search)
+        after_write = best_of(args.repeat, search, write)
+        print(f"cold  {cold * 1e3:8.2f} ms per search")
+        print(f"warm  {warm * 1e3:8.2f} ms per search")
+        print(f"write {after_write * 1e3:8.2f} ms per search (one barber invalidated)")
+    finally:
+        db_pool.get_pool().close_all()
+        shutil.rmtree(TMP_DIR, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
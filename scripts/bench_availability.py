@@ -0,0 +1,145 @@
+"""Microbenchmark: bitmap availability vs the interval engine
+
+  * compute only - free_start_times() on interval lists vs
+                   BarberDay.free_starts() on a loaded bitmap
+  * fit check    - "does a 45 minute service fit at HH:MM" as an interval
+                   scan vs one AND on the bitmap
+  * end to end   - availability.get_free_slots() (SQL + sweep, what
+                   get_available_time_slots did before) vs the warm
+                   AvailabilityIndex behind get_available_time_slots now
+
+Results of both paths are compared for every barber-day.
+
+    python scripts/bench_availability.py [--days 200] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import config
+
+TMP_DIR = tempfile.mkdtemp(prefix='bench_availability_')
+config.DATABASE_PATH = os.path.join(TMP_DIR, 'bench.db')
+
+import database
+import db_pool
+import utils
+from availability import (
+    BarberDay, free_start_times, get_free_slots, interval_mask
+)
+
+WORK_START, WORK_END = 9 * 60, 21 * 60
+
+
+def random_day(rng):
+    """Packed day of 30/45/60 minute bookings on a 15 minute grid"""
+    intervals = []
+    minute = WORK_START
+    while True:
+        minute += rng.choice((0, 0, 15, 30, 60))
+        duration = rng.choice((30, 45, 60))
+        if minute + duration > WORK_END:
+            return intervals
+        intervals.append((minute, minute + duration))
+        minute += duration
+
+
+def best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_compute(days, repeat):
+    bitmaps = [BarberDay(WORK_START, WORK_END,
+                         {i: interval_mask(s, e) for i, (s, e) in enumerate(day)})
+               for day in days]
+    for day, bitmap in zip(days, bitmaps):
+        assert free_start_times(WORK_START, WORK_END, day, 45) == bitmap.free_starts(45)
+
+    interval = best_of(repeat, lambda: [free_start_times(WORK_START, WORK_END, d, 45) for d in days])
+    bitmap = best_of(repeat, lambda: [b.free_starts(45) for b in bitmaps])
+    print(f"compute   intervals {interval / len(days) * 1e6:7.2f} us   "
+          f"bitmap {bitmap / len(days) * 1e6:7.2f} us per barber-day")
+
+    start = 14 * 60
+    scan = best_of(repeat, lambda: [
+        not any(s < start + 45 and start < e for s, e in d) for d in days])
+    bits = best_of(repeat, lambda: [b.fits(start, 45) for b in bitmaps])
+    print(f"fit check intervals {scan / len(days) * 1e6:7.2f} us   "
+          f"bitmap {bits / len(days) * 1e6:7.2f} us per check")
+
+
+def bench_end_to_end(days, repeat):
+    database.init_database()
+    with db_pool.transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO barbershops (owner_id, name, city_id, is_active) VALUES (1, 'Bench', 1, 1)")
+        shop_id = cursor.lastrowid
+        cursor.execute("INSERT INTO barbers (barbershop_id, full_name, work_schedule) VALUES (?, 'B', '09:00-21:00')",
+                       (shop_id,))
+        barber_id = cursor.lastrowid
+        service_ids = {}
+        for duration in (30, 45, 60):
+            cursor.execute('''
+                INSERT INTO services (barbershop_id, name_uz, name_ru, name_en, price, duration_minutes)
+                VALUES (?, 'x', 'x', 'x', 1, ?)
+            ''', (shop_id, duration))
+            service_ids[duration] = cursor.lastrowid
+
+        dates = []
+        for offset, day in enumerate(days):
+            date_str = (date.today() + timedelta(days=offset)).strftime("%Y-%m-%d")
+            dates.append(date_str)
+            cursor.executemany('''
+                INSERT INTO bookings (client_id, barber_id, barbershop_id, service_id,
+                                      booking_date, booking_time, status)
+                VALUES (1, ?, ?, ?, ?, ?, 'confirmed')
+            ''', [(barber_id, shop_id, service_ids[e - s], date_str,
+                   f"{s // 60:02d}:{s % 60:02d}") for s, e in day])
+
+    def sql_path():
+        with db_pool.connection() as conn:
+            return [get_free_slots(conn, barber_id, d, 45) for d in dates]
+
+    def index_path():
+        return [utils.get_available_time_slots(barber_id, d, 45) for d in dates]
+
+    assert sql_path() == index_path()
+    sql = best_of(repeat, sql_path)
+    index = best_of(repeat, index_path)
+    print(f"end2end   sql+sweep {sql / len(dates) * 1e6:7.2f} us   "
+          f"bitmap {index / len(dates) * 1e6:7.2f} us per barber-day (warm)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    days = [random_day(rng) for _ in range(args.days)]
+    print(f"{args.days} barber-days, {sum(map(len, days))} bookings")
+
+    try:
+        bench_compute(days, args.repeat)
+        bench_end_to_end(days, args.repeat)
+    finally:
+        db_pool.get_pool().close_all()
+        shutil.rmtree(TMP_DIR, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
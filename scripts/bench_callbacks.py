@@ -0,0 +1,119 @@
+"""Dispatch cost of callback queries: lambda filters vs CallbackRouter
+
+Takes the full set of callback routes of the three bots and rebuilds the
+old registration next to it: one `call.data == ...` or
+`call.data.startswith(...)` filter per handler, tested in order by telebot,
+with the handler splitting call.data itself. For every route a matching
+callback is generated (ids for int parameters, a date for str ones) and
+pushed through both. Prints the time per callback for the bare match and
+for telebot's process_new_callback_query, per bot and for the last route
+of each bot (the worst case of the linear scan). No handler runs bot code
+and nothing is sent.
+
+    python scripts/bench_callbacks.py [--rounds 2000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import telebot
+from telebot import types
+
+from callback_router import CallbackRouter, PARAM
+import admin_bot
+import barber_bot
+import user_bot
+
+BOTS = [('user', user_bot.router), ('barber', barber_bot.router), ('admin', admin_bot.router)]
+SAMPLE_VALUES = {'int': '1042', 'str': '2026-10-17'}
+
+
+def noop(call, **params):
+    pass
+
+
+def parse_noop(call):
+    call.data.split('_')  # What the old handlers did first
+
+
+def sample_data(pattern):
+    return PARAM.sub(lambda param: SAMPLE_VALUES[param.group(1) or 'str'], pattern)
+
+
+def old_filters(patterns):
+    """The lambdas the bots were registered with, in the same order"""
+    filters = []
+    prefixes = set()
+    for pattern in patterns:
+        param = PARAM.search(pattern)
+        if param is None:
+            filters.append(lambda call, data=pattern: call.data == data)
+        elif pattern[:param.start()] not in prefixes:
+            prefix = pattern[:param.start()]
+            prefixes.add(prefix)
+            filters.append(lambda call, prefix=prefix: call.data.startswith(prefix))
+    return filters
+
+
+def scan(filters, call):
+    for test in filters:
+        if test(call):
+            return test
+    return None
+
+
+def make_call(data):
+    return types.CallbackQuery.de_json({
+        'id': '1', 'chat_instance': '1', 'data': data,
+        'from': {'id': 1, 'is_bot': False, 'first_name': 'Bench'}})
+
+
+def timed(fn, calls, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for call in calls:
+            fn(call)
+    return (time.perf_counter() - start) / (rounds * len(calls)) * 1e6  # µs
+
+
+def telebot_with(filters=None, router=None):
+    bot = telebot.TeleBot('1:bench', threaded=False)
+    if router is not None:
+        router.attach(bot)
+    for test in filters or ():
+        bot.register_callback_query_handler(parse_noop, func=test)
+    return bot
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'bot':8} {'routes':>6} {'calls':>6} {'scan µs':>8} {'trie µs':>8} "
+          f"{'telebot old':>11} {'telebot new':>11}")
+    for name, bot_router in BOTS:
+        router = CallbackRouter()
+        for pattern in bot_router.patterns:
+            router.add(pattern, noop)
+        filters = old_filters(bot_router.patterns)
+
+        calls = [make_call(sample_data(pattern)) for pattern in bot_router.patterns]
+        for call in calls:
+            assert scan(filters, call) is not None and router.match(call.data), call.data
+
+        old_bot, new_bot = telebot_with(filters=filters), telebot_with(router=router)
+        rows = [('all', calls), ('last', calls[-1:] * len(calls))]
+        for label, batch in rows:
+            print(f"{name + ' ' + label:8} {len(bot_router.patterns):6} {len(batch):6} "
+                  f"{timed(lambda call: scan(filters, call), batch, args.rounds):8.2f} "
+                  f"{timed(lambda call: router.dispatch(call), batch, args.rounds):8.2f} "
+                  f"{timed(lambda call: old_bot.process_new_callback_query([call]), batch, args.rounds):11.2f} "
+                  f"{timed(lambda call: new_bot.process_new_callback_query([call]), batch, args.rounds):11.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Per-click query count and latency of get_barbershop_details
+
+A "click" through a shop is what user_bot does when a client opens a shop
+card, picks a barber and then a service: three get_barbershop_details
+calls. This runs that sequence against a temporary database with and
+without the detail cache and prints SQL statements per click (counted
+with sqlite's trace callback) and time per click.
+
+    python scripts/bench_detail_cache.py [--clicks 1000]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import config
+
+TMP_DIR = tempfile.mkdtemp(prefix='bench_detail_cache_')
+config.DATABASE_PATH = os.path.join(TMP_DIR, 'bench.db')
+
+import database
+import db_pool
+import utils
+
+statements = []
+
+
+def traced_connection():
+    conn = database.get_db_connection()
+    conn.set_trace_callback(statements.append)
+    return conn
+
+
+def create_shop():
+    """Insert an active shop with a few barbers, services and photos"""
+    with db_pool.transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO barbershops (owner_id, name, city_id, district_id, address, phone, is_active)
+            VALUES (1, 'Bench Barber', 1, 1, 'Navoi 1', '+998900000000', 1)
+        ''')
+        shop_id = cursor.lastrowid
+        for i in range(5):
+            cursor.execute(
+                "INSERT INTO barbers (barbershop_id, full_name, experience_years) VALUES (?, ?, ?)",
+                (shop_id, f"Barber {i}", i))
+            cursor.execute('''
+                INSERT INTO services (barbershop_id, name_uz, name_ru, name_en, price, duration_minutes)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (shop_id, f"Xizmat {i}", f"Услуга {i}", f"Service {i}", 50000 + i, 30))
+            cursor.execute(
+                "INSERT INTO barbershop_photos (barbershop_id, photo_id, is_main) VALUES (?, ?, ?)",
+                (shop_id, f"photo-{i}", int(i == 0)))
+    return shop_id
+
+
+def run(shop_id, clicks, cached):
+    # Shop card, barber list, service list
+    load = utils.get_barbershop_details if cached else utils.load_barbershop_details
+    utils.barbershop_cache.clear()
+    statements.clear()
+    start = time.perf_counter()
+    for _ in range(clicks):
+        for _ in range(3):
+            load(shop_id, 'ru')
+    elapsed = time.perf_counter() - start
+    return len(statements) / clicks, elapsed / clicks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clicks', type=int, default=1000)
+    args = parser.parse_args()
+
+    database.init_database()
+    db_pool.get_pool()._factory = traced_connection
+    shop_id = create_shop()
+
+    for label, cached in (('without cache', False), ('with cache', True)):
+        queries, seconds = run(shop_id, args.clicks, cached)
+        print(f"{label:14} {queries:6.2f} queries/click  {seconds * 1e6:8.1f} us/click")
+
+    print(f"cache stats: {utils.barbershop_cache.stats()}")
+
+    db_pool.get_pool().close_all()
+    shutil.rmtree(TMP_DIR, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""Benchmark of the "any barber / earliest slot" search
+
+Fills a temporary database with one shop of busy barbers and times,
+per search:
+  * per barber  - get_available_time_slots for every barber and date,
+                  then sort and take the first N
+  * merged      - utils.get_earliest_slots (one load, heapq merge)
+
+Both start cold (empty availability index) and warm. Results are compared.
+
+    python scripts/bench_earliest_slots.py [--barbers 10] [--days 14] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import config
+
+TMP_DIR = tempfile.mkdtemp(prefix='bench_earliest_slots_')
+config.DATABASE_PATH = os.path.join(TMP_DIR, 'bench.db')
+
+import database
+import db_pool
+import utils
+from availability import availability_index, to_minutes
+
+LIMIT = 8
+
+
+def populate(barbers, days):
+    """One shop whose barbers are nearly booked out for the first days"""
+    rng = random.Random(13)
+    today = datetime.now()
+    with db_pool.transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO barbershops (owner_id, name, city_id, is_active)
+            VALUES (1, 'Bench', 1, 1)
+        ''')
+        shop_id = cursor.lastrowid
+        cursor.execute('''
+            INSERT INTO services (barbershop_id, name_uz, name_ru, name_en, price, duration_minutes)
+            VALUES (?, 'x', 'x', 'x', 1, 45)
+        ''', (shop_id,))
+        service_id = cursor.lastrowid
+
+        bookings = []
+        for i in range(barbers):
+            cursor.execute('''
+                INSERT INTO barbers (barbershop_id, full_name, work_schedule, rating)
+                VALUES (?, ?, '09:00-21:00', ?)
+            ''', (shop_id, f"Barber {i}", rng.randint(1, 5)))
+            barber_id = cursor.lastrowid
+            for day in range(days):
+                date_str = (today + timedelta(days=day)).strftime("%Y-%m-%d")
+                for minute in range(9 * 60, 21 * 60, 45):
+                    # First days are almost full, later ones open up
+                    if rng.random() < (0.97 if day < days // 2 else 0.5):
+                        bookings.append((barber_id, shop_id, service_id, date_str,
+                                         f"{minute // 60:02d}:{minute % 60:02d}"))
+        cursor.executemany('''
+            INSERT INTO bookings (client_id, barber_id, barbershop_id, service_id,
+                                  booking_date, booking_time, status)
+            VALUES (1, ?, ?, ?, ?, ?, 'confirmed')
+        ''', bookings)
+    return shop_id, len(bookings)
+
+
+def per_barber(shop_id, days):
+    """Earliest options the way a per-barber loop would find them"""
+    barber_ids = [b[0] for b in utils.get_barbershop_details(shop_id)['barbers']]
+    now = datetime.now()
+    dates = [(now + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days)]
+    not_before = (dates[0], to_minutes(now.strftime("%H:%M")))
+    options = []
+    for rank, barber_id in enumerate(barber_ids):
+        for date_str in dates:
+            for slot in utils.get_available_time_slots(barber_id, date_str, 45):
+                if (date_str, to_minutes(slot)) >= not_before:
+                    options.append((date_str, slot, rank, barber_id))
+    options.sort()
+    return [(d, t, b) for d, t, _, b in options[:LIMIT]]
+
+
+def best_of(repeat, func, cold):
+    best = None
+    for _ in range(repeat):
+        if cold:
+            availability_index.clear()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--barbers', type=int, default=10)
+    parser.add_argument('--days', type=int, default=14)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    try:
+        database.init_database()
+        shop_id, total = populate(args.barbers, args.days)
+        print(f"{args.barbers} barbers, {total} bookings over {args.days} days")
+
+        merged = lambda: utils.get_earliest_slots(shop_id, 45, LIMIT, args.days)
+        assert per_barber(shop_id, args.days) == merged()
+
+        for label, cold in (('cold', True), ('warm', False)):
+            loop = best_of(args.repeat, lambda: per_barber(shop_id, args.days), cold)
+            heap = best_of(args.repeat, merged, cold)
+            print(f"{label}  per barber {loop * 1e3:7.2f} ms   merged {heap * 1e3:7.2f} ms per search")
+    finally:
+        db_pool.get_pool().close_all()
+        shutil.rmtree(TMP_DIR, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""Benchmark of the free-slot computation
+
+Fills a temporary database with barbers that have hundreds of bookings
+over a two-week range (mixed 30/45/60 minute services) and times, per
+barber-day:
+  * the old algorithm - fixed 30-minute grid, `time not in booked_times`
+  * the current engine - utils.get_available_time_slots
+
+It also counts start times the old algorithm offers that overlap an
+existing booking (double-booking candidates).
+
+    python scripts/bench_slots.py [--barbers 20] [--days 14] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import config
+
+TMP_DIR = tempfile.mkdtemp(prefix='bench_slots_')
+config.DATABASE_PATH = os.path.join(TMP_DIR, 'bench.db')
+
+import database
+import db_pool
+import utils
+from availability import to_minutes
+
+
+def old_available_time_slots(barber_id, date_str):
+    """get_available_time_slots as it was before the interval engine"""
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT work_schedule FROM barbers WHERE id = ?", (barber_id,))
+        result = cursor.fetchone()
+        cursor.execute('''
+            SELECT booking_time FROM bookings
+            WHERE barber_id = ? AND booking_date = ? AND status IN ('confirmed', 'pending')
+        ''', (barber_id, date_str))
+        booked_times = [row[0] for row in cursor.fetchall()]
+
+    work_schedule = result[0] if result else "09:00-19:00"
+    try:
+        start_str, end_str = work_schedule.split('-')
+        start_hour = int(start_str.split(':')[0])
+        end_hour = int(end_str.split(':')[0])
+    except Exception:
+        start_hour, end_hour = 9, 19
+
+    available_slots = []
+    for hour in range(start_hour, end_hour):
+        for minute in [0, 30]:
+            time_str = f"{hour:02d}:{minute:02d}"
+            if time_str not in booked_times:
+                available_slots.append(time_str)
+    return available_slots
+
+
+def populate(barbers, days):
+    """Create one shop with services and fully packed barber days"""
+    rng = random.Random(42)
+    start_day = date.today()
+    with db_pool.transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO barbershops (owner_id, name, city_id, is_active)
+            VALUES (1, 'Bench', 1, 1)
+        ''')
+        shop_id = cursor.lastrowid
+
+        services = []
+        for duration in (30, 45, 60):
+            cursor.execute('''
+                INSERT INTO services (barbershop_id, name_uz, name_ru, name_en, price, duration_minutes)
+                VALUES (?, 'x', 'x', 'x', 50000, ?)
+            ''', (shop_id, duration))
+            services.append((cursor.lastrowid, duration))
+
+        barber_ids = []
+        for i in range(barbers):
+            cursor.execute('''
+                INSERT INTO barbers (barbershop_id, full_name, work_schedule)
+                VALUES (?, ?, '09:00-21:00')
+            ''', (shop_id, f"Barber {i}"))
+            barber_ids.append(cursor.lastrowid)
+
+        bookings = []
+        for barber_id in barber_ids:
+            for day in range(days):
+                day_str = (start_day + timedelta(days=day)).strftime("%Y-%m-%d")
+                minute = 9 * 60
+                while True:
+                    service_id, duration = rng.choice(services)
+                    minute += rng.choice((0, 0, 15, 30))
+                    if minute + duration > 21 * 60:
+                        break
+                    bookings.append((1, barber_id, shop_id, service_id, day_str,
+                                     f"{minute // 60:02d}:{minute % 60:02d}", 'confirmed'))
+                    minute += duration
+
+        cursor.executemany('''
+            INSERT INTO bookings (client_id, barber_id, barbershop_id, service_id,
+                                  booking_date, booking_time, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', bookings)
+
+    days_list = [(start_day + timedelta(days=d)).strftime("%Y-%m-%d") for d in range(days)]
+    return barber_ids, days_list, len(bookings)
+
+
+def overlapping_offers(barber_id, date_str, slots):
+    """Offered 30-minute starts that collide with an existing booking"""
+    with db_pool.connection() as conn:
+        rows = conn.execute('''
+            SELECT bk.booking_time, s.duration_minutes FROM bookings bk
+            LEFT JOIN services s ON bk.service_id = s.id
+            WHERE bk.barber_id = ? AND bk.booking_date = ?
+        ''', (barber_id, date_str)).fetchall()
+    busy = [(to_minutes(t), to_minutes(t) + d) for t, d in rows]
+    count = 0
+    for slot in slots:
+        start = to_minutes(slot)
+        if any(b_start < start + 30 and start < b_end for b_start, b_end in busy):
+            count += 1
+    return count
+
+
+def timed(func, barber_ids, days, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for barber_id in barber_ids:
+            for day in days:
+                func(barber_id, day)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / (len(barber_ids) * len(days))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--barbers', type=int, default=20)
+    parser.add_argument('--days', type=int, default=14)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    try:
+        database.init_database()
+        barber_ids, days, total = populate(args.barbers, args.days)
+        print(f"{total} bookings, {total // len(barber_ids)} per barber over {len(days)} days")
+
+        old = timed(old_available_time_slots, barber_ids, days, args.repeat)
+        new = timed(utils.get_available_time_slots, barber_ids, days, args.repeat)
+        new_60 = timed(lambda b, d: utils.get_available_time_slots(b, d, 60),
+                       barber_ids, days, args.repeat)
+        print(f"old fixed grid      {old * 1e6:8.1f} us per barber-day")
+        print(f"current engine      {new * 1e6:8.1f} us per barber-day")
+        print(f"current engine 60m  {new_60 * 1e6:8.1f} us per barber-day")
+
+        bad_old = sum(overlapping_offers(b, d, old_available_time_slots(b, d))
+                      for b in barber_ids for d in days)
+        bad_new = sum(overlapping_offers(b, d, utils.get_available_time_slots(b, d))
+                      for b in barber_ids for d in days)
+        print(f"overlapping offers: old {bad_old}, new {bad_new}")
+    finally:
+        db_pool.get_pool().close_all()
+        shutil.rmtree(TMP_DIR, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
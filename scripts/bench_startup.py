@@ -0,0 +1,112 @@
+"""Startup benchmark for the three bots
+
+For each bot module this measures, in a fresh interpreter:
+  * cold import   - time to `import user_bot` (no bot built, no DB opened)
+  * first poll    - time from process start of the start function until
+                    the first getUpdates call would go out
+
+The Telegram API is never contacted: getMe and getUpdates are replaced in
+the child process, and the first getUpdates call ends it. The database is a
+temporary copy, so the first run of each bot includes the migrations and
+later runs show the warm (already migrated) startup.
+
+    python scripts/bench_startup.py [--runs 5]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+BOTS = [
+    ('user_bot', 'startuser'),
+    ('barber_bot', 'startbarber'),
+    ('admin_bot', 'startadmin'),
+]
+
+IMPORT_CHILD = '''
+import sys, threading, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print("RESULT", elapsed, threading.active_count(), "translations" in sys.modules)
+'''
+
+POLL_CHILD = '''
+import os, time
+start = time.perf_counter()
+
+import config
+config.DATABASE_PATH = {db_path!r}
+
+import telebot
+from telebot import types
+
+
+def fake_get_me(self):
+    return types.User(0, True, 'bench', username='bench')
+
+
+def fake_get_updates(self, *args, **kwargs):
+    print("RESULT", time.perf_counter() - start, flush=True)
+    os._exit(0)
+
+
+telebot.TeleBot.get_me = fake_get_me
+telebot.TeleBot.get_updates = fake_get_updates
+
+import {module}
+{module}.{start}()
+'''
+
+
+def run_child(code):
+    """Run code in a fresh interpreter and return the RESULT fields"""
+    result = subprocess.run(
+        [sys.executable, '-c', code], cwd=ROOT,
+        capture_output=True, text=True, timeout=60)
+    for line in result.stdout.splitlines():
+        if line.startswith('RESULT'):
+            return line.split()[1:]
+    raise RuntimeError(f"child failed:\n{result.stdout}\n{result.stderr}")
+
+
+def fmt(values):
+    return (f"median {statistics.median(values) * 1000:7.1f} ms  "
+            f"min {min(values) * 1000:7.1f} ms  max {max(values) * 1000:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix='bench_startup_')
+    try:
+        for module, start in BOTS:
+            imports = []
+            for _ in range(args.runs):
+                elapsed, threads, translations = run_child(
+                    IMPORT_CHILD.format(module=module))
+                imports.append(float(elapsed))
+
+            db_path = os.path.join(tmp_dir, f'{module}.db')
+            polls = [float(run_child(POLL_CHILD.format(
+                module=module, start=start, db_path=db_path))[0])
+                for _ in range(args.runs + 1)]
+
+            print(f"{module}")
+            print(f"  cold import         {fmt(imports)}")
+            print(f"    threads after import: {threads}, translations loaded: {translations}")
+            print(f"  first poll (new db) {polls[0] * 1000:7.1f} ms")
+            print(f"  first poll (warm)   {fmt(polls[1:])}")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
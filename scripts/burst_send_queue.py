@@ -0,0 +1,113 @@
+"""Reminder burst through the send queue against a fake rate-limited bot
+
+The fake bot answers like Telegram: 429 with retry_after when more than
+`--global-limit` messages per second go out or a chat gets two messages
+within a second, plus a share of random network errors. Reports how long
+the burst took, how many 429s were hit and whether every message arrived
+exactly once and in order per chat.
+
+    python scripts/burst_send_queue.py [--chats 200] [--per-chat 2] [--errors 0.02]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import config
+
+TMP_DIR = tempfile.mkdtemp(prefix='burst_send_queue_')
+config.DATABASE_PATH = os.path.join(TMP_DIR, 'burst.db')
+
+from telebot.apihelper import ApiTelegramException
+
+import database
+import db_pool
+from send_queue import SendQueue
+
+
+class FakeBot:
+    """send_message with Telegram-like flood limits"""
+
+    token_name = 'FAKE_BOT_TOKEN'
+
+    def __init__(self, global_limit, error_rate):
+        self.global_limit = global_limit
+        self.error_rate = error_rate
+        self.rng = random.Random(7)
+        self.lock = threading.Lock()
+        self.recent = deque()  # Send times in the last second
+        self.last_by_chat = {}
+        self.received = defaultdict(list)
+        self.throttled = 0
+
+    def _too_many(self, retry_after):
+        self.throttled += 1
+        raise ApiTelegramException('sendMessage', None, {
+            'ok': False, 'error_code': 429,
+            'description': 'Too Many Requests',
+            'parameters': {'retry_after': retry_after}})
+
+    def send_message(self, chat_id, text, **kwargs):
+        with self.lock:
+            now = time.monotonic()
+            if self.rng.random() < self.error_rate:
+                raise ConnectionError('Connection reset')
+            while self.recent and now - self.recent[0] >= 1:
+                self.recent.popleft()
+            if len(self.recent) >= self.global_limit:
+                self._too_many(1)
+            if now - self.last_by_chat.get(chat_id, -1) < 1:
+                self._too_many(1)
+            self.recent.append(now)
+            self.last_by_chat[chat_id] = now
+            self.received[chat_id].append(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--chats', type=int, default=200)
+    parser.add_argument('--per-chat', type=int, default=2)
+    parser.add_argument('--errors', type=float, default=0.02)
+    parser.add_argument('--global-limit', type=int, default=30)
+    args = parser.parse_args()
+
+    try:
+        database.init_database()
+        bot = FakeBot(args.global_limit, args.errors)
+        queue = SendQueue(backoff_base=0.2)
+        queue.start()
+
+        total = args.chats * args.per_chat
+        start = time.perf_counter()
+        for n in range(args.per_chat):
+            for chat_id in range(args.chats):
+                queue.send_message(bot, chat_id, f"reminder {n}")
+        while queue.pending():
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - start
+
+        with db_pool.connection() as conn:
+            dead = conn.execute("SELECT COUNT(*) FROM dead_letters").fetchone()[0]
+        delivered = sum(len(texts) for texts in bot.received.values())
+        expected = [f"reminder {n}" for n in range(args.per_chat)]
+        in_order = all(bot.received[chat_id] == expected for chat_id in range(args.chats))
+
+        print(f"{total} messages to {args.chats} chats in {elapsed:.1f} s "
+              f"(floor {total / args.global_limit:.1f} s at {args.global_limit}/s)")
+        print(f"delivered {delivered}, dead letters {dead}, 429s {bot.throttled}, "
+              f"in order: {in_order}")
+        return 0 if delivered + dead == total and in_order else 1
+    finally:
+        db_pool.get_pool().close_all()
+        shutil.rmtree(TMP_DIR, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""Fake Telegram client posting updates to the webhook server
+
+By default starts webhook.WebhookServer in-process on a free local port,
+with a temporary database and the Bot API calls of the handlers answered
+by an in-process fake, then posts /start updates to all three bots from
+`--concurrency` connections. Also checks that a wrong secret gets 403,
+an unknown path 404 and a malformed body 400.
+
+With --url and --secret it posts to an already running server instead
+(e.g. UPDATE_MODE = 'webhook' with WEBHOOK_SECRET set).
+
+    python scripts/fake_telegram_client.py [--updates 300] [--concurrency 20]
+    python scripts/fake_telegram_client.py --url http://127.0.0.1:8443 --secret XYZ
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import config
+
+TMP_DIR = tempfile.mkdtemp(prefix='fake_telegram_client_')
+config.DATABASE_PATH = os.path.join(TMP_DIR, 'webhook.db')
+
+from telebot import apihelper
+
+import db_pool
+import webhook
+from dispatcher import update_dispatcher
+
+BOT_NAMES = ('user', 'barber', 'admin')
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, result):
+        self.text = json.dumps({'ok': True, 'result': result})
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def fake_bot_api(method, url, params=None, **kwargs):
+    """Answer the handlers' Bot API calls without the network"""
+    chat_id = int((params or {}).get('chat_id') or 0)
+    return FakeResponse({'message_id': 1, 'date': int(time.time()),
+                         'chat': {'id': chat_id, 'type': 'private'}, 'text': ''})
+
+
+def start_update(update_id, chat_id):
+    user = {'id': chat_id, 'is_bot': False, 'first_name': f"User {chat_id}"}
+    return {'update_id': update_id, 'message': {
+        'message_id': update_id, 'date': int(time.time()),
+        'chat': {'id': chat_id, 'type': 'private'}, 'from': user, 'text': '/start',
+        'entities': [{'type': 'bot_command', 'offset': 0, 'length': 6}]}}
+
+
+def post(url, body, secret):
+    """POST like Telegram does; return the HTTP status"""
+    request = urllib.request.Request(url, data=body, method='POST', headers={
+        'Content-Type': 'application/json', webhook.SECRET_HEADER: secret})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--updates', type=int, default=300)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--url', help="Base URL of a running webhook server")
+    parser.add_argument('--secret', help="Its WEBHOOK_SECRET")
+    args = parser.parse_args()
+
+    server = None
+    try:
+        if args.url:
+            base_url, secret = args.url.rstrip('/'), args.secret or ''
+        else:
+            apihelper.CUSTOM_REQUEST_SENDER = fake_bot_api
+            webhook.setup_bots()
+            secret = 'local-test-secret'
+            server = webhook.WebhookServer(('127.0.0.1', 0), webhook.bot_paths(), secret)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+        def path(name):
+            return f"{base_url}{config.WEBHOOK_PATH}/{name}"
+
+        update = json.dumps(start_update(1, 1)).encode()
+        checks = [
+            ('wrong secret', post(path('user'), update, 'wrong'), 403),
+            ('unknown path', post(f"{base_url}/nope", update, secret), 404),
+            ('malformed body', post(path('user'), b'{"update', secret), 400),
+        ]
+        for label, status, expected in checks:
+            print(f"[{'ok' if status == expected else 'FAIL'}] {label}: {status}")
+
+        def send(n):
+            body = json.dumps(start_update(n, 1000 + n)).encode()
+            return post(path(BOT_NAMES[n % len(BOT_NAMES)]), body, secret)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.concurrency) as executor:
+            statuses = list(executor.map(send, range(2, args.updates + 2)))
+        accepted = statuses.count(200)
+        while server and update_dispatcher.stats()['processed'] < accepted:
+            time.sleep(0.02)
+        elapsed = time.perf_counter() - start
+
+        print(f"{args.updates} updates posted, {accepted} accepted "
+              f"({statuses.count(503)} asked to retry) in {elapsed:.2f} s")
+        if server:
+            print(f"{update_dispatcher.stats()['processed']} handled, "
+                  f"{threading.active_count()} threads, "
+                  f"max {update_dispatcher.stats()['max_queued']} queued")
+        failed = any(status != expected for _, status, expected in checks)
+        return 1 if failed or accepted + statuses.count(503) != args.updates else 0
+    finally:
+        if server:
+            server.shutdown()
+            server.server_close()
+        db_pool.get_pool().close_all()
+        shutil.rmtree(TMP_DIR, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
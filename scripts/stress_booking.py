@@ -0,0 +1,156 @@
+"""Concurrency check for create_booking
+
+Fires parallel bookings at one barber from many threads (and, with
+--processes, from several processes sharing the database file) and checks
+that:
+  * exactly one booking wins an identical slot, the rest get a conflict
+    result with a refreshed slot list
+  * overlapping starts (10:00 and 10:30 for a 60 minute service) never
+    both succeed
+  * the bookings table holds no overlapping active bookings afterwards
+
+With several processes all of them target the same days, so a round may
+be won by another process; then only the final overlap check applies.
+
+Exits non-zero on any violation.
+
+    python scripts/stress_booking.py [--threads 32] [--rounds 20] [--processes 1]
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import config
+
+if __name__ == '__main__':
+    TMP_DIR = tempfile.mkdtemp(prefix='stress_booking_')
+    os.environ['STRESS_BOOKING_DB'] = os.path.join(TMP_DIR, 'stress.db')
+config.DATABASE_PATH = os.environ.get('STRESS_BOOKING_DB', config.DATABASE_PATH)
+
+import database
+import db_pool
+import utils
+from availability import ACTIVE_STATUSES, to_minutes
+
+CLIENTS = 64
+
+
+def setup():
+    """Shop with one barber, a 60 minute service and test clients"""
+    database.init_database()
+    with db_pool.transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO barbershops (owner_id, name, city_id, is_active) VALUES (1, 'Stress', 1, 1)")
+        shop_id = cursor.lastrowid
+        cursor.execute("INSERT INTO barbers (barbershop_id, full_name, work_schedule) VALUES (?, 'B', '09:00-21:00')",
+                       (shop_id,))
+        barber_id = cursor.lastrowid
+        cursor.execute('''
+            INSERT INTO services (barbershop_id, name_uz, name_ru, name_en, price, duration_minutes)
+            VALUES (?, 'x', 'x', 'x', 1, 60)
+        ''', (shop_id,))
+        service_id = cursor.lastrowid
+        cursor.executemany(
+            "INSERT OR IGNORE INTO users (telegram_id, full_name, phone) VALUES (?, 'Client', '+998')",
+            [(client,) for client in range(1, CLIENTS + 1)])
+    return shop_id, barber_id, service_id
+
+
+def fire(shop_id, barber_id, service_id, day, times, threads):
+    """Book `times` (cycled) from parallel threads, return the results"""
+    barrier = threading.Barrier(threads)
+    results = [None] * threads
+
+    def worker(i):
+        barrier.wait()
+        results[i] = utils.create_booking(
+            i % CLIENTS + 1, barber_id, shop_id, service_id, day, times[i % len(times)])
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return results
+
+
+def run_rounds(shop_id, barber_id, service_id, threads, rounds, shared):
+    """Each round targets its own day; returns the number of violations"""
+    errors = 0
+    for n in range(rounds):
+        day = (date.today() + timedelta(days=1 + n)).strftime("%Y-%m-%d")
+        # Same slot, and two overlapping starts for a 60 minute service
+        times = ['10:00'] if n % 2 == 0 else ['10:00', '10:30']
+        results = fire(shop_id, barber_id, service_id, day, times, threads)
+
+        won = [r for r in results if r.booking_id]
+        lost = [r for r in results if r.conflict]
+        failed = len(results) - len(won) - len(lost)
+        if len(won) > 1 or (len(won) == 0 and not shared) or failed:
+            print(f"[FAIL] {day} {times}: {len(won)} won, {len(lost)} conflicts, {failed} errors")
+            errors += 1
+        elif any('10:00' in r.free_slots or '10:30' in r.free_slots for r in lost):
+            print(f"[FAIL] {day}: conflict result still offers a taken slot")
+            errors += 1
+    return errors
+
+
+def overlapping_bookings():
+    """Pairs of active bookings of one barber-day whose intervals overlap"""
+    with db_pool.connection() as conn:
+        rows = conn.execute('''
+            SELECT bk.barber_id, bk.booking_date, bk.booking_time, s.duration_minutes
+            FROM bookings bk LEFT JOIN services s ON bk.service_id = s.id
+            WHERE bk.status IN (?, ?)
+            ORDER BY bk.barber_id, bk.booking_date, bk.booking_time
+        ''', ACTIVE_STATUSES).fetchall()
+    overlaps = 0
+    for previous, row in zip(rows, rows[1:]):
+        if previous[:2] == row[:2] and \
+                to_minutes(previous[2]) + (previous[3] or 30) > to_minutes(row[2]):
+            overlaps += 1
+    return overlaps
+
+
+def child(args, shared):
+    """Process entry point"""
+    shop_id, barber_id, service_id, threads, rounds = args
+    return run_rounds(shop_id, barber_id, service_id, threads, rounds, shared)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--processes', type=int, default=1)
+    args = parser.parse_args()
+
+    try:
+        shop_id, barber_id, service_id = setup()
+        job = (shop_id, barber_id, service_id, args.threads, args.rounds)
+        if args.processes > 1:
+            # Don't hand open connections to the forked children
+            db_pool.get_pool().close_all()
+            with multiprocessing.Pool(args.processes) as pool:
+                errors = sum(pool.starmap(child, [(job, True)] * args.processes))
+        else:
+            errors = child(job, False)
+
+        overlaps = overlapping_bookings()
+        print(f"{args.rounds} rounds x {args.processes} processes x {args.threads} threads: "
+              f"{errors} failed rounds, {overlaps} overlapping bookings")
+        return 1 if errors or overlaps else 0
+    finally:
+        db_pool.get_pool().close_all()
+        shutil.rmtree(TMP_DIR, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,230 @@
+import heapq
+import itertools
+import json
+import threading
+import time
+from collections import deque
+
+from telebot.apihelper import ApiTelegramException
+
+from config import (
+    SEND_QUEUE_WORKERS, SEND_GLOBAL_RATE, SEND_CHAT_RATE,
+    SEND_MAX_ATTEMPTS, SEND_BACKOFF_BASE
+)
+import db_pool
+
+
+class TokenBucket:
+    """`rate` tokens per second, bursting up to `capacity`"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def take(self, now):
+        """Take a token: 0 on success, else seconds until one is available"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def pause(self, seconds):
+        """Hand out nothing for `seconds` (Telegram asked us to slow down)"""
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+
+class Outbound:
+    """One queued Bot API call"""
+
+    __slots__ = ('bot', 'method', 'chat_id', 'args', 'kwargs', 'attempts', 'on_done', 'error')
+
+    def __init__(self, bot, method, chat_id, args, kwargs, on_done=None):
+        self.bot = bot
+        self.method = method
+        self.chat_id = chat_id
+        self.args = args
+        self.kwargs = kwargs
+        self.attempts = 0
+        self.on_done = on_done  # Called with None once sent, or the final error
+        self.error = None
+
+
+def _to_json(obj):
+    """Markups and other API objects in dead-letter payloads"""
+    return obj.to_json() if hasattr(obj, 'to_json') else str(obj)
+
+
+class SendQueue:
+    """Outbound messages of all bots, sent by worker threads
+
+    Each bot gets a token bucket for Telegram's global limit (~30 messages
+    per second) and each chat may receive one message per 1 / chat_rate
+    seconds; messages to one chat keep their order. A 429 pauses the chat
+    and the bot for its retry_after, network and server errors are retried
+    with exponential backoff, and messages that cannot be delivered end up
+    in the dead_letters table.
+    """
+
+    def __init__(self, global_rate=SEND_GLOBAL_RATE, chat_rate=SEND_CHAT_RATE,
+                 max_attempts=SEND_MAX_ATTEMPTS, backoff_base=SEND_BACKOFF_BASE):
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self._cond = threading.Condition()
+        self._chats = {}  # (bot name, chat_id) -> deque of Outbound
+        self._ready = []  # (not_before, seq, chat key) of chats waiting for a worker
+        self._next_send = {}  # chat key -> monotonic time it may receive again
+        self._buckets = {}  # bot name -> TokenBucket
+        self._seq = itertools.count()
+        self._threads = []
+
+    def send(self, bot, method, chat_id, *args, on_done=None, **kwargs):
+        """Queue bot.<method>(chat_id, *args, **kwargs)
+
+        on_done(error) runs on a worker thread when the call went through
+        (error is None) or was given up on.
+        """
+        key = (bot.token_name, chat_id)
+        with self._cond:
+            queue = self._chats.get(key)
+            if queue is None:
+                queue = self._chats[key] = deque()
+                now = time.monotonic()
+                not_before = self._next_send.pop(key, now)
+                heapq.heappush(self._ready, (not_before, next(self._seq), key))
+                if len(self._next_send) > 10000:
+                    self._next_send = {k: t for k, t in self._next_send.items() if t > now}
+            queue.append(Outbound(bot, method, chat_id, args, kwargs, on_done))
+            self._cond.notify()
+
+    def send_message(self, bot, chat_id, text, on_done=None, **kwargs):
+        self.send(bot, 'send_message', chat_id, text, on_done=on_done, **kwargs)
+
+    def _take(self):
+        """Wait for a chat that may receive now; (chat key, head message)"""
+        with self._cond:
+            while True:
+                if not self._ready:
+                    self._cond.wait()
+                    continue
+                now = time.monotonic()
+                not_before, _, key = self._ready[0]
+                if not_before > now:
+                    self._cond.wait(not_before - now)
+                    continue
+
+                heapq.heappop(self._ready)
+                bucket = self._buckets.get(key[0])
+                if bucket is None:
+                    # No burst: spread sends evenly so no 1 s window exceeds the rate
+                    bucket = self._buckets[key[0]] = TokenBucket(self.global_rate, 1)
+                wait = bucket.take(now)
+                if wait:
+                    heapq.heappush(self._ready, (now + wait, next(self._seq), key))
+                    continue
+                # The chat stays out of _ready until _finish: one message in flight
+                return key, self._chats[key][0]
+
+    def _finish(self, key, retry_at=None, pause=0):
+        """Release a chat after an attempt; retry_at keeps its head message"""
+        with self._cond:
+            queue = self._chats[key]
+            now = time.monotonic()
+            if retry_at is None:
+                queue.popleft()
+                not_before = now + 1 / self.chat_rate
+            else:
+                not_before = retry_at
+            if pause:
+                self._buckets[key[0]].pause(pause)
+
+            if queue:
+                heapq.heappush(self._ready, (not_before, next(self._seq), key))
+                self._cond.notify()
+            else:
+                del self._chats[key]
+                self._next_send[key] = not_before
+
+    def _deliver(self, message):
+        """One attempt; (monotonic retry time or None when done, bot pause)"""
+        message.attempts += 1
+        try:
+            getattr(message.bot, message.method)(
+                message.chat_id, *message.args, **message.kwargs)
+            return None, 0
+        except ApiTelegramException as e:
+            if e.error_code == 429:
+                parameters = (e.result_json or {}).get('parameters') or {}
+                retry_after = parameters.get('retry_after', 1)
+                message.attempts -= 1  # Throttling is not a failed attempt
+                return time.monotonic() + retry_after, retry_after
+            if e.error_code < 500:
+                # Bot blocked, chat not found, bad markup: retrying won't help
+                self._dead_letter(message, e)
+                return None, 0
+            error = e
+        except Exception as e:
+            error = e  # Network error
+
+        if message.attempts >= self.max_attempts:
+            self._dead_letter(message, error)
+            return None, 0
+        backoff = self.backoff_base * 2 ** (message.attempts - 1)
+        return time.monotonic() + backoff, 0
+
+    def _dead_letter(self, message, error):
+        print(f"Undeliverable message to {message.chat_id}: {error}")
+        message.error = error
+        payload = json.dumps({'args': message.args, 'kwargs': message.kwargs},
+                             default=_to_json, ensure_ascii=False)
+        try:
+            with db_pool.transaction() as conn:
+                conn.execute('''
+                    INSERT INTO dead_letters
+                    (bot, chat_id, method, payload, error, attempts, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (message.bot.token_name, message.chat_id, message.method,
+                      payload, str(error), message.attempts, time.time()))
+        except Exception as e:
+            print(f"Error saving dead letter: {e}")
+
+    def _work(self):
+        while True:
+            key, message = self._take()
+            try:
+                retry_at, pause = self._deliver(message)
+            except Exception as e:
+                print(f"Error in send queue: {e}")
+                message.error = e
+                retry_at, pause = None, 0
+            self._finish(key, retry_at, pause)
+
+            if retry_at is None and message.on_done is not None:
+                try:
+                    message.on_done(message.error)
+                except Exception as e:
+                    print(f"Error in send callback: {e}")
+
+    def start(self, workers=SEND_QUEUE_WORKERS):
+        """Start the worker threads once per process"""
+        with self._cond:
+            if self._threads:
+                return
+            for i in range(workers):
+                thread = threading.Thread(
+                    target=self._work, name=f"SendQueue-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def pending(self):
+        """Number of queued messages, including ones being sent"""
+        with self._cond:
+            return sum(len(queue) for queue in self._chats.values())
+
+
+send_queue = SendQueue()
@@ -0,0 +1,18 @@
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import config
+
+# Set before database.py is imported: the tests never open barbershop.db
+TMP_DIR = tempfile.mkdtemp(prefix='navbatgo_tests_')
+config.DATABASE_PATH = os.path.join(TMP_DIR, 'test.db')
+
+
+def pytest_sessionfinish(session, exitstatus):
+    import db_pool
+    db_pool.get_pool().close_all()
+    shutil.rmtree(TMP_DIR, ignore_errors=True)
@@ -0,0 +1,101 @@
+import threading
+from datetime import date, timedelta
+
+import database
+import db_pool
+import utils
+from availability import ACTIVE_STATUSES
+
+THREADS = 16
+
+
+def create_shop():
+    """Shop with one barber, a 60 minute service and THREADS clients"""
+    with db_pool.transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO barbershops (owner_id, name, city_id, is_active) VALUES (1, 'Test', 1, 1)")
+        shop_id = cursor.lastrowid
+        cursor.execute("INSERT INTO barbers (barbershop_id, full_name, work_schedule) VALUES (?, 'B', '09:00-21:00')",
+                       (shop_id,))
+        barber_id = cursor.lastrowid
+        cursor.execute('''
+            INSERT INTO services (barbershop_id, name_uz, name_ru, name_en, price, duration_minutes)
+            VALUES (?, 'x', 'x', 'x', 1, 60)
+        ''', (shop_id,))
+        service_id = cursor.lastrowid
+        cursor.executemany(
+            "INSERT OR IGNORE INTO users (telegram_id, full_name, phone) VALUES (?, 'Client', '+998')",
+            [(client,) for client in range(1, THREADS + 1)])
+    return shop_id, barber_id, service_id
+
+
+def test_parallel_bookings_of_one_slot():
+    database.init_database()
+    shop_id, barber_id, service_id = create_shop()
+    day = (date.today() + timedelta(days=1)).strftime("%Y-%m-%d")
+
+    barrier = threading.Barrier(THREADS)
+    results = [None] * THREADS
+
+    def book(i):
+        barrier.wait()
+        results[i] = utils.create_booking(i + 1, barber_id, shop_id, service_id, day, '10:00')
+
+    threads = [threading.Thread(target=book, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    winners = [result for result in results if result.booking_id]
+    conflicts = [result for result in results if result.conflict]
+    assert len(winners) == 1
+    assert len(conflicts) == THREADS - 1
+    assert all('10:00' not in result.free_slots for result in conflicts)
+
+    with db_pool.connection() as conn:
+        active = conn.execute(
+            "SELECT COUNT(*) FROM bookings WHERE barber_id = ? AND booking_date = ? AND status IN (?, ?)",
+            (barber_id, day) + tuple(ACTIVE_STATUSES)).fetchone()[0]
+    assert active == 1
+
+
+def active_bookings(barber_id, day):
+    with db_pool.connection() as conn:
+        return conn.execute(
+            "SELECT id, booking_time FROM bookings WHERE barber_id = ? AND booking_date = ? AND status IN (?, ?) "
+            "ORDER BY booking_time",
+            (barber_id, day) + tuple(ACTIVE_STATUSES)).fetchall()
+
+
+def test_stale_buttons_keep_one_booking_per_slot():
+    database.init_database()
+    shop_id, barber_id, service_id = create_shop()
+    day = (date.today() + timedelta(days=1)).strftime("%Y-%m-%d")
+
+    # Same start: client 1 cancels, client 2 books, the barber confirms booking 1
+    first = utils.create_booking(1, barber_id, shop_id, service_id, day, '10:00').booking_id
+    assert utils.update_booking_status(first, 'cancelled', client_id=1)
+    second = utils.create_booking(2, barber_id, shop_id, service_id, day, '10:00').booking_id
+    assert second
+    assert not utils.update_booking_status(first, 'confirmed')
+    assert not utils.update_booking_status(first, 'cancelled')
+
+    # Overlapping start
+    third = utils.create_booking(3, barber_id, shop_id, service_id, day, '12:00').booking_id
+    assert utils.update_booking_status(third, 'cancelled', client_id=3)
+    fourth = utils.create_booking(4, barber_id, shop_id, service_id, day, '12:30').booking_id
+    assert fourth
+    assert not utils.update_booking_status(third, 'confirmed')
+    assert active_bookings(barber_id, day) == [(second, '10:00'), (fourth, '12:30')]
+
+    # Each change goes through once, from the right status
+    assert not utils.update_booking_status(second, 'completed')
+    assert utils.update_booking_status(second, 'confirmed')
+    assert not utils.update_booking_status(second, 'confirmed')
+    assert not utils.update_booking_status(second, 'cancelled')
+    assert not utils.update_booking_status(fourth, 'cancelled', client_id=1)
+    assert utils.update_booking_status(second, 'completed')
+    assert utils.update_booking_status(fourth, 'confirmed')
+    assert utils.update_booking_status(fourth, 'cancelled', client_id=4)
+    assert active_bookings(barber_id, day) == []
@@ -0,0 +1,73 @@
+import pytest
+
+import availability
+import barber_bot
+import database
+import db_pool
+import utils
+from migrations import migrate
+from reminders import reminder_scheduler
+
+# The hot per-update reads, run through the real functions so the checked
+# SQL is the SQL the bots execute. Cities and districts are not here:
+# reference_data loads both tables whole, once per TTL.
+HOT_PATHS = [
+    ('availability.load_barber_days',
+     lambda conn: availability.load_barber_days(conn, [1, 2, 3], '2025-01-01', '2025-01-14')),
+    ('utils.get_user_bookings', lambda conn: utils.get_user_bookings(1)),
+    ('utils.get_barbershops_by_location', lambda conn: utils.get_barbershops_by_location(1, 1)),
+    ('utils.get_barbershops_by_location (city only)',
+     lambda conn: utils.get_barbershops_by_location(1)),
+    ('barber_bot.get_shop_bookings', lambda conn: barber_bot.get_shop_bookings(1, '2025-01-01')),
+    ('barber_bot.get_owner_barbershop', lambda conn: barber_bot.get_owner_barbershop(1)),
+    ('reminders next due', lambda conn: reminder_scheduler.next_due()),
+    ('reminders dispatch', lambda conn: reminder_scheduler.dispatch_due()),
+]
+
+
+@pytest.fixture(scope='module')
+def schema():
+    with db_pool.connection() as conn:
+        migrate(conn)
+
+
+@pytest.fixture
+def traced(schema):
+    """Statements run on pooled connections while the test runs"""
+    statements = []
+    pool = db_pool.get_pool()
+    factory = pool._factory
+
+    def traced_connection():
+        conn = factory()
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    pool.close_all()
+    pool._factory = traced_connection
+    try:
+        yield statements
+    finally:
+        pool.close_all()
+        pool._factory = factory
+
+
+def query_plan(sql):
+    conn = database.get_db_connection()
+    try:
+        return [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql)]
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize('name, run', HOT_PATHS, ids=[name for name, _ in HOT_PATHS])
+def test_hot_queries_use_an_index(traced, name, run):
+    with db_pool.connection() as conn:
+        run(conn)
+
+    queries = [sql for sql in traced
+               if sql.lstrip().split(None, 1)[0].upper() in ('SELECT', 'UPDATE', 'DELETE')]
+    assert queries, f"{name} ran no queries"
+    for sql in queries:
+        plan = query_plan(sql)
+        assert not [line for line in plan if line.startswith('SCAN ')], (sql, plan)
@@ -0,0 +1,77 @@
+import time
+
+import database
+import db_pool
+from reminders import ReminderScheduler
+
+
+def add_reminder(booking_id, remind_at):
+    with db_pool.transaction() as conn:
+        conn.execute("DELETE FROM reminders WHERE booking_id = ?", (booking_id,))
+        conn.execute("INSERT INTO reminders (booking_id, kind, due_at, remind_at) VALUES (?, 'hour', ?, ?)",
+                     (booking_id, remind_at, remind_at))
+
+
+def reminder(booking_id):
+    with db_pool.connection() as conn:
+        return conn.execute("SELECT due_at, sent_at, skipped FROM reminders WHERE booking_id = ?",
+                            (booking_id,)).fetchone()
+
+
+def scheduler(sent):
+    """Scheduler whose send records the on_done callbacks instead of sending"""
+    instance = ReminderScheduler(claim_lease=60)
+    instance._send = lambda booking_id, kind, on_done: sent.append(on_done) or True
+    return instance
+
+
+def test_sent_only_after_delivery():
+    database.init_database()
+    add_reminder(901, int(time.time()) - 1)
+    sent = []
+
+    assert scheduler(sent).dispatch_due() == 1
+    due_at, sent_at, _ = reminder(901)
+    assert sent_at is None and due_at > time.time()
+
+    # A second process finds it claimed
+    assert scheduler(sent).dispatch_due() == 0
+    assert len(sent) == 1
+
+    sent[0](None)
+    _, sent_at, skipped = reminder(901)
+    assert sent_at is not None and skipped == 0
+
+
+def test_retried_after_the_lease():
+    database.init_database()
+    add_reminder(902, int(time.time()) - 1)
+    sent = []
+
+    instance = scheduler(sent)
+    instance.dispatch_due()
+    # No callback (the process died): the lease runs out
+    with db_pool.transaction() as conn:
+        conn.execute("UPDATE reminders SET due_at = ? WHERE booking_id = 902", (int(time.time()) - 1,))
+    assert instance.dispatch_due() == 1
+
+    # The stale claim can no longer mark it
+    sent[0](None)
+    assert reminder(902)[1] is None
+    sent[1](None)
+    assert reminder(902)[1] is not None
+
+
+def test_undelivered_and_late_are_skipped():
+    database.init_database()
+    sent = []
+    instance = scheduler(sent)
+
+    add_reminder(903, int(time.time()) - 1)
+    instance.dispatch_due()
+    sent[0](RuntimeError('Forbidden: bot was blocked by the user'))
+    assert reminder(903)[2] == 1
+
+    add_reminder(904, int(time.time()) - instance.grace_period - 60)
+    assert instance.dispatch_due() == 0
+    assert reminder(904)[1] is not None and reminder(904)[2] == 1
@@ -0,0 +1,35 @@
+import pytest
+
+from schedules import DayHours, parse_hours, parse_range, parse_time
+
+
+def test_parse_time():
+    assert parse_time('09:30') == 570
+    assert parse_time('9:30') == 570
+    assert parse_time('00:00') == 0
+    assert parse_time('24:00', end=True) == 24 * 60
+
+
+@pytest.mark.parametrize('text', ['09:75', '9:5', '25:00', '24:00', '24:30', '', '0930', '09:30:00', '٠٩:٣٠'])
+def test_parse_time_rejects(text):
+    with pytest.raises(ValueError):
+        parse_time(text)
+
+
+def test_parse_range():
+    assert parse_range('09:00-19:00') == (540, 1140)
+    assert parse_range('18:00 - 24:00') == (1080, 1440)
+
+
+@pytest.mark.parametrize('text', ['09:75-19:00', '9:5-19:00', '25:00-26:00', '24:00-24:00',
+                                  '19:00-09:00', '09:00-19:61', '09:00'])
+def test_parse_range_rejects(text):
+    with pytest.raises(ValueError):
+        parse_range(text)
+
+
+def test_parse_hours():
+    assert parse_hours('09:00-19:00 13:00-14:00,17:00-17:15') == \
+        DayHours(540, 1140, ((780, 840), (1020, 1035)))
+    with pytest.raises(ValueError):
+        parse_hours('09:00-19:00 13:00-14:75')
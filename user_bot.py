@@ -1,22 +1,30 @@
-import telebot
 from telebot import types
 from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardMarkup, KeyboardButton
-import sqlite3
 from datetime import datetime, timedelta
-import threading
-from time import sleep
 import re
 
-from config import USER_BOT_TOKEN, LANGUAGES, get_translation, TIME_SLOTS
+from config import get_languages, get_translation, TIME_SLOTS
 from utils import (
     get_user_language, get_text, register_user, get_cities, get_districts,
     get_barbershops_by_location, get_barbershop_details, create_booking,
     get_user_bookings, get_nearby_barbershops, format_booking_details,
-    get_available_time_slots, calculate_distance
+    get_available_time_slots, get_free_slot_counts, get_earliest_slots, get_area_earliest_slots,
+    get_service_duration,
+    calculate_distance, set_user_language,
+    invalidate_user_language, load_user_language, update_booking_status
 )
-
-# Initialize bot
-bot = telebot.TeleBot(USER_BOT_TOKEN)
+import db_pool
+import holds
+from send_queue import send_queue
+from events import event_bus, BOOKING_CONFIRMED, BOOKING_CANCELLED
+from reminders import reminder_scheduler
+from database import init_database
+from bot_app import LazyBot
+from context import ContextMiddleware
+from callback_router import CallbackRouter
+
+# Bot is built on first use (see startuser)
+bot = LazyBot('USER_BOT_TOKEN', use_class_middlewares=True)
 
 # User session data storage
 user_sessions = {}
@@ -31,6 +39,8 @@ class UserSession:
         self.district_id = None
         self.barbershop_id = None
         self.barber_id = None
+        self.any_barber = False
+        self.quick_search = False
         self.service_id = None
         self.booking_date = None
         self.booking_time = None
@@ -45,6 +55,14 @@ def get_user_session(user_id):
     return user_sessions[user_id]
 
 
+# One user lookup per update: language and session come from the context
+bot.setup_middleware(ContextMiddleware(load_user_language, get_user_session))
+
+# All inline buttons, matched on their callback data in one trie lookup
+router = CallbackRouter()
+router.attach(bot)
+
+
 def clear_user_session(user_id):
     """Clear user session data"""
     if user_id in user_sessions:
@@ -61,11 +79,10 @@ def start_command(message):
     username = message.from_user.username
 
     # Check if user is registered
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE telegram_id = ?", (user_id,))
-    user_exists = cursor.fetchone()
-    conn.close()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM users WHERE telegram_id = ?", (user_id,))
+        user_exists = cursor.fetchone()
 
     if user_exists:
         # User is registered, show main menu
@@ -79,7 +96,7 @@ def show_language_selection(message):
     """Show language selection buttons"""
     markup = InlineKeyboardMarkup(row_width=2)
 
-    for lang_code, lang_data in LANGUAGES.items():
+    for lang_code, lang_data in get_languages().items():
         btn_text = f"{lang_data['emoji']} {lang_data['language_name']}"
         markup.add(InlineKeyboardButton(
             btn_text, callback_data=f"lang_{lang_code}"))
@@ -100,11 +117,10 @@ def my_bookings_command(message):
     user_id = message.from_user.id
 
     # Check if user is registered
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE telegram_id = ?", (user_id,))
-    user = cursor.fetchone()
-    conn.close()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM users WHERE telegram_id = ?", (user_id,))
+        user = cursor.fetchone()
 
     if not user:
         bot.send_message(
@@ -145,11 +161,10 @@ def settings_command(message):
     user_id = message.from_user.id
 
     # Check if user is registered
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE telegram_id = ?", (user_id,))
-    user = cursor.fetchone()
-    conn.close()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM users WHERE telegram_id = ?", (user_id,))
+        user = cursor.fetchone()
 
     if not user:
         bot.send_message(
@@ -161,11 +176,10 @@ def settings_command(message):
 # -------------------- REGISTRATION FLOW --------------------
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('lang_'))
-def handle_language_selection(call):
+@router.route('lang_<lang_code>')
+def handle_language_selection(call, lang_code):
     """Handle language selection"""
     user_id = call.from_user.id
-    lang_code = call.data.split('_')[1]
 
     # Ask for phone number
     markup = ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
@@ -182,6 +196,7 @@ def handle_language_selection(call):
 
     # Store language in session temporarily
     user_sessions[user_id] = {'language': lang_code, 'step': 'waiting_contact'}
+    invalidate_user_language(user_id)
 
 
 @bot.message_handler(content_types=['contact'])
@@ -244,6 +259,9 @@ def show_main_menu(message, user_id):
             f"🔍 {get_text(user_id, 'search')}", callback_data='search_shops')
     )
 
+    markup.add(InlineKeyboardButton(
+        f"⚡ {get_text(user_id, 'quick_slot')}", callback_data='quick_slot'))
+
     markup.add(
         InlineKeyboardButton(
             f"⚙️ {get_text(user_id, 'settings')}", callback_data='settings'),
@@ -272,16 +290,27 @@ def show_main_menu(message, user_id):
 # -------------------- BOOKING FLOW --------------------
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'book_new')
+@router.route('book_new')
 def start_booking_flow(call):
     """Start new booking flow"""
     user_id = call.from_user.id
     lang = get_user_language(user_id)
+    get_user_session(user_id).quick_search = False
 
     # Show city selection
     show_city_selection(call.message, user_id)
 
 
+@router.route('quick_slot')
+def start_quick_search(call):
+    """Earliest free slot anywhere in a city or district"""
+    user_id = call.from_user.id
+    get_user_session(user_id).quick_search = True
+
+    # Same city/district steps, then slots instead of shops
+    show_city_selection(call.message, user_id)
+
+
 def show_city_selection(message, user_id):
     """Show city selection"""
     lang = get_user_language(user_id)
@@ -313,11 +342,10 @@ def show_city_selection(message, user_id):
         )
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('city_'))
-def handle_city_selection(call):
+@router.route('city_<int:city_id>')
+def handle_city_selection(call, city_id):
     """Handle city selection"""
     user_id = call.from_user.id
-    city_id = int(call.data.split('_')[1])
 
     # Store city in session
     session = get_user_session(user_id)
@@ -359,27 +387,27 @@ def show_district_selection(message, user_id, city_id):
     )
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('district_'))
-def handle_district_selection(call):
+@router.route('district_all')
+@router.route('district_<int:district_id>')
+def handle_district_selection(call, district_id=None):
     """Handle district selection"""
     user_id = call.from_user.id
-    district_data = call.data.split('_')[1]
 
     session = get_user_session(user_id)
-
-    if district_data == 'all':
-        session.district_id = None
-    else:
-        session.district_id = int(district_data)
+    session.district_id = district_id  # None for 'all'
 
     session.current_step = 'district_selected'
 
+    if session.quick_search:
+        show_area_slots(call.message, user_id, session.city_id, session.district_id)
+        return
+
     # Show barbershops
     show_barbershops_selection(
         call.message, user_id, session.city_id, session.district_id)
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'skip_district')
+@router.route('skip_district')
 def skip_district(call):
     """Skip district selection"""
     user_id = call.from_user.id
@@ -387,10 +415,74 @@ def skip_district(call):
     session.district_id = None
     session.current_step = 'district_skipped'
 
+    if session.quick_search:
+        show_area_slots(call.message, user_id, session.city_id, None)
+        return
+
     # Show barbershops
     show_barbershops_selection(call.message, user_id, session.city_id, None)
 
 
+def area_slots_markup(slots):
+    """One button per slot: date, time, shop and barber"""
+    markup = InlineKeyboardMarkup(row_width=1)
+    for date_str, time_slot, barber_id, barber_name, shop_id, shop_name in slots:
+        display_date = datetime.strptime(date_str, "%Y-%m-%d").strftime("%d.%m")
+        markup.add(InlineKeyboardButton(
+            f"⏰ {display_date} {time_slot} — {shop_name}, {barber_name}",
+            callback_data=f"nearslot_{shop_id}_{barber_id}_{date_str}_{time_slot}"))
+    return markup
+
+
+def show_area_slots(message, user_id, city_id, district_id):
+    """Show the earliest free slots across all shops of a city/district"""
+    slots = get_area_earliest_slots(city_id, district_id)
+
+    if not slots:
+        markup = InlineKeyboardMarkup()
+        markup.add(InlineKeyboardButton(
+            f"🔙 {get_text(user_id, 'back')}", callback_data=f"city_{city_id}"))
+
+        bot.edit_message_text(
+            f"❌ *{get_text(user_id, 'no_results')}*\n\n"
+            f"{get_text(user_id, 'no_area_slots')}",
+            message.chat.id,
+            message.message_id,
+            parse_mode='Markdown',
+            reply_markup=markup
+        )
+        return
+
+    markup = area_slots_markup(slots)
+    markup.add(InlineKeyboardButton(
+        f"🔙 {get_text(user_id, 'back')}", callback_data=f"city_{city_id}"))
+
+    bot.edit_message_text(
+        f"⚡ *{get_text(user_id, 'quick_slot')}*\n\n"
+        f"{get_text(user_id, 'quick_slot_choose')}",
+        message.chat.id,
+        message.message_id,
+        parse_mode='Markdown',
+        reply_markup=markup
+    )
+
+
+@router.route('nearslot_<int:shop_id>_<int:barber_id>_<date_str>_<time_str>')
+def handle_area_slot_selection(call, shop_id, barber_id, date_str, time_str):
+    """Handle a slot picked in the city-wide search"""
+    user_id = call.from_user.id
+
+    # Booked without a service, like skipping the service step
+    session = get_user_session(user_id)
+    session.barbershop_id = shop_id
+    session.barber_id = barber_id
+    session.service_id = None
+    session.booking_date = date_str
+    session.booking_time = time_str
+
+    show_booking_confirmation(call.message, user_id)
+
+
 def show_barbershops_selection(message, user_id, city_id, district_id):
     """Show barbershops in selected location"""
     lang = get_user_language(user_id)
@@ -445,11 +537,10 @@ def show_barbershops_selection(message, user_id, city_id, district_id):
     )
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('shop_'))
-def handle_barbershop_selection(call):
+@router.route('shop_<int:shop_id>')
+def handle_barbershop_selection(call, shop_id):
     """Handle barbershop selection"""
     user_id = call.from_user.id
-    shop_id = int(call.data.split('_')[1])
 
     # Store barbershop in session
     session = get_user_session(user_id)
@@ -576,11 +667,10 @@ def show_barbershop_details(message, user_id, shop_id):
     )
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('choose_barber_'))
-def handle_choose_barber(call):
+@router.route('choose_barber_<int:shop_id>')
+def handle_choose_barber(call, shop_id):
     """Handle choose barber button"""
     user_id = call.from_user.id
-    shop_id = int(call.data.split('_')[2])
 
     # Store barbershop in session
     session = get_user_session(user_id)
@@ -611,6 +701,9 @@ def show_barbers_selection(message, user_id, shop_id):
 
     markup = InlineKeyboardMarkup(row_width=1)
 
+    markup.add(InlineKeyboardButton(
+        f"⚡ {get_text(user_id, 'any_barber')}", callback_data="any_barber"))
+
     for barber in details['barbers']:
         barber_id, name, exp, specialty, rating, desc = barber
 
@@ -638,21 +731,42 @@ def show_barbers_selection(message, user_id, shop_id):
     )
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('barber_'))
-def handle_barber_selection(call):
+@router.route('barber_<int:barber_id>')
+def handle_barber_selection(call, barber_id):
     """Handle barber selection"""
     user_id = call.from_user.id
-    barber_id = int(call.data.split('_')[1])
 
     # Store barber in session
     session = get_user_session(user_id)
     session.barber_id = barber_id
+    session.any_barber = False
     session.current_step = 'barber_selected'
 
     # Show service selection or date selection
     show_service_selection(call.message, user_id, session.barbershop_id)
 
 
+@router.route('any_barber')
+def handle_any_barber(call):
+    """Book with whichever barber is free first"""
+    user_id = call.from_user.id
+
+    session = get_user_session(user_id)
+    session.barber_id = None
+    session.any_barber = True
+    session.current_step = 'barber_selected'
+
+    show_service_selection(call.message, user_id, session.barbershop_id)
+
+
+def show_next_step(message, user_id):
+    """After the service: earliest slots in any-barber mode, else dates"""
+    if get_user_session(user_id).any_barber:
+        show_earliest_slots(message, user_id)
+    else:
+        show_date_selection(message, user_id)
+
+
 def show_service_selection(message, user_id, shop_id):
     """Show services for selected barbershop"""
     lang = get_user_language(user_id)
@@ -660,7 +774,7 @@ def show_service_selection(message, user_id, shop_id):
 
     if not details or not details['services']:
         # Skip service selection if no services
-        show_date_selection(message, user_id)
+        show_next_step(message, user_id)
         return
 
     markup = InlineKeyboardMarkup(row_width=1)
@@ -687,21 +801,20 @@ def show_service_selection(message, user_id, shop_id):
     )
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('service_'))
-def handle_service_selection(call):
+@router.route('service_<int:service_id>')
+def handle_service_selection(call, service_id):
     """Handle service selection"""
     user_id = call.from_user.id
-    service_id = int(call.data.split('_')[1])
 
     # Store service in session
     session = get_user_session(user_id)
     session.service_id = service_id
 
     # Show date selection
-    show_date_selection(call.message, user_id)
+    show_next_step(call.message, user_id)
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'skip_service')
+@router.route('skip_service')
 def skip_service_selection(call):
     """Skip service selection"""
     user_id = call.from_user.id
@@ -709,7 +822,64 @@ def skip_service_selection(call):
     session.service_id = None
 
     # Show date selection
-    show_date_selection(call.message, user_id)
+    show_next_step(call.message, user_id)
+
+
+def show_earliest_slots(message, user_id):
+    """Show the earliest free slots across all barbers of the shop"""
+    session = get_user_session(user_id)
+    lang = get_user_language(user_id)
+    details = get_barbershop_details(session.barbershop_id, lang)
+    duration = get_service_duration(session.barbershop_id, session.service_id)
+    slots = get_earliest_slots(session.barbershop_id, duration)
+
+    markup = InlineKeyboardMarkup(row_width=1)
+
+    if not slots:
+        markup.add(InlineKeyboardButton(
+            f"🔙 {get_text(user_id, 'back')}", callback_data=f"choose_barber_{session.barbershop_id}"))
+
+        bot.edit_message_text(
+            f"❌ {get_text(user_id, 'no_free_slots_soon')}",
+            message.chat.id,
+            message.message_id,
+            parse_mode='Markdown',
+            reply_markup=markup
+        )
+        return
+
+    names = {barber[0]: barber[1] for barber in details['barbers']}
+    for date_str, time_slot, barber_id in slots:
+        display_date = datetime.strptime(date_str, "%Y-%m-%d").strftime("%d.%m")
+        markup.add(InlineKeyboardButton(
+            f"⏰ {display_date} {time_slot} — {names.get(barber_id, '')}",
+            callback_data=f"anyslot_{barber_id}_{date_str}_{time_slot}"))
+
+    markup.add(InlineKeyboardButton(
+        f"🔙 {get_text(user_id, 'back')}", callback_data=f"choose_barber_{session.barbershop_id}"))
+
+    bot.edit_message_text(
+        f"⚡ *{get_text(user_id, 'choose_time')}*\n\n"
+        f"{get_text(user_id, 'earliest_all_barbers')}",
+        message.chat.id,
+        message.message_id,
+        parse_mode='Markdown',
+        reply_markup=markup
+    )
+
+
+@router.route('anyslot_<int:barber_id>_<date_str>_<time_str>')
+def handle_any_slot_selection(call, barber_id, date_str, time_str):
+    """Handle a slot picked in any-barber mode"""
+    user_id = call.from_user.id
+
+    # The slot fixes barber, date and time at once
+    session = get_user_session(user_id)
+    session.barber_id = barber_id
+    session.booking_date = date_str
+    session.booking_time = time_str
+
+    show_booking_confirmation(call.message, user_id)
 
 
 def show_date_selection(message, user_id):
@@ -738,13 +908,24 @@ def show_date_selection(message, user_id):
 
         dates.append((date_str, display))
 
+    # Free slots per day for the chosen barber and service, in one lookup
+    session = get_user_session(user_id)
+    duration = get_service_duration(session.barbershop_id, session.service_id)
+    free_counts = get_free_slot_counts(
+        session.barber_id, [date_str for date_str, _ in dates], duration)
+
     markup = InlineKeyboardMarkup(row_width=2)
 
     # Add dates in rows of 2
     row = []
     for date_str, display in dates[:8]:  # Show first 8 days
-        row.append(InlineKeyboardButton(
-            display, callback_data=f"date_{date_str}"))
+        if free_counts.get(date_str):
+            button = InlineKeyboardButton(display, callback_data=f"date_{date_str}")
+        else:
+            # Fully booked - keep the day visible but don't open it
+            button = InlineKeyboardButton(
+                display.replace("📅", "🚫", 1), callback_data="day_full")
+        row.append(button)
         if len(row) == 2:
             markup.row(*row)
             row = []
@@ -757,7 +938,6 @@ def show_date_selection(message, user_id):
         markup.add(InlineKeyboardButton(
             "➡️ Еще даты", callback_data="more_dates"))
 
-    session = get_user_session(user_id)
     markup.add(InlineKeyboardButton(
         f"🔙 {get_text(user_id, 'back')}", callback_data=f"choose_barber_{session.barbershop_id}"))
 
@@ -771,11 +951,17 @@ def show_date_selection(message, user_id):
     )
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('date_'))
-def handle_date_selection(call):
+@router.route('day_full')
+def handle_full_day(call):
+    """Fully booked day was pressed"""
+    bot.answer_callback_query(
+        call.id, "❌ На эту дату нет свободных слотов", show_alert=True)
+
+
+@router.route('date_<date_str>')
+def handle_date_selection(call, date_str):
     """Handle date selection"""
     user_id = call.from_user.id
-    date_str = call.data.split('_')[1]
 
     # Store date in session
     session = get_user_session(user_id)
@@ -785,10 +971,15 @@ def handle_date_selection(call):
     show_time_selection(call.message, user_id, session.barber_id, date_str)
 
 
-def show_time_selection(message, user_id, barber_id, date_str):
-    """Show available time slots"""
+def show_time_selection(message, user_id, barber_id, date_str, available_slots=None, notice=""):
+    """Show available time slots (computed unless given)"""
     lang = get_user_language(user_id)
-    available_slots = get_available_time_slots(barber_id, date_str)
+    session = get_user_session(user_id)
+    # Choosing again: the client's own held slot is free for them
+    holds.slot_holds.release(user_id)
+    if available_slots is None:
+        duration = get_service_duration(session.barbershop_id, session.service_id)
+        available_slots = get_available_time_slots(barber_id, date_str, duration)
 
     if not available_slots:
         markup = InlineKeyboardMarkup()
@@ -796,7 +987,7 @@ def show_time_selection(message, user_id, barber_id, date_str):
             f"🔙 {get_text(user_id, 'back')}", callback_data='back_to_dates'))
 
         bot.edit_message_text(
-            f"❌ На эту дату нет свободных слотов.\n"
+            f"{notice}❌ На эту дату нет свободных слотов.\n"
             f"Пожалуйста, выберите другую дату.",
             message.chat.id,
             message.message_id,
@@ -820,7 +1011,6 @@ def show_time_selection(message, user_id, barber_id, date_str):
         markup.row(*row)
 
     # Add navigation
-    session = get_user_session(user_id)
     markup.add(InlineKeyboardButton(
         f"🔙 {get_text(user_id, 'back')}", callback_data='back_to_dates'))
 
@@ -829,7 +1019,7 @@ def show_time_selection(message, user_id, barber_id, date_str):
     display_date = date_obj.strftime("%d.%m.%Y")
 
     bot.edit_message_text(
-        f"⏰ *{get_text(user_id, 'choose_time')}*\n\n"
+        f"{notice}⏰ *{get_text(user_id, 'choose_time')}*\n\n"
         f"📅 Дата: {display_date}\n"
         f"Доступные время:",
         message.chat.id,
@@ -839,11 +1029,10 @@ def show_time_selection(message, user_id, barber_id, date_str):
     )
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('time_'))
-def handle_time_selection(call):
+@router.route('time_<time_str>')
+def handle_time_selection(call, time_str):
     """Handle time selection"""
     user_id = call.from_user.id
-    time_str = call.data.split('_')[1]
 
     # Store time in session
     session = get_user_session(user_id)
@@ -858,36 +1047,43 @@ def show_booking_confirmation(message, user_id):
     session = get_user_session(user_id)
     lang = get_user_language(user_id)
 
-    # Get all details
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-
-    # Get barbershop name
-    cursor.execute("SELECT name FROM barbershops WHERE id = ?",
-                   (session.barbershop_id,))
-    shop_name = cursor.fetchone()[0]
-
-    # Get barber name
-    cursor.execute("SELECT full_name FROM barbers WHERE id = ?",
-                   (session.barber_id,))
-    barber_name = cursor.fetchone()[0]
-
-    # Get service name if selected
-    service_name = None
-    if session.service_id:
-        if lang == 'uz':
-            cursor.execute(
-                "SELECT name_uz FROM services WHERE id = ?", (session.service_id,))
-        elif lang == 'ru':
-            cursor.execute(
-                "SELECT name_ru FROM services WHERE id = ?", (session.service_id,))
-        else:
-            cursor.execute(
-                "SELECT name_en FROM services WHERE id = ?", (session.service_id,))
-        result = cursor.fetchone()
-        service_name = result[0] if result else None
+    # Keep the slot for this client while they read the confirmation
+    duration = get_service_duration(session.barbershop_id, session.service_id)
+    if not holds.slot_holds.hold(user_id, session.barber_id, session.booking_date,
+                                 session.booking_time, duration):
+        show_time_selection(
+            message, user_id, session.barber_id, session.booking_date,
+            notice=f"⚠️ {get_text(user_id, 'slot_taken_or_held')}\n\n")
+        return
 
-    conn.close()
+    # Get all details
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+
+        # Get barbershop name
+        cursor.execute("SELECT name FROM barbershops WHERE id = ?",
+                       (session.barbershop_id,))
+        shop_name = cursor.fetchone()[0]
+
+        # Get barber name
+        cursor.execute("SELECT full_name FROM barbers WHERE id = ?",
+                       (session.barber_id,))
+        barber_name = cursor.fetchone()[0]
+
+        # Get service name if selected
+        service_name = None
+        if session.service_id:
+            if lang == 'uz':
+                cursor.execute(
+                    "SELECT name_uz FROM services WHERE id = ?", (session.service_id,))
+            elif lang == 'ru':
+                cursor.execute(
+                    "SELECT name_ru FROM services WHERE id = ?", (session.service_id,))
+            else:
+                cursor.execute(
+                    "SELECT name_en FROM services WHERE id = ?", (session.service_id,))
+            result = cursor.fetchone()
+            service_name = result[0] if result else None
 
     # Format confirmation message
     confirmation_text = f"✅ *{get_text(user_id, 'booking_confirmed')}*\n\n"
@@ -900,6 +1096,7 @@ def show_booking_confirmation(message, user_id):
 
     confirmation_text += f"📅 {get_text(user_id, 'date')}: {session.booking_date}\n"
     confirmation_text += f"⏰ {get_text(user_id, 'time')}: {session.booking_time}\n\n"
+    confirmation_text += f"⏳ {get_text(user_id, 'slot_held_minutes').format(minutes=holds.slot_holds.ttl // 60)}\n\n"
     confirmation_text += "📍 *Примечание:*\n"
     confirmation_text += "• Пожалуйста, приходите за 5-10 минут до назначенного времени\n"
     confirmation_text += "• В случае опоздания более 15 минут, бронь может быть отменена\n"
@@ -924,14 +1121,23 @@ def show_booking_confirmation(message, user_id):
     )
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'confirm_booking')
+@router.route('cancel_booking')
+def handle_cancel_booking_draft(call):
+    """Cancel on the confirmation step: free the held slot"""
+    user_id = call.from_user.id
+    holds.slot_holds.release(user_id)
+    clear_user_session(user_id)
+    show_main_menu(call.message, user_id)
+
+
+@router.route('confirm_booking')
 def handle_booking_confirmation(call):
     """Handle booking confirmation"""
     user_id = call.from_user.id
     session = get_user_session(user_id)
 
     # Create booking in database
-    booking_id, booking_info = create_booking(
+    result = create_booking(
         user_id,
         session.barber_id,
         session.barbershop_id,
@@ -940,8 +1146,18 @@ def handle_booking_confirmation(call):
         session.booking_time,
         session.notes
     )
+    booking_id, booking_info = result.booking_id, result.booking_info
+
+    if result.conflict:
+        # Someone else took the slot first - offer what is still free
+        bot.answer_callback_query(
+            call.id, f"❌ {get_text(user_id, 'slot_taken_choose_other')}", show_alert=True)
+        session.booking_time = None
+        show_time_selection(
+            call.message, user_id, session.barber_id, session.booking_date,
+            result.free_slots, f"⚠️ {get_text(user_id, 'slot_just_taken')}\n\n")
 
-    if booking_id:
+    elif booking_id:
         # Format success message
         lang = get_user_language(user_id)
         success_text = f"🎉 *{get_text(user_id, 'booking_confirmed')}*\n\n"
@@ -966,12 +1182,10 @@ def handle_booking_confirmation(call):
             reply_markup=markup
         )
 
-        # Clear session
+        # Clear session (create_booking published booking.created for
+        # the barber bot)
         clear_user_session(user_id)
 
-        # TODO: Send notifications to barber bot
-        # send_booking_notifications(booking_id, bot)
-
     else:
         bot.answer_callback_query(
             call.id, "❌ Ошибка при создании брони. Пожалуйста, попробуйте снова.")
@@ -1100,28 +1314,26 @@ def show_my_bookings(message, user_id):
         )
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('view_booking_'))
-def handle_view_booking(call):
+@router.route('view_booking_<int:booking_id>')
+def handle_view_booking(call, booking_id):
     """View booking details"""
     user_id = call.from_user.id
-    booking_id = int(call.data.split('_')[2])
 
     # Get booking details
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        SELECT bk.id, b.name, br.full_name, bk.booking_date, bk.booking_time, bk.status,
-               s.name_uz, s.price, bk.notes, b.phone, b.address
-        FROM bookings bk
-        JOIN barbershops b ON bk.barbershop_id = b.id
-        JOIN barbers br ON bk.barber_id = br.id
-        LEFT JOIN services s ON bk.service_id = s.id
-        WHERE bk.id = ? AND bk.client_id = ?
-    ''', (booking_id, user_id))
-
-    booking = cursor.fetchone()
-    conn.close()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT bk.id, b.name, br.full_name, bk.booking_date, bk.booking_time, bk.status,
+                   s.name_uz, s.price, bk.notes, b.phone, b.address
+            FROM bookings bk
+            JOIN barbershops b ON bk.barbershop_id = b.id
+            JOIN barbers br ON bk.barber_id = br.id
+            LEFT JOIN services s ON bk.service_id = s.id
+            WHERE bk.id = ? AND bk.client_id = ?
+        ''', (booking_id, user_id))
+
+        booking = cursor.fetchone()
 
     if not booking:
         bot.answer_callback_query(call.id, "❌ Бронь не найдена")
@@ -1189,22 +1401,17 @@ def handle_view_booking(call):
     )
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('cancel_my_booking_'))
-def handle_cancel_booking(call):
+@router.route('cancel_my_booking_<int:booking_id>')
+def handle_cancel_booking(call, booking_id):
     """Cancel user's booking"""
     user_id = call.from_user.id
-    booking_id = int(call.data.split('_')[3])
 
     # Update booking status
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-
-    cursor.execute("UPDATE bookings SET status = 'cancelled' WHERE id = ? AND client_id = ?",
-                   (booking_id, user_id))
-    conn.commit()
-    conn.close()
-
-    bot.answer_callback_query(call.id, "✅ Бронь отменена")
+    if update_booking_status(booking_id, 'cancelled', client_id=user_id):
+        bot.answer_callback_query(call.id, "✅ Бронь отменена")
+    else:
+        bot.answer_callback_query(
+            call.id, f"⚠️ {get_text(user_id, 'booking_already_changed')}", show_alert=True)
 
     # Go back to bookings list
     show_my_bookings(call.message, user_id)
@@ -1212,7 +1419,7 @@ def handle_cancel_booking(call):
 # -------------------- NEARBY SHOPS --------------------
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'nearby_shops')
+@router.route('nearby_shops')
 def handle_nearby_shops(call):
     """Handle nearby shops request"""
     user_id = call.from_user.id
@@ -1274,7 +1481,10 @@ def handle_location(message):
             text += f"   📞 {shop['phone']}\n"
         text += "\n"
 
-    markup = InlineKeyboardMarkup(row_width=1)
+    # Earliest free slots across the nearby shops
+    slots = get_area_earliest_slots(
+        shop_ids=[shop['id'] for shop in nearby_shops], limit=3)
+    markup = area_slots_markup(slots)
 
     for shop in nearby_shops[:3]:  # Add buttons for first 3 shops
         markup.add(InlineKeyboardButton(
@@ -1296,7 +1506,7 @@ def handle_location(message):
 # -------------------- SEARCH FUNCTIONALITY --------------------
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'search_shops')
+@router.route('search_shops')
 def handle_search_shops(call):
     """Handle search request"""
     user_id = call.from_user.id
@@ -1326,32 +1536,31 @@ def handle_search_query(message):
         return
 
     # Search in database
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
 
-    search_pattern = f"%{query}%"
+        search_pattern = f"%{query}%"
 
-    # Search barbershops
-    cursor.execute('''
-        SELECT id, name, address, rating 
-        FROM barbershops 
-        WHERE is_active = 1 AND (name LIKE ? OR address LIKE ?)
-        LIMIT 10
-    ''', (search_pattern, search_pattern))
+        # Search barbershops
+        cursor.execute('''
+            SELECT id, name, address, rating 
+            FROM barbershops 
+            WHERE is_active = 1 AND (name LIKE ? OR address LIKE ?)
+            LIMIT 10
+        ''', (search_pattern, search_pattern))
 
-    shops = cursor.fetchall()
+        shops = cursor.fetchall()
 
-    # Search barbers
-    cursor.execute('''
-        SELECT b.id, br.full_name, b.name, b.address
-        FROM barbers br
-        JOIN barbershops b ON br.barbershop_id = b.id
-        WHERE br.is_active = 1 AND b.is_active = 1 AND br.full_name LIKE ?
-        LIMIT 10
-    ''', (search_pattern,))
+        # Search barbers
+        cursor.execute('''
+            SELECT b.id, br.full_name, b.name, b.address
+            FROM barbers br
+            JOIN barbershops b ON br.barbershop_id = b.id
+            WHERE br.is_active = 1 AND b.is_active = 1 AND br.full_name LIKE ?
+            LIMIT 10
+        ''', (search_pattern,))
 
-    barbers = cursor.fetchall()
-    conn.close()
+        barbers = cursor.fetchall()
 
     # Prepare results
     text = f"🔍 *Результаты поиска для: '{query}'*\n\n"
@@ -1412,12 +1621,11 @@ def show_settings_menu(message, user_id):
     lang = get_user_language(user_id)
 
     # Get user info
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT full_name, phone FROM users WHERE telegram_id = ?", (user_id,))
-    user_info = cursor.fetchone()
-    conn.close()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT full_name, phone FROM users WHERE telegram_id = ?", (user_id,))
+        user_info = cursor.fetchone()
 
     full_name, phone = user_info if user_info else ("Не указано", "Не указано")
 
@@ -1425,7 +1633,8 @@ def show_settings_menu(message, user_id):
     text += f"👤 *{get_text(user_id, 'profile')}:*\n"
     text += f"   • {get_text(user_id, 'name')}: {full_name}\n"
     text += f"   • {get_text(user_id, 'phone')}: {phone}\n"
-    text += f"   • {get_text(user_id, 'language')}: {LANGUAGES[lang]['language_name']} {LANGUAGES[lang]['emoji']}\n\n"
+    lang_data = get_languages()[lang]
+    text += f"   • {get_text(user_id, 'language')}: {lang_data['language_name']} {lang_data['emoji']}\n\n"
     text += "Выберите действие:"
 
     markup = InlineKeyboardMarkup(row_width=2)
@@ -1464,7 +1673,7 @@ def show_settings_menu(message, user_id):
         )
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'edit_profile')
+@router.route('edit_profile')
 def handle_edit_profile(call):
     """Handle edit profile request"""
     user_id = call.from_user.id
@@ -1494,14 +1703,14 @@ def handle_edit_profile(call):
     )
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'change_language')
+@router.route('change_language')
 def handle_change_language(call):
     """Handle change language request"""
     user_id = call.from_user.id
 
     markup = InlineKeyboardMarkup(row_width=2)
 
-    for lang_code, lang_data in LANGUAGES.items():
+    for lang_code, lang_data in get_languages().items():
         btn_text = f"{lang_data['emoji']} {lang_data['language_name']}"
         markup.add(InlineKeyboardButton(
             btn_text, callback_data=f"set_lang_{lang_code}"))
@@ -1519,22 +1728,16 @@ def handle_change_language(call):
     )
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('set_lang_'))
-def handle_set_language(call):
+@router.route('set_lang_<lang_code>')
+def handle_set_language(call, lang_code):
     """Set user language"""
     user_id = call.from_user.id
-    lang_code = call.data.split('_')[2]
 
     # Update language in database
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-    cursor.execute(
-        "UPDATE users SET language = ? WHERE telegram_id = ?", (lang_code, user_id))
-    conn.commit()
-    conn.close()
+    set_user_language(user_id, lang_code)
 
     bot.answer_callback_query(
-        call.id, f"✅ Язык изменен на {LANGUAGES[lang_code]['language_name']}")
+        call.id, f"✅ Язык изменен на {get_languages()[lang_code]['language_name']}")
 
     # Return to settings
     show_settings_menu(call.message, user_id)
@@ -1542,111 +1745,122 @@ def handle_set_language(call):
 # -------------------- NOTIFICATION SYSTEM --------------------
 
 
-def send_reminders():
-    """Send booking reminders"""
-    while True:
-        try:
-            conn = sqlite3.connect('barbershop.db')
-            cursor = conn.cursor()
-
-            # Get current time
-            now = datetime.now()
-
-            # 1 hour before reminder
-            reminder_time = (now + timedelta(hours=1)
-                             ).strftime("%Y-%m-%d %H:%M")
-
-            cursor.execute('''
-                SELECT bk.client_id, b.name, br.full_name, bk.booking_date, bk.booking_time
-                FROM bookings bk
-                JOIN barbershops b ON bk.barbershop_id = b.id
-                JOIN barbers br ON bk.barber_id = br.id
-                WHERE bk.status = 'confirmed'
-                AND datetime(bk.booking_date || ' ' || bk.booking_time) 
-                BETWEEN datetime(?, '-1 minute') AND datetime(?, '+1 minute')
-            ''', (reminder_time, reminder_time))
-
-            for booking in cursor.fetchall():
-                client_id, shop_name, barber_name, date, time = booking
-
-                reminder_text = f"⏰ *Напоминание о бронировании*\n\n"
-                reminder_text += f"Через 1 час у вас запись:\n\n"
-                reminder_text += f"🏢 *{shop_name}*\n"
-                reminder_text += f"💇 *{barber_name}*\n"
-                reminder_text += f"📅 *Дата:* {date}\n"
-                reminder_text += f"⏰ *Время:* {time}\n\n"
-                reminder_text += "📍 Пожалуйста, приходите вовремя!"
-
-                try:
-                    bot.send_message(client_id, reminder_text,
-                                     parse_mode='Markdown')
-                except:
-                    pass
-
-            # 30 minutes before reminder
-            reminder_time = (now + timedelta(minutes=30)
-                             ).strftime("%Y-%m-%d %H:%M")
-
-            cursor.execute('''
-                SELECT bk.client_id, b.name, br.full_name, bk.booking_date, bk.booking_time
-                FROM bookings bk
-                JOIN barbershops b ON bk.barbershop_id = b.id
-                JOIN barbers br ON bk.barber_id = br.id
-                WHERE bk.status = 'confirmed'
-                AND datetime(bk.booking_date || ' ' || bk.booking_time) 
-                BETWEEN datetime(?, '-1 minute') AND datetime(?, '+1 minute')
-            ''', (reminder_time, reminder_time))
-
-            for booking in cursor.fetchall():
-                client_id, shop_name, barber_name, date, time = booking
-
-                reminder_text = f"⏰ *Скоро ваша запись*\n\n"
-                reminder_text += f"Через 30 минут у вас запись:\n\n"
-                reminder_text += f"🏢 *{shop_name}*\n"
-                reminder_text += f"💇 *{barber_name}*\n"
-                reminder_text += f"📅 *Дата:* {date}\n"
-                reminder_text += f"⏰ *Время:* {time}\n\n"
-                reminder_text += "📍 Пожалуйста, не опаздывайте!"
-
-                try:
-                    bot.send_message(client_id, reminder_text,
-                                     parse_mode='Markdown')
-                except:
-                    pass
-
-            conn.close()
-
-        except Exception as e:
-            print(f"Error in reminder system: {e}")
-
-        # Sleep for 1 minute
-        sleep(60)
+REMINDER_TEXTS = {
+    'hour': ("⏰ *Напоминание о бронировании*\n\n", "Через 1 час у вас запись:\n\n",
+             "📍 Пожалуйста, приходите вовремя!"),
+    'half_hour': ("⏰ *Скоро ваша запись*\n\n", "Через 30 минут у вас запись:\n\n",
+                  "📍 Пожалуйста, не опаздывайте!"),
+}
+
+
+def send_reminder(booking_id, kind, on_done):
+    """Queue one booking reminder, called by the reminder scheduler when due
+
+    on_done(error) runs once the send queue delivered or gave up on it;
+    returns False when the booking is no longer confirmed.
+    """
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT bk.client_id, b.name, br.full_name, bk.booking_date, bk.booking_time
+            FROM bookings bk
+            JOIN barbershops b ON bk.barbershop_id = b.id
+            JOIN barbers br ON bk.barber_id = br.id
+            WHERE bk.id = ? AND bk.status = 'confirmed'
+        ''', (booking_id,))
+        booking = cursor.fetchone()
+
+    if not booking:
+        return False  # Cancelled since it was scheduled
+
+    client_id, shop_name, barber_name, date, time = booking
+    title, intro, footer = REMINDER_TEXTS[kind]
+
+    reminder_text = title
+    reminder_text += intro
+    reminder_text += f"🏢 *{shop_name}*\n"
+    reminder_text += f"💇 *{barber_name}*\n"
+    reminder_text += f"📅 *Дата:* {date}\n"
+    reminder_text += f"⏰ *Время:* {time}\n\n"
+    reminder_text += footer
+
+    send_queue.send_message(bot, client_id, reminder_text, parse_mode='Markdown', on_done=on_done)
+    return True
+
+
+def get_booking_notice_info(booking_id):
+    """(client_id, shop_name, barber_name, date, time) or None"""
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT bk.client_id, b.name, br.full_name, bk.booking_date, bk.booking_time
+            FROM bookings bk
+            JOIN barbershops b ON bk.barbershop_id = b.id
+            JOIN barbers br ON bk.barber_id = br.id
+            WHERE bk.id = ?
+        ''', (booking_id,))
+        return cursor.fetchone()
+
+
+def handle_booking_confirmed(payload):
+    """Tell the client the barbershop confirmed their booking"""
+    booking = get_booking_notice_info(payload['booking_id'])
+    if not booking:
+        return
+    client_id, shop_name, barber_name, date, time = booking
+
+    notification = f"✅ *Ваша бронь подтверждена!*\n\n"
+    notification += f"🏢 *Барбершоп:* {shop_name}\n"
+    notification += f"💇 *Мастер:* {barber_name}\n"
+    notification += f"📅 *Дата:* {date}\n"
+    notification += f"⏰ *Время:* {time}\n\n"
+    notification += "📍 Пожалуйста, приходите вовремя!"
+
+    send_queue.send_message(bot, client_id, notification, parse_mode='Markdown')
+
+
+def handle_booking_cancelled(payload):
+    """Tell the client the barbershop rejected their booking"""
+    if payload.get('by_client'):
+        return  # The client cancelled it here
+    booking = get_booking_notice_info(payload['booking_id'])
+    if not booking:
+        return
+    client_id, shop_name, barber_name, date, time = booking
+
+    notification = f"❌ *Ваша бронь отклонена*\n\n"
+    notification += f"🏢 *Барбершоп:* {shop_name}\n"
+    notification += f"📅 *Дата:* {date}\n"
+    notification += f"⏰ *Время:* {time}\n\n"
+    notification += "Пожалуйста, выберите другое время или свяжитесь с барбершопом."
+
+    send_queue.send_message(bot, client_id, notification, parse_mode='Markdown')
 
 # -------------------- BACK BUTTONS --------------------
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'main_menu')
+@router.route('main_menu')
 def handle_main_menu(call):
     """Go to main menu"""
     user_id = call.from_user.id
     show_main_menu(call.message, user_id)
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'my_bookings')
+@router.route('my_bookings')
 def handle_my_bookings(call):
     """Go to my bookings"""
     user_id = call.from_user.id
     show_my_bookings(call.message, user_id)
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'settings')
+@router.route('settings')
 def handle_settings(call):
     """Go to settings"""
     user_id = call.from_user.id
     show_settings_menu(call.message, user_id)
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'back_to_shops')
+@router.route('back_to_shops')
 def handle_back_to_shops(call):
     """Go back to shops list"""
     user_id = call.from_user.id
@@ -1659,14 +1873,14 @@ def handle_back_to_shops(call):
         show_main_menu(call.message, user_id)
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'back_to_dates')
+@router.route('back_to_dates')
 def handle_back_to_dates(call):
     """Go back to date selection"""
     user_id = call.from_user.id
     show_date_selection(call.message, user_id)
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'refresh_bookings')
+@router.route('refresh_bookings')
 def handle_refresh_bookings(call):
     """Refresh bookings list"""
     user_id = call.from_user.id
@@ -1675,13 +1889,25 @@ def handle_refresh_bookings(call):
 # -------------------- MAIN --------------------
 
 
+def setupuser():
+    """Database, background tasks and event subscriptions of the bot"""
+    init_database()
+    db_pool.start_checkpoint_task()
+    holds.start_eviction_task()
+    send_queue.start()
+
+    reminder_scheduler.start(send_reminder)
+
+    # Booking decisions made in the barber bot
+    event_bus.subscribe(BOOKING_CONFIRMED, handle_booking_confirmed, 'user_bot')
+    event_bus.subscribe(BOOKING_CANCELLED, handle_booking_cancelled, 'user_bot')
+    event_bus.start_relay('user_bot')
+
+
 def startuser():
     """Main function to start the bot"""
     print("🤖 User bot is starting...")
-
-    # Start reminder thread
-    reminder_thread = threading.Thread(target=send_reminders, daemon=True)
-    reminder_thread.start()
+    setupuser()
 
     # Start bot
     print("✅ User bot is running. Press Ctrl+C to stop.")
@@ -1,19 +1,80 @@
-import sqlite3
+import heapq
 import json
+import sqlite3
+from collections import namedtuple
 from datetime import datetime, timedelta
 from math import radians, sin, cos, sqrt, atan2
-from config import LANGUAGES, get_translation
+from config import (
+    get_translation, LANGUAGE_CACHE_SIZE, LANGUAGE_CACHE_TTL,
+    BARBERSHOP_CACHE_SIZE, BARBERSHOP_CACHE_TTL
+)
+from cache import TTLCache, MISSING
+from context import get_context_for
+from reference_data import reference_data
+from availability import (
+    availability_index, get_free_slots, slot_is_free, to_minutes, to_time_str, ACTIVE_STATUSES
+)
+from holds import slot_holds, held_intervals, overlaps
+from schedules import schedule_store
+from reminders import reminder_scheduler, schedule_reminders, cancel_reminders
+from events import event_bus, BOOKING_CREATED, STATUS_EVENTS
+import db_pool
+
+# telegram_id -> language, kept in sync by the functions that write it
+language_cache = TTLCache(LANGUAGE_CACHE_SIZE, LANGUAGE_CACHE_TTL)
+
+# (barbershop_id, language) -> details dict, see invalidate_barbershop
+barbershop_cache = TTLCache(BARBERSHOP_CACHE_SIZE, BARBERSHOP_CACHE_TTL)
+
+# (city_id, district_id) or shop ids -> active barbers there, see get_area_barbers
+area_cache = TTLCache(BARBERSHOP_CACHE_SIZE, BARBERSHOP_CACHE_TTL)
 
 
 def get_user_language(user_id):
     """Get user's language preference"""
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT language FROM users WHERE telegram_id = ?", (user_id,))
-    result = cursor.fetchone()
-    conn.close()
-    return result[0] if result else 'uz'
+    # Resolved once per update when called for the user being served
+    context = get_context_for(user_id)
+    if context is not None:
+        return context.language
+    return load_user_language(user_id)
+
+
+def load_user_language(user_id):
+    """Get user's language from the cache or the database"""
+    language = language_cache.get(user_id)
+    if language is not MISSING:
+        return language
+
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT language FROM users WHERE telegram_id = ?", (user_id,))
+        result = cursor.fetchone()
+
+    language = result[0] if result else 'uz'
+    language_cache.set(user_id, language)
+    return language
+
+
+def set_user_language(user_id, language):
+    """Save user's language preference"""
+    with db_pool.transaction() as conn:
+        conn.execute(
+            "UPDATE users SET language = ? WHERE telegram_id = ?", (language, user_id))
+    language_cache.set(user_id, language)
+
+    context = get_context_for(user_id)
+    if context is not None:
+        context.language = language
+
+
+def invalidate_user_language(user_id):
+    """Forget the cached language of a user"""
+    language_cache.invalidate(user_id)
+
+    context = get_context_for(user_id)
+    if context is not None:
+        context.language = None
 
 
 def get_text(user_id, key):
@@ -24,146 +85,127 @@ def get_text(user_id, key):
 
 def register_user(telegram_id, full_name, username, phone, language='uz'):
     """Register a new user"""
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
     try:
-        cursor.execute('''
-            INSERT OR REPLACE INTO users (telegram_id, full_name, username, phone, language)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (telegram_id, full_name, username, phone, language))
-        conn.commit()
+        with db_pool.transaction() as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO users (telegram_id, full_name, username, phone, language)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (telegram_id, full_name, username, phone, language))
+        language_cache.set(telegram_id, language)
+
+        context = get_context_for(telegram_id)
+        if context is not None:
+            context.language = language
         return True
     except Exception as e:
         print(f"Error registering user: {e}")
         return False
-    finally:
-        conn.close()
 
 
 def get_cities(language='uz'):
     """Get list of cities"""
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-
-    if language == 'uz':
-        cursor.execute(
-            "SELECT id, name_uz FROM cities WHERE is_active = 1 ORDER BY name_uz")
-    elif language == 'ru':
-        cursor.execute(
-            "SELECT id, name_ru FROM cities WHERE is_active = 1 ORDER BY name_ru")
-    else:
-        cursor.execute(
-            "SELECT id, name_en FROM cities WHERE is_active = 1 ORDER BY name_en")
-
-    cities = cursor.fetchall()
-    conn.close()
-    return cities
+    return reference_data.cities(language)
 
 
 def get_districts(city_id, language='uz'):
     """Get districts for a city"""
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-
-    if language == 'uz':
-        cursor.execute('''
-            SELECT id, name_uz FROM districts 
-            WHERE city_id = ? AND is_active = 1 
-            ORDER BY name_uz
-        ''', (city_id,))
-    elif language == 'ru':
-        cursor.execute('''
-            SELECT id, name_ru FROM districts 
-            WHERE city_id = ? AND is_active = 1 
-            ORDER BY name_ru
-        ''', (city_id,))
-    else:
-        cursor.execute('''
-            SELECT id, name_en FROM districts 
-            WHERE city_id = ? AND is_active = 1 
-            ORDER BY name_en
-        ''', (city_id,))
-
-    districts = cursor.fetchall()
-    conn.close()
-    return districts
+    return reference_data.districts(city_id, language)
 
 
 def get_barbershops_by_location(city_id, district_id=None, language='uz'):
     """Get barbershops by location"""
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
 
-    query = '''
-        SELECT id, name, address, phone, rating, description 
-        FROM barbershops 
-        WHERE city_id = ? AND is_active = 1
-    '''
-    params = [city_id]
+        query = '''
+            SELECT id, name, address, phone, rating, description 
+            FROM barbershops 
+            WHERE city_id = ? AND is_active = 1
+        '''
+        params = [city_id]
 
-    if district_id:
-        query += ' AND district_id = ?'
-        params.append(district_id)
+        if district_id:
+            query += ' AND district_id = ?'
+            params.append(district_id)
 
-    query += ' ORDER BY rating DESC, name'
+        query += ' ORDER BY rating DESC, name'
 
-    cursor.execute(query, params)
-    barbershops = cursor.fetchall()
-    conn.close()
+        cursor.execute(query, params)
+        barbershops = cursor.fetchall()
 
     return barbershops
 
 
 def get_barbershop_details(barbershop_id, language='uz'):
-    """Get detailed information about a barbershop"""
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        SELECT b.name, b.address, b.phone, b.description, b.rating,
-               c.name_uz, c.name_ru, c.name_en,
-               d.name_uz, d.name_ru, d.name_en,
-               b.latitude, b.longitude
-        FROM barbershops b
-        JOIN cities c ON b.city_id = c.id
-        LEFT JOIN districts d ON b.district_id = d.id
-        WHERE b.id = ?
-    ''', (barbershop_id,))
-
-    result = cursor.fetchone()
-
-    # Get photos
-    cursor.execute('''
-        SELECT photo_id, caption, is_main 
-        FROM barbershop_photos 
-        WHERE barbershop_id = ? 
-        ORDER BY is_main DESC
-    ''', (barbershop_id,))
-    photos = cursor.fetchall()
-
-    # Get barbers
-    cursor.execute('''
-        SELECT id, full_name, experience_years, specialty, rating, description
-        FROM barbers 
-        WHERE barbershop_id = ? AND is_active = 1
-        ORDER BY rating DESC
-    ''', (barbershop_id,))
-    barbers = cursor.fetchall()
-
-    # Get services
-    cursor.execute('''
-        SELECT id, 
-               CASE WHEN ? = 'uz' THEN name_uz 
-                    WHEN ? = 'ru' THEN name_ru 
-                    ELSE name_en END as name,
-               price, duration_minutes
-        FROM services 
-        WHERE barbershop_id = ? AND is_active = 1
-        ORDER BY price
-    ''', (language, language, barbershop_id))
-    services = cursor.fetchall()
-
-    conn.close()
+    """Get detailed information about a barbershop
+
+    Served from barbershop_cache; the returned dict is shared, do not modify it.
+    """
+    details = barbershop_cache.get((barbershop_id, language))
+    if details is not MISSING:
+        return details
+
+    details = load_barbershop_details(barbershop_id, language)
+    if details is not None:
+        barbershop_cache.set((barbershop_id, language), details)
+    return details
+
+
+def invalidate_barbershop(barbershop_id):
+    """Forget cached details of a barbershop in every language"""
+    barbershop_cache.invalidate_matching(lambda key: key[0] == barbershop_id)
+    # A shop can belong to many areas; they are cheap to rebuild
+    area_cache.clear()
+
+
+def load_barbershop_details(barbershop_id, language='uz'):
+    """Read barbershop details from the database"""
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT b.name, b.address, b.phone, b.description, b.rating,
+                   c.name_uz, c.name_ru, c.name_en,
+                   d.name_uz, d.name_ru, d.name_en,
+                   b.latitude, b.longitude
+            FROM barbershops b
+            JOIN cities c ON b.city_id = c.id
+            LEFT JOIN districts d ON b.district_id = d.id
+            WHERE b.id = ?
+        ''', (barbershop_id,))
+
+        result = cursor.fetchone()
+
+        # Get photos
+        cursor.execute('''
+            SELECT photo_id, caption, is_main 
+            FROM barbershop_photos 
+            WHERE barbershop_id = ? 
+            ORDER BY is_main DESC
+        ''', (barbershop_id,))
+        photos = cursor.fetchall()
+
+        # Get barbers
+        cursor.execute('''
+            SELECT id, full_name, experience_years, specialty, rating, description
+            FROM barbers 
+            WHERE barbershop_id = ? AND is_active = 1
+            ORDER BY rating DESC
+        ''', (barbershop_id,))
+        barbers = cursor.fetchall()
+
+        # Get services
+        cursor.execute('''
+            SELECT id, 
+                   CASE WHEN ? = 'uz' THEN name_uz 
+                        WHEN ? = 'ru' THEN name_ru 
+                        ELSE name_en END as name,
+                   price, duration_minutes
+            FROM services 
+            WHERE barbershop_id = ? AND is_active = 1
+            ORDER BY price
+        ''', (language, language, barbershop_id))
+        services = cursor.fetchall()
 
     if result:
         details = {
@@ -184,60 +226,162 @@ def get_barbershop_details(barbershop_id, language='uz'):
     return None
 
 
+# Outcome of create_booking; on a conflict free_slots holds the refreshed
+# start times of the requested barber-day
+BookingResult = namedtuple(
+    'BookingResult', ['booking_id', 'booking_info', 'conflict', 'free_slots'])
+
+
 def create_booking(client_id, barber_id, barbershop_id, service_id, date, time, notes=''):
-    """Create a new booking"""
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
+    """Create a new booking if the slot is still free, return a BookingResult"""
+    try:
+        with db_pool.transaction() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute(
+                "SELECT duration_minutes FROM services WHERE id = ?", (service_id,))
+            service = cursor.fetchone()
+            duration = service[0] if service else None
+
+            # The transaction holds the write lock, so the check and the
+            # insert can't interleave with another booking or hold
+            if not slot_is_free(conn, barber_id, date, time, duration) or \
+                    overlaps(held_intervals(conn, barber_id, date, client_id), time, duration):
+                return booking_conflict(conn, client_id, barber_id, date, duration)
+
+            cursor.execute('''
+                INSERT INTO bookings 
+                (client_id, barber_id, barbershop_id, service_id, booking_date, booking_time, status, notes)
+                VALUES (?, ?, ?, ?, ?, ?, 'pending', ?)
+            ''', (client_id, barber_id, barbershop_id, service_id, date, time, notes))
+
+            booking_id = cursor.lastrowid
+
+            # Get booking details for notification
+            cursor.execute('''
+                SELECT u.full_name, u.phone, b.name, br.full_name, s.name_uz, bk.booking_date, bk.booking_time
+                FROM bookings bk
+                JOIN users u ON bk.client_id = u.telegram_id
+                JOIN barbershops b ON bk.barbershop_id = b.id
+                JOIN barbers br ON bk.barber_id = br.id
+                JOIN services s ON bk.service_id = s.id
+                WHERE bk.id = ?
+            ''', (booking_id,))
+
+            booking_info = cursor.fetchone()
+
+        availability_index.booking_added(booking_id, barber_id, date, time, duration)
+        slot_holds.release(client_id)
+    except sqlite3.IntegrityError:
+        # idx_bookings_active_slot: same start taken by a writer that
+        # skipped the overlap check
+        with db_pool.connection() as conn:
+            return booking_conflict(conn, client_id, barber_id, date, duration)
+    except Exception as e:
+        print(f"Error creating booking: {e}")
+        return BookingResult(None, None, False, [])
+
+    event_bus.publish(BOOKING_CREATED, booking_id=booking_id)
+    return BookingResult(booking_id, booking_info, False, [])
+
+
+def booking_conflict(conn, client_id, barber_id, date, duration):
+    """Conflict result with the barber-day's free slots read from SQL"""
+    # The cached bitmaps missed the booking that won - reload them
+    availability_index.invalidate_barber(barber_id)
+    held = held_intervals(conn, barber_id, date, client_id)
+    free_slots = [slot for slot in get_free_slots(conn, barber_id, date, duration)
+                  if not overlaps(held, slot, duration)]
+    return BookingResult(None, None, True, free_slots)
+
+
+# status -> statuses a booking may change to it from, so a stale button
+# can't bring back a cancelled booking; clients may cancel any active one
+STATUS_CHANGES = {
+    'confirmed': ('pending',),
+    'cancelled': ('pending',),
+    'completed': ('confirmed',),
+}
+
+
+def update_booking_status(booking_id, status, client_id=None):
+    """Change booking status and keep the availability bitmaps and the
+    booking's reminders in step
+
+    Pass client_id to only touch the booking if it belongs to that client
+    (the event then says by_client). Returns True if the booking was
+    updated, False if it is gone, was changed meanwhile or its slot was
+    taken.
+    """
+    allowed = STATUS_CHANGES[status]
+    if status == 'cancelled' and client_id is not None:
+        allowed = ACTIVE_STATUSES
 
     try:
-        cursor.execute('''
-            INSERT INTO bookings 
-            (client_id, barber_id, barbershop_id, service_id, booking_date, booking_time, status, notes)
-            VALUES (?, ?, ?, ?, ?, ?, 'pending', ?)
-        ''', (client_id, barber_id, barbershop_id, service_id, date, time, notes))
+        with db_pool.transaction() as conn:
+            cursor = conn.cursor()
+
+            query = '''
+                SELECT bk.status, bk.barber_id, bk.booking_date, bk.booking_time, s.duration_minutes
+                FROM bookings bk
+                LEFT JOIN services s ON bk.service_id = s.id
+                WHERE bk.id = ?
+            '''
+            params = [booking_id]
+            if client_id is not None:
+                query += " AND bk.client_id = ?"
+                params.append(client_id)
+            cursor.execute(query, params)
+            booking = cursor.fetchone()
+            if booking is None or booking[0] not in allowed:
+                return False
+
+            old_status, barber_id, date, time, duration = booking
+            # Active again: the slot may have been booked since
+            if status in ACTIVE_STATUSES and old_status not in ACTIVE_STATUSES and \
+                    not slot_is_free(conn, barber_id, date, time, duration):
+                return False
+
+            cursor.execute("UPDATE bookings SET status = ? WHERE id = ?", (status, booking_id))
+
+            if status == 'confirmed':
+                schedule_reminders(cursor, booking_id, date, time)
+            else:
+                cancel_reminders(cursor, booking_id)
+    except sqlite3.IntegrityError:
+        # idx_bookings_active_slot: the start time is taken
+        return False
+
+    if status in ACTIVE_STATUSES:
+        availability_index.booking_added(booking_id, barber_id, date, time, duration)
+    else:
+        availability_index.booking_removed(booking_id, barber_id, date)
+    if status == 'confirmed':
+        reminder_scheduler.wake()
+    if status in STATUS_EVENTS:
+        event_bus.publish(STATUS_EVENTS[status], booking_id=booking_id,
+                          by_client=client_id is not None)
+    return True
 
-        booking_id = cursor.lastrowid
-        conn.commit()
 
-        # Get booking details for notification
+def get_user_bookings(user_id):
+    """Get all bookings for a user"""
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+
         cursor.execute('''
-            SELECT u.full_name, u.phone, b.name, br.full_name, s.name_uz, bk.booking_date, bk.booking_time
+            SELECT bk.id, b.name, br.full_name, bk.booking_date, bk.booking_time, bk.status,
+                   s.name_uz, s.price
             FROM bookings bk
-            JOIN users u ON bk.client_id = u.telegram_id
             JOIN barbershops b ON bk.barbershop_id = b.id
             JOIN barbers br ON bk.barber_id = br.id
-            JOIN services s ON bk.service_id = s.id
-            WHERE bk.id = ?
-        ''', (booking_id,))
+            LEFT JOIN services s ON bk.service_id = s.id
+            WHERE bk.client_id = ?
+            ORDER BY bk.booking_date DESC, bk.booking_time DESC
+        ''', (user_id,))
 
-        booking_info = cursor.fetchone()
-        conn.close()
+        bookings = cursor.fetchall()
 
-        return booking_id, booking_info
-    except Exception as e:
-        conn.close()
-        print(f"Error creating booking: {e}")
-        return None, None
-
-
-def get_user_bookings(user_id):
-    """Get all bookings for a user"""
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        SELECT bk.id, b.name, br.full_name, bk.booking_date, bk.booking_time, bk.status,
-               s.name_uz, s.price
-        FROM bookings bk
-        JOIN barbershops b ON bk.barbershop_id = b.id
-        JOIN barbers br ON bk.barber_id = br.id
-        LEFT JOIN services s ON bk.service_id = s.id
-        WHERE bk.client_id = ?
-        ORDER BY bk.booking_date DESC, bk.booking_time DESC
-    ''', (user_id,))
-
-    bookings = cursor.fetchall()
-    conn.close()
     return bookings
 
 
@@ -262,17 +406,16 @@ def calculate_distance(lat1, lon1, lat2, lon2):
 
 def get_nearby_barbershops(user_lat, user_lon, radius_km=5, language='uz'):
     """Get barbershops within specified radius"""
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
 
-    cursor.execute('''
-        SELECT id, name, address, phone, rating, latitude, longitude
-        FROM barbershops 
-        WHERE is_active = 1 AND latitude IS NOT NULL AND longitude IS NOT NULL
-    ''')
+        cursor.execute('''
+            SELECT id, name, address, phone, rating, latitude, longitude
+            FROM barbershops 
+            WHERE is_active = 1 AND latitude IS NOT NULL AND longitude IS NOT NULL
+        ''')
 
-    all_shops = cursor.fetchall()
-    conn.close()
+        all_shops = cursor.fetchall()
 
     nearby_shops = []
     for shop in all_shops:
@@ -314,90 +457,113 @@ def format_booking_details(booking_info, language='uz'):
     return details
 
 
-def get_available_time_slots(barber_id, date):
-    """Get available time slots for a barber on specific date"""
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
+def get_available_time_slots(barber_id, date, duration=None):
+    """Get start times on a date where a service of `duration` minutes fits"""
+    return availability_index.free_slots(barber_id, date, duration)
 
-    # Get barber's work schedule
-    cursor.execute(
-        "SELECT work_schedule FROM barbers WHERE id = ?", (barber_id,))
-    result = cursor.fetchone()
-    work_schedule = result[0] if result else "09:00-19:00"
 
-    # Parse work schedule
-    try:
-        start_str, end_str = work_schedule.split('-')
-        start_hour = int(start_str.split(':')[0])
-        end_hour = int(end_str.split(':')[0])
-    except:
-        start_hour, end_hour = 9, 19
-
-    # Get booked slots
-    cursor.execute('''
-        SELECT booking_time FROM bookings 
-        WHERE barber_id = ? AND booking_date = ? AND status IN ('confirmed', 'pending')
-    ''', (barber_id, date))
-
-    booked_times = [row[0] for row in cursor.fetchall()]
-    conn.close()
-
-    # Generate time slots (every 30 minutes)
-    available_slots = []
-    for hour in range(start_hour, end_hour):
-        for minute in [0, 30]:
-            time_str = f"{hour:02d}:{minute:02d}"
-            if time_str not in booked_times:
-                available_slots.append(time_str)
-
-    return available_slots
-
-
-def send_booking_notifications(booking_id, bot):
-    """Send notifications about new booking"""
-    conn = sqlite3.connect('barbershop.db')
-    cursor = conn.cursor()
-
-    # Get booking details
-    cursor.execute('''
-        SELECT b.owner_id, br.full_name, bk.booking_date, bk.booking_time,
-               bs.name, u.full_name as client_name
-        FROM bookings bk
-        JOIN barbershops b ON bk.barbershop_id = b.id
-        JOIN barbers br ON bk.barber_id = br.id
-        JOIN users u ON bk.client_id = u.telegram_id
-        WHERE bk.id = ?
-    ''', (booking_id,))
-
-    result = cursor.fetchone()
-    if not result:
-        conn.close()
-        return
-
-    owner_id, barber_name, date, time, shop_name, client_name = result
-
-    # Send to barber owner
-    notification = f"🆕 *Yangi bron!*\n\n"
-    notification += f"🏢 Sartaroshxona: {shop_name}\n"
-    notification += f"💇 Sartarosh: {barber_name}\n"
-    notification += f"👤 Mijoz: {client_name}\n"
-    notification += f"📅 Sana: {date}\n"
-    notification += f"⏰ Vaqt: {time}\n"
+def get_free_slot_counts(barber_id, dates, duration=None):
+    """Get {date: number of free start times} for several dates at once"""
+    return availability_index.free_slot_counts(barber_id, dates, duration)
 
-    try:
-        bot.send_message(owner_id, notification, parse_mode='Markdown')
-    except:
-        pass
-
-    # Send to barber if different from owner
-    cursor.execute(
-        'SELECT telegram_id FROM barbers WHERE id = ?', (barber_user_id,))
-    barber_user_id = cursor.fetchone()
-    if barber_user_id and barber_user_id[0] != owner_id:
-        try:
-            bot.send_message(
-                barber_user_id[0], notification, parse_mode='Markdown')
-        except:
-            pass
-
-    conn.close()
+
+def get_earliest_slots(barbershop_id, duration=None, limit=8, days=14):
+    """Get the earliest [(date, time, barber_id)] options across all active
+    barbers of a shop, starting from now"""
+    details = get_barbershop_details(barbershop_id)
+    if not details or not details['barbers']:
+        return []
+
+    # Barbers come ordered by rating, so ties go to the better rated one
+    barber_ids = [barber[0] for barber in details['barbers']]
+    now = datetime.now()
+    dates = [(now + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days)]
+    not_before = (dates[0], to_minutes(now.strftime("%H:%M")))
+    return availability_index.earliest_slots(
+        barber_ids, dates, duration, limit, not_before)
+
+
+def get_area_barbers(city_id=None, district_id=None, shop_ids=None):
+    """Get [(barber_id, barber_name, shop_id, shop_name)] of the active
+    barbers in a city/district or in the given shops, best rated first"""
+    key = tuple(shop_ids) if shop_ids is not None else (city_id, district_id)
+    barbers = area_cache.get(key)
+    if barbers is not MISSING:
+        return barbers
+
+    query = '''
+        SELECT br.id, br.full_name, b.id, b.name
+        FROM barbershops b
+        JOIN barbers br ON br.barbershop_id = b.id
+        WHERE b.is_active = 1 AND br.is_active = 1
+    '''
+    if shop_ids is not None:
+        query += f" AND b.id IN ({', '.join('?' * len(shop_ids))})"
+        params = list(shop_ids)
+    else:
+        query += ' AND b.city_id = ?'
+        params = [city_id]
+        if district_id:
+            query += ' AND b.district_id = ?'
+            params.append(district_id)
+    query += ' ORDER BY b.rating DESC, br.rating DESC'
+
+    with db_pool.connection() as conn:
+        barbers = conn.execute(query, params).fetchall() if params else []
+
+    area_cache.set(key, barbers)
+    return barbers
+
+
+def get_area_earliest_slots(city_id=None, district_id=None, shop_ids=None,
+                            duration=None, limit=10, days=14):
+    """Get the next free slot of the barbers in an area, earliest first:
+    [(date, time, barber_id, barber_name, shop_id, shop_name)]"""
+    barbers = get_area_barbers(city_id, district_id, shop_ids)
+    if not barbers:
+        return []
+
+    now = datetime.now()
+    dates = [(now + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days)]
+    not_before = (dates[0], to_minutes(now.strftime("%H:%M")))
+    next_free = availability_index.next_free(
+        [barber[0] for barber in barbers], dates, duration, not_before)
+
+    # Ties go to the better rated shop and barber
+    options = [(next_free[barber[0]], rank, barber)
+               for rank, barber in enumerate(barbers) if next_free[barber[0]]]
+    return [(date, to_time_str(start)) + barber
+            for (date, start), _, barber in heapq.nsmallest(limit, options)]
+
+
+def get_barber_schedule(barber_id):
+    """Parsed WeeklySchedule of a barber (cached)"""
+    return schedule_store.get(barber_id)
+
+
+def set_barber_hours(barber_id, weekday, hours):
+    """Set a barber's DayHours for a weekday (None = day off)"""
+    schedule_store.set_weekday(barber_id, weekday, hours)
+    availability_index.invalidate_barber(barber_id)
+
+
+def set_barber_exception(barber_id, date, hours, note=None):
+    """Override a barber's hours on one date (None = day off / holiday)"""
+    schedule_store.set_exception(barber_id, date, hours, note)
+    availability_index.invalidate_barber(barber_id)
+
+
+def delete_barber_exception(barber_id, date):
+    schedule_store.delete_exception(barber_id, date)
+    availability_index.invalidate_barber(barber_id)
+
+
+def get_service_duration(barbershop_id, service_id):
+    """Duration of a shop's service in minutes (None if unknown)"""
+    details = get_barbershop_details(barbershop_id)
+    if not details or not service_id:
+        return None
+    for service in details['services']:
+        if service[0] == service_id:
+            return service[3]
+    return None
@@ -0,0 +1,121 @@
+import hmac
+import secrets
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from telebot.types import Update
+
+from config import WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_URL, WEBHOOK_SECRET
+from database import init_database
+import admin_bot
+import barber_bot
+import user_bot
+
+# (name, LazyBot, setup function)
+BOTS = [
+    ('user', user_bot.bot, user_bot.setupuser),
+    ('barber', barber_bot.bot, barber_bot.setupbarber),
+    ('admin', admin_bot.bot, admin_bot.setupadmin),
+]
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+MAX_BODY_SIZE = 1024 * 1024  # Bytes
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """One POSTed update: check path and secret, queue it, answer at once"""
+
+    def do_POST(self):
+        bot = self.server.bots.get(self.path)
+        if bot is None:
+            return self._reply(404)
+
+        secret = self.headers.get(SECRET_HEADER, '')
+        if not hmac.compare_digest(secret.encode(), self.server.secret.encode()):
+            return self._reply(403)
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            length = 0
+        if not 0 < length <= MAX_BODY_SIZE:
+            return self._reply(400)
+        try:
+            update = Update.de_json(self.rfile.read(length).decode('utf-8'))
+        except Exception:
+            return self._reply(400)
+
+        # Dispatcher full: Telegram retries later instead of us queueing
+        # without bound
+        if bot.dispatch(update, block=False) is None:
+            return self._reply(503)
+        self._reply(200)
+
+    def _reply(self, status):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass  # One line per update is too much; handler errors are printed
+
+
+class WebhookServer(ThreadingHTTPServer):
+    """HTTP server receiving the updates of several bots, one path per bot
+
+    Updates are answered as soon as they are queued on the update
+    dispatcher, which runs them in order per chat.
+    """
+
+    daemon_threads = True
+    request_queue_size = 128  # Telegram opens up to 100 connections per bot
+
+    def __init__(self, address, bots, secret):
+        super().__init__(address, WebhookHandler)
+        self.bots = bots  # path -> bot
+        self.secret = secret
+
+
+def setup_bots():
+    """Database, background tasks and event subscriptions of all bots"""
+    init_database()
+    for _, _, setup in BOTS:
+        setup()
+
+
+def bot_paths():
+    """{path: bot} for all bots"""
+    return {f"{WEBHOOK_PATH}/{name}": bot for name, bot, _ in BOTS}
+
+
+def register_webhooks(paths, secret):
+    """Point every bot's webhook at this server"""
+    for path, bot in paths.items():
+        bot.set_webhook(url=WEBHOOK_URL.rstrip('/') + path, secret_token=secret)
+        print(f"🔗 Webhook set: {WEBHOOK_URL.rstrip('/')}{path}")
+
+
+def startall():
+    """Set up all bots and serve their webhooks"""
+    print("🌐 Starting all bots in webhook mode...")
+    if not WEBHOOK_URL and not WEBHOOK_SECRET:
+        print("❌ Set WEBHOOK_URL, or WEBHOOK_SECRET when registering the webhooks yourself")
+        return
+
+    setup_bots()
+    paths = bot_paths()
+    secret = WEBHOOK_SECRET or secrets.token_urlsafe(32)
+    server = WebhookServer((WEBHOOK_HOST, WEBHOOK_PORT), paths, secret)
+    if WEBHOOK_URL:
+        register_webhooks(paths, secret)
+
+    print(f"✅ Listening on {WEBHOOK_HOST}:{WEBHOOK_PORT}. Press Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    startall()